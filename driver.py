@@ -1,32 +1,38 @@
 import csv
+import importlib
 import os.path
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, time
+from typing import Iterable, Iterator, Optional
 from importlib.metadata import requires
 from ratings.log import logger
 
 import click
 
-from ratings.models import Country
+from ratings.models import Country, Event, identity_map
 from ratings.tgs import get_countries, get_organization_by_id, get_events
 from ratings.tgs import get_states
 from ratings.tgs import get_organizations
-from ratings.tgs import get_matches
+from ratings.tgs import get_matches, get_matches_by_age_group
 from ratings.tgs import get_clubs_by_organization_id
-from ratings.tgs import get_events_by_organization_id
-from ratings.models.match import Match
-from ratings.stats import wins
-from ratings.stats import losses
-from ratings.stats import ties
-from ratings.stats import matches_played
-from ratings.stats import goals_for
-from ratings.stats import goals_against
-from ratings.stats import goal_differential
-from ratings.stats import points
-from ratings.stats import wp, owp, oowp, rpi
-from ratings.stats import record
-from ratings.stats import goals_per_match
+from ratings.tgs import get_events_by_organization
+from ratings.services.api import TGSClient, set_default_client
+from ratings.models.match import COMPACT_META_KEYS, Match, share
+from ratings.stats import resolve_backend, team_stats_table
+from ratings.linear import ScheduleSystem
+from ratings.elo import create_rater
+from ratings.poisson import PoissonModel
+from ratings.simulation import SeasonSimulator
+from ratings.bootstrap import bootstrap_rpi
+from ratings.dateindex import DateIndex
+from ratings.rollup import ROLLUP_COLUMNS, Rollup
+from ratings.external import ExternalScheduleSystem, MatchStream, external_team_stats_table
+from ratings.graph import ScheduleGraph, merge_matches
+from ratings.registry import TeamRegistry
+from ratings.matchindex import MatchIndex
+from ratings.cache import StatsCache, config_key, file_digest, partial_team_stats
+from ratings.planner import SchedulePlanner
+from ratings.metrics import MetricRegistry, add_weighted_rpi, standard_registry
 
 @click.group()
 def cli():
@@ -55,11 +61,31 @@ def organizations():
         click.echo(organization)
 
 
+def use_concurrency(concurrency: int):
+    """
+    Sizes the shared TGS client's connection pool for the number of requests in flight.
+    """
+    if concurrency > 1:
+        set_default_client(TGSClient(pool_maxsize=max(10, concurrency)))
+
+
+def make_planner(plan: bool, verify: bool) -> Optional[SchedulePlanner]:
+    """
+    Returns the schedule planner the --plan and --verify flags ask for, or None to fetch every schedule.
+    """
+    if plan or verify:
+        return SchedulePlanner(verify=verify)
+    return None
+
+
 @click.command()
 @click.option('-o', '--organization-id', required=True, type=int, help='Specify the organization id.')
-def events(organization_id: int):
+@click.option('--concurrency', default=1, type=click.IntRange(min=1), help='Specify the maximum number of event lookups in flight.')
+def events(organization_id: int, concurrency: int):
     click.echo(f'Organization id selected: {organization_id}')
-    events = get_events_by_organization_id(organization_id)
+    use_concurrency(concurrency)
+    organization = get_organization_by_id(organization_id)
+    events = get_events_by_organization(organization, concurrency)
     for event in events:
         click.echo(event)
 
@@ -72,49 +98,125 @@ def clubs(organization_id: int):
         click.echo(club)
 
 
+YEARS = ('07', '08', '09', '10')
+
+# The gender each organization plays and the suffix of its matches files.
+ORGANIZATION_FILES = {
+    22: ('boys', 'pre_ecnl'),   # BOYS PRE-ECNL
+    12: ('boys', 'ecnl'),       # ECNL Boys
+    16: ('boys', 'ecrl'),       # ECNL Boys Regional League
+    9: ('girls', 'ecnl'),       # ECNL Girls
+    13: ('girls', 'ecrl'),      # ECNL Girls Regional League
+    21: ('girls', 'pre_ecnl'),  # GIRLS PRE_ECNL
+}
+
+
+def default_matches_file(organization_id: int, year: str, gender: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the default matches file of an organization and year, or None for an unknown organization.
+
+    :param organization_id: The organization id.
+    :param year: The birth year, such as '08'.
+    :param gender: The gender in the file name, the organization's own if None.
+    """
+    entry = ORGANIZATION_FILES.get(organization_id)
+    if entry is None:
+        return None
+
+    organization_gender, suffix = entry
+    return f'matches_{gender or organization_gender}_{year}_{suffix}.csv'
+
+
+def write_matches_to_file(output_file: str, matches: list[Match]):
+    with open(output_file, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['match_id', 'home_team', 'home_team_id', 'home_team_club_id', 'away_team', 'away_team_id', 'away_team_club_id', 'home_score', 'away_score', 'date', 'event_name', 'flight', 'division'])
+        for match in matches:
+            date_only = match.date.strftime('%Y-%m-%d')
+            writer.writerow([match.id, match.home_team, match.home_team_id, match.home_team_club_id, match.away_team, match.away_team_id, match.away_team_club_id, match.home_score, match.away_score, date_only,
+                             match.meta_value('eventName'), match.meta_value('flight'), match.meta_value('division')])
+
+
 @click.command()
 @click.option('-g', '--gender', required=True, type=click.Choice(['girls', 'boys']), help='Specify the gender for the matches.')
-@click.option('-y', '--year', required=True, type=click.Choice(['07', '08', '09', '10']), help='Specify the year for the matches.')
+@click.option('-y', '--year', required=True, type=click.Choice(YEARS), help='Specify the year for the matches.')
 @click.option('-o', '--organization-id', required=True, type=int, help='Specify the organization id.')
 @click.option('--output-file', required=False, type=click.Path(), help='Specify the output file name.')
-def matches(gender: str, year: str, organization_id: int, output_file: Optional[str]):
+@click.option('--include-future', is_flag=True, default=False, help='Include fixtures that have not been played yet.')
+@click.option('--concurrency', default=1, type=click.IntRange(min=1), help='Specify the maximum number of club schedule requests in flight.')
+@click.option('--plan', is_flag=True, default=False, help='Skip club schedules whose matches earlier schedules already hold.')
+@click.option('--verify', is_flag=True, default=False, help='Fetch every schedule and report what --plan would have skipped and missed.')
+def matches(gender: str, year: str, organization_id: int, output_file: Optional[str], include_future: bool, concurrency: int,
+            plan: bool, verify: bool):
+    use_concurrency(concurrency)
+    planner = make_planner(plan, verify)
     organization = get_organization_by_id(organization_id)
 
     if not output_file:
-        if organization.id == 22:  # BOYS PRE-ECNL
-            output_file = f'matches_boys_{year}_pre_ecnl.csv'
-        elif organization.id == 12:  # ECNL Boys
-            output_file = f'matches_boys_{year}_ecnl.csv'
-        elif organization.id == 16: # ECNL Boys Regional League
-            output_file = f'matches_boys_{year}_ecrl.csv'
-        elif organization.id == 9:  # ECNL Girls
-            output_file = f'matches_girls_{year}_ecnl.csv'
-        elif organization.id == 13:  # ECNL Girls Regional League
-            output_file = f'matches_girls_{year}_ecrl.csv'
-        elif organization.id == 21: # GIRLS PRE_ECNL
-            output_file = f'matches_girls_{year}_pre_ecnl.csv'
-
-
-    if os.path.isfile(output_file):
+        output_file = default_matches_file(organization.id, year)
+
+    if output_file and os.path.isfile(output_file):
         click.echo(f'Output file {output_file} already exists. Exiting...')
         return
 
     click.echo(f'Searching matches for {organization.name} {year}...')
 
-    matches = get_matches(gender, year, organization)
+    matches = get_matches(gender, year, organization, include_future, concurrency, planner)
+    if planner is not None:
+        click.echo(planner.report())
 
     if output_file:
-        with open(output_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['match_id', 'home_team', 'home_team_id', 'home_team_club_id', 'away_team', 'away_team_id', 'away_team_club_id', 'home_score', 'away_score', 'date'])
-            for match in matches:
-                date_only = match.date.strftime('%Y-%m-%d')
-                writer.writerow([match.id, match.home_team, match.home_team_id, match.home_team_club_id, match.away_team, match.away_team_id, match.away_team_club_id, match.home_score, match.away_score, date_only])
+        write_matches_to_file(output_file, matches)
     else:
         for match in matches:
             click.echo(f'{match.id} - {match.home_team} vs {match.away_team} - {match.home_score}-{match.away_score} on {match.date}')
 
 
+@click.command()
+@click.option('-o', '--organization-id', required=True, type=int, help='Specify the organization id.')
+@click.option('-g', '--gender', 'genders', multiple=True, type=click.Choice(['girls', 'boys']), help="Specify a gender to harvest; defaults to the organization's gender, or both if it is not known.")
+@click.option('-y', '--year', 'years', multiple=True, type=click.Choice(YEARS), help='Specify a year to harvest; defaults to every year.')
+@click.option('--include-future', is_flag=True, default=False, help='Include fixtures that have not been played yet.')
+@click.option('--concurrency', default=1, type=click.IntRange(min=1), help='Specify the maximum number of club schedule requests in flight.')
+@click.option('--plan', is_flag=True, default=False, help='Skip club schedules whose matches earlier schedules already hold.')
+@click.option('--verify', is_flag=True, default=False, help='Fetch every schedule and report what --plan would have skipped and missed.')
+def harvest(organization_id: int, genders: tuple[str, ...], years: tuple[str, ...], include_future: bool, concurrency: int,
+            plan: bool, verify: bool):
+    use_concurrency(concurrency)
+    planner = make_planner(plan, verify)
+    organization = get_organization_by_id(organization_id)
+    if organization is None:
+        raise click.UsageError(f'Organization {organization_id} not found')
+
+    if not genders:
+        genders = (ORGANIZATION_FILES[organization.id][0],) if organization.id in ORGANIZATION_FILES else ('girls', 'boys')
+
+    output_files = {}
+    for gender in genders:
+        for year in years or YEARS:
+            output_file = default_matches_file(organization.id, year, gender) or f'matches_{gender}_{year}_org_{organization.id}.csv'
+            if os.path.isfile(output_file):
+                click.echo(f'Output file {output_file} already exists. Skipping...')
+                continue
+            output_files[(gender, year)] = output_file
+
+    if not output_files:
+        click.echo('Every output file already exists. Exiting...')
+        return
+
+    age_groups = ', '.join(f'{gender} {year}' for gender, year in output_files)
+    click.echo(f'Searching matches for {organization.name} {age_groups}...')
+
+    # Every club schedule is downloaded once and split across all the requested files.
+    matches_by_age_group = get_matches_by_age_group(output_files, organization, include_future, concurrency, planner)
+    if planner is not None:
+        click.echo(planner.report())
+
+    for age_group, output_file in output_files.items():
+        write_matches_to_file(output_file, matches_by_age_group[age_group])
+        click.echo(f'Wrote {len(matches_by_age_group[age_group])} matches to {output_file}')
+
+
 def get_club_name_from_team_name(team_name: str) -> str:
     parts = team_name.split(' ')
     prefix = parts[:-2]
@@ -122,132 +224,484 @@ def get_club_name_from_team_name(team_name: str) -> str:
     return result
 
 
-def get_event_name_from_team(team_item: tuple[str, int, int], organization_id: int) -> Optional[str]:
-    events = get_events()
+def get_club_events(organization_id: int) -> dict[int, Optional[Event]]:
+    """
+    Returns the event of every club of an organization by club ID, None if the event is unknown.
 
-    team_name, team_id, club_id = team_item
+    Load it once per run and pass it to get_event_name_from_team(), which is called for every team.
+    A club may have entries in several events; the first one in the club list names its event.
+    """
+    # Loading the events resolves them into the identity map.
+    get_events()
 
-    # Read the clubs for the specified organization.
-    clubs = get_clubs_by_organization_id(organization_id)
+    club_events = {}
+    for club in get_clubs_by_organization_id(organization_id):
+        if club.id not in club_events:
+            club_events[club.id] = identity_map.get(Event, club.event_id)
+    return club_events
 
-    # Find the club in the list of clubs.
-    selected_club = None
-    for club in clubs:
-        current_club_id = club.id
 
-        if current_club_id == club_id:
-            selected_club = club
-            break
+def get_event_name_from_team(team_item: tuple[str, int, int], organization_id: int,
+                             club_events: Optional[dict[int, Optional[Event]]] = None) -> Optional[str]:
+    team_name, team_id, club_id = team_item
 
-    if selected_club is None:
+    if club_events is None:
+        club_events = get_club_events(organization_id)
+
+    if club_id not in club_events:
         logger.warning(f'Club not found for team {team_name}')
         return None
 
-    # Find the event in the list of events.
-    selected_event = None
-
-    for event in events:
-        if event.id == selected_club.event_id:
-            selected_event = event
-            break
+    selected_event = club_events[club_id]
 
     if selected_event is None:
-        logger.warning(f'Event not found for club {selected_club.name}')
+        logger.warning(f'Event not found for club {club_id}')
         return None
 
     return selected_event.name
 
 
 def read_matches_from_file(file: str) -> list[Match]:
-    matches = []
+    return list(iter_matches_from_file(file))
+
+def iter_matches_from_file(file: str) -> Iterator[Match]:
+    # Matches on the same day share one datetime; the table lives as long as this reader.
+    dates = {}
     with open(file, 'r') as file:
         reader = csv.DictReader(file)
         for row in reader:
             match = Match()
             match.id = int(row['match_id'].strip())
-            match.home_team = row['home_team'].strip()
+            match.home_team = share(row['home_team'].strip())
             match.home_team_id = int(row['home_team_id'].strip())
             match.home_team_club_id = int(row['home_team_club_id'].strip())
-            match.away_team = row['away_team'].strip()
+            match.away_team = share(row['away_team'].strip())
             match.away_team_id = int(row['away_team_id'].strip())
             match.away_team_club_id = int(row['away_team_club_id'].strip())
             match.home_score = int(row['home_score'].strip())
             match.away_score = int(row['away_score'].strip())
-            match.date = datetime.strptime(row['date'].strip(), '%Y-%m-%d')
-            matches.append(match)
-    return matches
-
-def calculate_team_stats(matches: list[Match], teams: list[tuple[str, int, int]], organization_id: int) -> dict:
-    stats = {}
-    for team_item in teams:
-        team = team_item[0]
-        click.echo(f"Calculating stats for '{team}' ...")
-        stats[team] = {
-            'wins': wins(matches, team),
-            'losses': losses(matches, team),
-            'ties': ties(matches, team),
-            'matches_played': matches_played(matches, team),
-            'goals_for': goals_for(matches, team),
-            'goals_against': goals_against(matches, team),
-            'goal_differential': goal_differential(matches, team),
-            'points': points(matches, team),
-            'wp': wp(matches, team, 2),
-            'owp': owp(matches, team, 2),
-            'oowp': oowp(matches, team, 2),
-            'rpi': rpi(matches, team, 2),
-            'record': record(matches, team),
-            'event_name': get_event_name_from_team(team_item, organization_id),
-            'goals_per_match': goals_per_match(matches, team)
-        }
+            date = row['date'].strip()
+            match.date = dates.get(date)
+            if match.date is None:
+                match.date = dates[date] = datetime.strptime(date, '%Y-%m-%d')
+
+            # Files written before these columns were added do not have them.
+            extra = {key: row[column].strip() for column, key in (('event_name', 'eventName'), ('flight', 'flight'), ('division', 'division'))
+                     if row.get(column)}
+            if extra:
+                match.set_compact_meta(tuple(extra.get(key) for key in COMPACT_META_KEYS))
+
+            yield match
+
+def calculate_team_stats(matches: list[Match], registry: TeamRegistry, organization_id: int, backend: str = 'auto',
+                         cache: Optional[StatsCache] = None, state_key: Optional[str] = None) -> dict:
+    if backend == 'external':
+        click.echo('Calculating stats from the match stream ...')
+        stats = external_team_stats_table(matches, 2)
+        # Like the opponent index, the pairs of teams the Colley and Massey systems need stay on disk.
+        with ExternalScheduleSystem(matches) as system:
+            colley = system.colley()
+            massey = system.massey()
+    else:
+        click.echo(f'Calculating stats for {len(registry)} teams ...')
+        if cache is not None and resolve_backend(backend) == 'python':
+            # Rows are reused through the pure-Python engine; the NumPy backend computes the whole table.
+            stats, state, recomputed = partial_team_stats(matches, cache.load_state(state_key), 2, registry.stable_key)
+            cache.save_state(state_key, state)
+            click.echo(f'Recomputed {len(recomputed)} teams, reused {len(stats) - len(recomputed)} from the cache')
+        else:
+            stats = team_stats_table(matches, 2, backend)
+        system = ScheduleSystem(matches, use_numpy=backend != 'python')
+        colley = system.colley()
+        massey = system.massey()
+
+    club_events = get_club_events(organization_id)
+    for team in stats:
+        stats[team]['colley'] = round(colley[team], 2)
+        stats[team]['massey'] = round(massey[team], 2)
+        stats[team]['event_name'] = get_event_name_from_team(registry.key(team), organization_id, club_events)
     return stats
 
-def sort_teams(teams: list[tuple[str, int, int]], stats: dict) -> list[tuple[str, int, int]]:
-    return sorted(teams, key=lambda t: (-stats[t[0]]['rpi'], t[0]))
+def sort_teams(teams: list[int], stats: dict, registry: TeamRegistry) -> list[int]:
+    return sorted(teams, key=lambda t: (-stats[t]['rpi'], registry.name(t), t))
+
+STATS_COLUMNS = ['wins', 'losses', 'ties', 'matches_played', 'goals_for', 'goals_against', 'goal_differential', 'goals_per_match', 'points', 'wp', 'owp', 'oowp', 'rpi', 'colley', 'massey', 'event_name', 'record']
 
-def collect_teams(matches: list[Match]) -> list[tuple[str, int, int]]:
-    teams = set()
-    for match in matches:
-        teams.add((match.home_team, match.home_team_id, match.home_team_club_id))
-        teams.add((match.away_team, match.away_team_id, match.away_team_club_id))
-    return sorted(list(teams), key=lambda team: team[0])
 
-def write_stats_to_file(stats_file: str, teams: list[str], stats: dict):
+def write_stats_to_file(stats_file: str, teams: list[int], stats: dict, registry: TeamRegistry, extra_columns: Optional[list[str]] = None):
+    columns = STATS_COLUMNS + (extra_columns or [])
     with open(stats_file, 'w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(['team', 'wins', 'losses', 'ties', 'matches_played', 'goals_for', 'goals_against', 'goal_differential', 'goals_per_match', 'points', 'wp', 'owp', 'oowp', 'rpi', 'event_name', 'record'])
-        for team_item in teams:
-            team, team_id, club_id = team_item
+        writer.writerow(['team'] + columns)
+        for team in teams:
             team_stats = stats[team]
-            writer.writerow([
-                team,
-                team_stats['wins'],
-                team_stats['losses'],
-                team_stats['ties'],
-                team_stats['matches_played'],
-                team_stats['goals_for'],
-                team_stats['goals_against'],
-                team_stats['goal_differential'],
-                team_stats['goals_per_match'],
-                team_stats['points'],
-                team_stats['wp'],
-                team_stats['owp'],
-                team_stats['oowp'],
-                team_stats['rpi'],
-                team_stats['event_name'],
-                team_stats['record']
-            ])
+            writer.writerow([registry.name(team)] + [team_stats[column] for column in columns])
 
 @click.command()
-@click.option('-f', '--file', required=True, type=click.Path(exists=True), help='Specify the file to read.')
+@click.option('-f', '--file', 'files', required=True, multiple=True, type=click.Path(exists=True), help='Specify a file to read; repeat it to combine several files, such as seasons.')
+@click.option('--output-file', required=False, type=click.Path(), help='Specify the output file name; required with several files.')
 @click.option('-o', '--organization-id', required=True, type=int, help='Specify the organization id.')
-def stats(file: str, organization_id: int):
+@click.option('--backend', default='auto', type=click.Choice(['auto', 'python', 'numpy', 'external']), help='Specify the stats backend; external streams the file and sorts on disk.')
+@click.option('--poisson', is_flag=True, default=False, help='Add attack and defence columns from a Poisson goal model.')
+@click.option('--poisson-state', required=False, type=click.Path(), help='Specify a file to warm start the Poisson fit from and save it to.')
+@click.option('--confidence', default=0, type=int, help='Add bootstrap RPI intervals computed from this many resampled seasons.')
+@click.option('--confidence-level', default=0.9, type=float, help='Specify the confidence level of the RPI intervals.')
+@click.option('--workers', required=False, type=int, help='Specify the number of worker processes for the bootstrap.')
+@click.option('--seed', default=0, type=int, help='Specify the random seed for the bootstrap.')
+@click.option('--since', required=False, type=click.DateTime(formats=['%Y-%m-%d']), help='Only count matches played on or after this date.')
+@click.option('--until', required=False, type=click.DateTime(formats=['%Y-%m-%d']), help='Only count matches played on or before this date.')
+@click.option('--as-of', required=False, type=click.DateTime(formats=['%Y-%m-%d']), help='Calculate the stats as they stood at the end of this date.')
+@click.option('--rollup', 'rollups', multiple=True, help='Also write totals grouped by comma separated dimensions, e.g. club or event,flight,team.')
+@click.option('--cache-dir', default='.stats_cache', type=click.Path(), help='Specify the directory of the stats cache.')
+@click.option('--no-cache', is_flag=True, default=False, help='Recompute everything and leave the cache untouched.')
+@click.option('--weighted-rpi', 'weighted_rpis', multiple=True, help='Add an RPI column with its own weights, as NAME=WP,OWP,OOWP.')
+@click.option('--metrics-plugin', 'metrics_plugins', multiple=True, help='Add the metrics registered by calling MODULE:FUNCTION with the metric registry.')
+def stats(files: tuple[str, ...], output_file: Optional[str], organization_id: int, backend: str, poisson: bool, poisson_state: Optional[str],
+          confidence: int, confidence_level: float, workers: Optional[int], seed: int,
+          since: Optional[datetime], until: Optional[datetime], as_of: Optional[datetime], rollups: tuple[str, ...],
+          cache_dir: str, no_cache: bool, weighted_rpis: tuple[str, ...], metrics_plugins: tuple[str, ...]):
+    if output_file:
+        stats_file = output_file
+    elif len(files) == 1:
+        stats_file = files[0].replace('matches', 'stats')
+    else:
+        raise click.UsageError('Specify --output-file when reading several files')
+    metric_registry, custom_metrics = build_metric_registry(weighted_rpis, metrics_plugins)
+
+    cache = None if no_cache else StatsCache(cache_dir)
+    if cache is not None:
+        config = {
+            'files': [os.path.basename(file) for file in files],
+            'digests': [file_digest(file) for file in files],
+            'output_file': os.path.basename(stats_file),
+            'organization_id': organization_id,
+            'backend': backend,
+            'number_of_digits': 2,
+            'poisson': poisson,
+            # The state file only warm starts the fit, which converges to the same parameters, and
+            # every run rewrites it, so its contents are not part of the key.
+            'poisson_state': bool(poisson_state),
+            'confidence': [confidence, confidence_level, seed] if confidence > 0 else None,
+            'window': [since, until, as_of],
+            'rollups': rollups,
+            'metrics': [weighted_rpis, metrics_plugins],
+            # Without --as-of, which fixtures count as played depends on the day.
+            'today': datetime.now().date() if as_of is None else None,
+        }
+        run_key = config_key(config)
+        restored = cache.restore_outputs(run_key, os.path.dirname(stats_file) or '.')
+        if restored and poisson_state:
+            # Leave the state file as the run that produced the outputs left it.
+            restored = restored + [poisson_state] if cache.restore_file(f'{run_key}.poisson', poisson_state) else None
+        if restored:
+            click.echo(f"Unchanged input, restored {', '.join(restored)} from the cache")
+            return
+
+    for file in files:
+        click.echo(f'Reading file: {file}')
+    registry = TeamRegistry()
+    if as_of is not None:
+        as_of = datetime.combine(as_of.date(), time.max)
+    if until is not None:
+        until = datetime.combine(until.date(), time.max)
+    # One clock for the run, so every pass over the file counts the same fixtures as played.
+    now = as_of if as_of is not None else datetime.now()
+
+    if backend == 'external':
+        if poisson or poisson_state or confidence > 0:
+            raise click.UsageError('The external backend does not support --poisson or --confidence')
+
+        def include(match: Match) -> bool:
+            if match.is_future(now):
+                return False
+            return (since is None or match.date >= since) and (until is None or match.date <= until)
+
+        def read_files() -> Iterator[Match]:
+            for file in files:
+                yield from iter_matches_from_file(file)
+
+        # Every pass over the matches reads the files again instead of keeping them in memory.
+        matches = MatchStream(lambda: registry.iter_interned(match for match in read_files() if include(match)))
+    else:
+        matches = [match for file in files for match in read_matches_from_file(file) if not match.is_future(now)]
+
+        if since is not None or until is not None:
+            matches = DateIndex(matches).window(since, until)
+            click.echo(f'Using {len(matches)} matches in the window')
+
+        matches = registry.intern_matches(matches)
+
+    state_key = config_key({'state': [os.path.abspath(file) for file in files]}) if cache is not None else None
+    stats = calculate_team_stats(matches, registry, organization_id, backend, cache, state_key)
+    teams = sorted(stats)
+
+    extra_columns = []
+    if custom_metrics:
+        add_custom_stats(matches, stats, metric_registry, custom_metrics)
+        extra_columns.extend(custom_metrics)
+
+    if poisson or poisson_state:
+        add_poisson_stats(matches, stats, registry, poisson_state)
+        extra_columns.extend(['attack', 'defence'])
+
+    if confidence > 0:
+        add_confidence_stats(matches, stats, confidence, confidence_level, workers, seed)
+        extra_columns.extend(['rpi_low', 'rpi_high'])
+
+    sorted_teams = sort_teams(teams, stats, registry)
+    write_stats_to_file(stats_file, sorted_teams, stats, registry, extra_columns)
+
+    output_files = [stats_file]
+    if rollups:
+        output_files += write_rollups_to_files(stats_file, matches, registry, [tuple(rollup.split(',')) for rollup in rollups], organization_id)
+
+    if cache is not None:
+        cache.store_outputs(run_key, output_files)
+        if poisson_state:
+            cache.store_file(f'{run_key}.poisson', poisson_state)
+
+
+def build_metric_registry(weighted_rpis: Iterable[str], metrics_plugins: Iterable[str]) -> tuple[MetricRegistry, list[str]]:
+    """
+    Returns the standard metric registry extended with the custom metrics of a run, and the names
+    of the custom metrics in the order they were registered.
+
+    :param weighted_rpis: RPI variants as NAME=WP,OWP,OOWP weights.
+    :param metrics_plugins: MODULE:FUNCTION references; each function is called with the registry.
+    """
+    metric_registry = standard_registry()
+    standard_metrics = set(metric_registry.metrics)
+
+    for weighted_rpi in weighted_rpis:
+        name, _, weights = weighted_rpi.partition('=')
+        try:
+            wp_weight, owp_weight, oowp_weight = (float(weight) for weight in weights.split(','))
+        except ValueError:
+            raise click.BadParameter(f"'{weighted_rpi}' is not NAME=WP,OWP,OOWP", param_hint='--weighted-rpi')
+        try:
+            add_weighted_rpi(metric_registry, name, wp_weight, owp_weight, oowp_weight)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--weighted-rpi')
+
+    for plugin in metrics_plugins:
+        module_name, _, function_name = plugin.partition(':')
+        try:
+            register = getattr(importlib.import_module(module_name), function_name)
+        except (ImportError, AttributeError, ValueError) as e:
+            raise click.BadParameter(f"Cannot load '{plugin}': {e}", param_hint='--metrics-plugin')
+        register(metric_registry)
+
+    return metric_registry, [name for name in metric_registry.metrics if name not in standard_metrics]
+
+
+def add_custom_stats(matches: list[Match], stats: dict, metric_registry: MetricRegistry, names: list[str]):
+    # The stats table already holds the standard metrics, so the custom ones are computed from its
+    # columns instead of walking the matches again.
+    for team, values in metric_registry.evaluate(matches, names, 2, table=stats).items():
+        stats[team].update(values)
+
+
+def add_poisson_stats(matches: list[Match], stats: dict, registry: TeamRegistry, state_file: Optional[str] = None):
+    # The model is fitted on interned team indices, which only hold for this run, so the state
+    # file is keyed by the registry's stable keys.
+    warm_start = None
+    if state_file and os.path.isfile(state_file):
+        indices = {registry.stable_key(index): index for index in range(len(registry))}
+        warm_start = PoissonModel.load(state_file).rekey(indices.get)
+
+    model = PoissonModel().fit(matches, warm_start=warm_start)
+    click.echo(f'Poisson model converged in {model.iterations} iterations')
+
+    if state_file:
+        model.rekey(registry.stable_key).save(state_file)
+
+    for team, values in model.table(2).items():
+        stats[team].update(values)
+
+
+def add_confidence_stats(matches: list[Match], stats: dict, replicates: int, level: float, workers: Optional[int], seed: int):
+    click.echo(f'Resampling {replicates} seasons for {level:.0%} RPI intervals ...')
+    intervals = bootstrap_rpi(matches, replicates, level, workers=workers, seed=seed)
+    for team, (low, high) in intervals.items():
+        stats[team]['rpi_low'] = low
+        stats[team]['rpi_high'] = high
+
+
+def write_rollups_to_files(stats_file: str, matches: list[Match], registry: TeamRegistry, levels: list[tuple[str, ...]], organization_id: int) -> list[str]:
+    club_states = None
+    if any('state' in level for level in levels):
+        club_states = {club.id: club.state_code for club in get_clubs_by_organization_id(organization_id)}
+
+    try:
+        rollup = Rollup(levels, club_states).consume(matches)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--rollup')
+
+    # Rollup files are named after the stats file, whatever --output-file called it.
+    root, extension = os.path.splitext(stats_file)
+    rollup_files = []
+    for level in levels:
+        rollup_file = f"{root}_by_{'_'.join(level)}{extension}"
+        if os.path.abspath(rollup_file) == os.path.abspath(stats_file):
+            raise click.UsageError(f'The {",".join(level)} rollup would overwrite {stats_file}')
+        rollup_files.append(rollup_file)
+        click.echo(f'Writing {rollup_file}')
+        with open(rollup_file, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(list(level) + ROLLUP_COLUMNS)
+            for key, row in rollup.table(level):
+                values = [registry.name(value) if dimension == 'team' else value for dimension, value in zip(level, key)]
+                writer.writerow(values + [row[column] for column in ROLLUP_COLUMNS])
+
+    return rollup_files
+
+
+@click.command()
+@click.option('-f', '--file', required=True, type=click.Path(exists=True), help='Specify the file to read.')
+@click.option('-m', '--method', default='elo', type=click.Choice(['elo', 'glicko2']), help='Specify the rating method.')
+@click.option('--checkpoint', required=False, type=click.Path(), help='Specify a checkpoint file to resume from and update.')
+@click.option('--output-file', required=False, type=click.Path(), help='Specify the output file name.')
+def elo(file: str, method: str, checkpoint: Optional[str], output_file: Optional[str]):
+    click.echo(f'Reading file: {file}')
+    # Unplayed fixtures are scored 0-0; applying them would record draws and move the checkpoint past today.
+    now = datetime.now()
+    matches = sorted((match for match in read_matches_from_file(file) if not match.is_future(now)), key=lambda m: m.date)
+
+    rater = create_rater(method, checkpoint)
+    applied = rater.consume(iter(matches))
+    click.echo(f'Applied {applied} new matches')
+    if rater.late_match_ids:
+        click.echo(f'Skipped {len(rater.late_match_ids)} matches dated before the last applied match; '
+                   f'rebuild without the checkpoint to include them')
+
+    if checkpoint:
+        rater.checkpoint(checkpoint)
+
+    if not output_file:
+        output_file = file.replace('matches', method)
+
+    teams = sorted(rater.teams, key=lambda t: (-rater.rating(t), t))
+    with open(output_file, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['team', method])
+        for team in teams:
+            writer.writerow([team, round(rater.rating(team), 1)])
+
+
+@click.command()
+@click.option('-f', '--file', required=True, type=click.Path(exists=True), help='Specify the file to read, including future fixtures.')
+@click.option('-m', '--model', default='elo', type=click.Choice(['elo', 'poisson']), help='Specify the model used to sample future fixtures.')
+@click.option('-n', '--simulations', default=10000, type=int, help='Specify the number of simulated seasons.')
+@click.option('--chunk-size', default=500, type=int, help='Specify the number of seasons simulated per batch.')
+@click.option('--workers', required=False, type=int, help='Specify the number of worker processes.')
+@click.option('--seed', default=0, type=int, help='Specify the random seed.')
+@click.option('--output-file', required=False, type=click.Path(), help='Specify the output file name.')
+def simulate(file: str, model: str, simulations: int, chunk_size: int, workers: Optional[int], seed: int, output_file: Optional[str]):
     click.echo(f'Reading file: {file}')
     matches = read_matches_from_file(file)
-    teams = collect_teams(matches)
-    stats = calculate_team_stats(matches, teams, organization_id)
-    sorted_teams = sort_teams(teams, stats)
-    stats_file = file.replace('matches', 'stats')
-    write_stats_to_file(stats_file, sorted_teams, stats)
+
+    simulator = SeasonSimulator(matches, model)
+    click.echo(f'Simulating {simulations} seasons with {len(simulator.future)} future fixtures ...')
+    projections = simulator.run(simulations, chunk_size, workers, seed)
+
+    if not output_file:
+        output_file = file.replace('matches', 'projections')
+
+    columns = ['rpi_mean', 'rpi_p05', 'rpi_p50', 'rpi_p95', 'rank_mean', 'rank_best', 'rank_worst', 'first']
+    teams = sorted(projections, key=lambda t: (projections[t]['rank_mean'], t))
+    with open(output_file, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['team'] + columns)
+        for team in teams:
+            writer.writerow([team] + [round(projections[team][column], 3) for column in columns])
+
+
+@click.command()
+@click.option('-f', '--file', 'files', required=True, multiple=True, type=click.Path(exists=True), help='Specify a matches file; repeat for each organization.')
+@click.option('--min-opponents', default=3, type=int, help='Flag teams with fewer distinct opponents as weakly connected.')
+@click.option('--backend', default='auto', type=click.Choice(['auto', 'python', 'numpy']), help='Specify the stats backend.')
+@click.option('--output-file', default='stats_national.csv', type=click.Path(), help='Specify the output file name.')
+def national(files: tuple[str, ...], min_opponents: int, backend: str, output_file: str):
+    registry = TeamRegistry()
+    organizations = {}
+    sources = []
+    now = datetime.now()
+    for file in files:
+        click.echo(f'Reading file: {file}')
+        file_matches = registry.intern_matches(match for match in read_matches_from_file(file) if not match.is_future(now))
+        label = os.path.splitext(os.path.basename(file))[0].replace('matches_', '')
+        for match in file_matches:
+            organizations.setdefault(match.home_team, set()).add(label)
+            organizations.setdefault(match.away_team, set()).add(label)
+        sources.append(file_matches)
+
+    matches = merge_matches(sources)
+    graph = ScheduleGraph(matches)
+    weak = set(graph.weakly_connected(min_opponents))
+    bridges = set(graph.bridges())
+    click.echo(f'{len(matches)} matches, {len(graph.opponents)} teams in {len(graph.components)} components '
+               f'(largest {len(graph.components[0]) if graph.components else 0}), '
+               f'{len(weak)} weakly connected teams, {len(bridges)} bridge teams')
+
+    # One pass over the merged matches rates every component; no match crosses components.
+    stats = team_stats_table(matches, 2, backend)
+    system = ScheduleSystem(matches, use_numpy=backend != 'python')
+    colley = system.colley()
+    massey = system.massey()
+
+    columns = ['component', 'component_size', 'component_rank', 'rpi', 'wp', 'owp', 'oowp', 'colley', 'massey', 'record', 'opponents', 'weak', 'bridge', 'organizations']
+    with open(output_file, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['team'] + columns)
+        for number, component in enumerate(graph.components, 1):
+            ranked = sorted(component, key=lambda t: (-stats[t]['rpi'], registry.name(t), t))
+            for rank, team in enumerate(ranked, 1):
+                team_stats = stats[team]
+                writer.writerow([
+                    registry.name(team), number, len(component), rank, team_stats['rpi'], team_stats['wp'], team_stats['owp'], team_stats['oowp'],
+                    round(colley[team], 2), round(massey[team], 2), team_stats['record'], len(graph.opponents[team]),
+                    team in weak, team in bridges, ';'.join(sorted(organizations[team])),
+                ])
+
+
+def echo_matches(title: str, matches: list[Match]):
+    click.echo(f'{title}: {len(matches)} matches')
+    for match in matches:
+        click.echo(f'  {match.id} - {match.home_team} vs {match.away_team} - {match.home_score}-{match.away_score} on {match.date:%Y-%m-%d}')
+
+
+@click.command()
+@click.option('-f', '--file', required=True, type=click.Path(exists=True), help='Specify the file to read.')
+@click.option('-t', '--team', 'teams', multiple=True, help='List the matches of a team.')
+@click.option('--h2h', nargs=2, multiple=True, help='List the matches between two teams.')
+@click.option('--common', nargs=2, multiple=True, help='List the common opponents of two teams.')
+@click.option('--division', required=False, help='List the matches of a division.')
+@click.option('--flight', required=False, help='List the matches of a flight.')
+@click.option('--since', required=False, type=click.DateTime(formats=['%Y-%m-%d']), help='Only list matches played on or after this date.')
+@click.option('--until', required=False, type=click.DateTime(formats=['%Y-%m-%d']), help='Only list matches played on or before this date.')
+def query(file: str, teams: tuple[str, ...], h2h: tuple[tuple[str, str], ...], common: tuple[tuple[str, str], ...],
+          division: Optional[str], flight: Optional[str], since: Optional[datetime], until: Optional[datetime]):
+    # The file is read and indexed once, then every question is a lookup.
+    index = MatchIndex(read_matches_from_file(file))
+    if until is not None:
+        until = datetime.combine(until.date(), time.max)
+
+    for team in teams:
+        echo_matches(team, index.team_matches(team, since, until))
+
+    for first, second in h2h:
+        echo_matches(f'{first} vs {second}', index.head_to_head(first, second, since, until))
+
+    for first, second in common:
+        common_opponents = index.common_opponents(first, second)
+        click.echo(f'{first} and {second}: {len(common_opponents)} common opponents')
+        for opponent, (first_matches, second_matches) in common_opponents.items():
+            echo_matches(f'{first} vs {opponent}', first_matches)
+            echo_matches(f'{second} vs {opponent}', second_matches)
+
+    if division or flight or (not teams and not h2h and not common):
+        title = ' '.join(value for value in (division, flight) if value) or 'All'
+        echo_matches(title, index.matches_in(division, flight, since, until))
 
 
 @click.command()
@@ -261,9 +715,14 @@ cli.add_command(countries)
 cli.add_command(states)
 cli.add_command(organizations)
 cli.add_command(matches)
+cli.add_command(harvest)
 cli.add_command(clubs)
 cli.add_command(events)
 cli.add_command(stats)
+cli.add_command(elo)
+cli.add_command(simulate)
+cli.add_command(national)
+cli.add_command(query)
 cli.add_command(team2event)
 
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+"""
+This module contains bootstrap confidence intervals for RPI.
+
+Each replicate resamples the season's matches with replacement, as many draws as there are
+matches. A replicate is represented by how many times each match was drawn, so every replicate in a
+batch shares the original match list and matrix.batch_rpi computes RPI for every team in the whole
+batch at once. Batches run in a process pool with seeds derived from a single base seed, so the
+intervals do not depend on the number of workers. NumPy and SciPy are required; check
+matrix.HAS_NUMPY before using this module.
+"""
+
+import warnings
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from ratings import matrix
+from ratings.models import Match
+
+np = matrix.np
+
+
+def bootstrap_rpi(matches: list[Match], replicates: int = 1000, level: float = 0.9, chunk_size: int = 100,
+                  workers: Optional[int] = None, seed: int = 0,
+                  number_of_digits: int = 2) -> dict[str, tuple[float, float]]:
+    """
+    Returns a percentile bootstrap confidence interval for the RPI of every team.
+
+    A team that is missing from a replicate has no RPI in it; its interval is taken over the
+    replicates it appears in.
+
+    :param matches: A list of Match objects.
+    :param replicates: The number of bootstrap replicates.
+    :param level: The confidence level of the intervals, 0.9 for the 5th to 95th percentiles.
+    :param chunk_size: The number of replicates computed together in one batch.
+    :param workers: The number of worker processes, one per CPU by default; 1 runs in-process.
+    :param seed: The base seed.
+    :param number_of_digits: The number of digits to round to.
+    :return: A dict mapping each team to the (low, high) bounds of its interval.
+    """
+    if not matrix.HAS_NUMPY:
+        raise ImportError('bootstrap_rpi requires numpy and scipy')
+
+    if not 0.0 < level < 1.0:
+        raise ValueError(f'The confidence level must be between 0 and 1, not {level}')
+
+    teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+    if not teams or replicates < 1:
+        return {}
+
+    index = {team: i for i, team in enumerate(teams)}
+    setup = {
+        'size': len(teams),
+        'home': np.fromiter((index[match.home_team] for match in matches), dtype=np.int64, count=len(matches)),
+        'away': np.fromiter((index[match.away_team] for match in matches), dtype=np.int64, count=len(matches)),
+        'home_won': np.fromiter((match.home_score > match.away_score for match in matches), dtype=bool, count=len(matches)),
+        'tied': np.fromiter((match.home_score == match.away_score for match in matches), dtype=bool, count=len(matches)),
+    }
+
+    counts = [min(chunk_size, replicates - start) for start in range(0, replicates, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    arguments = [(setup, count, chunk_seed) for count, chunk_seed in zip(counts, seeds)]
+
+    if workers == 1:
+        results = [_bootstrap_chunk(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_bootstrap_chunk, *zip(*arguments)))
+
+    rpi = np.concatenate(results, axis=1)
+    tail = 50.0 * (1.0 - level)
+    with warnings.catch_warnings():
+        # A team that is missing from every replicate gets a NaN interval.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanpercentile(rpi, [tail, 100.0 - tail], axis=1)
+
+    return {
+        team: (round(float(low[i]), number_of_digits), round(float(high[i]), number_of_digits))
+        for i, team in enumerate(teams)
+    }
+
+
+def _bootstrap_chunk(setup: dict, count: int, seed):
+    """
+    Resamples a batch of replicates and returns their RPI values as a teams-by-replicates array.
+    """
+    generator = np.random.default_rng(seed)
+    number_of_matches = len(setup['home'])
+
+    weights = generator.multinomial(number_of_matches, np.full(number_of_matches, 1.0 / number_of_matches), size=count)
+    home_won = np.broadcast_to(setup['home_won'], (count, number_of_matches))
+    tied = np.broadcast_to(setup['tied'], (count, number_of_matches))
+
+    return matrix.batch_rpi(setup['size'], setup['home'], setup['away'], home_won, tied, weights)
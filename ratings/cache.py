@@ -0,0 +1,241 @@
+"""
+This module contains a content-addressed cache for stats runs.
+
+A run is identified by the SHA-256 of its input file together with its configuration and
+ENGINE_VERSION. When the same run is requested again, the files it wrote are copied back from the
+cache without reading the matches.
+
+When the input changed, partial_team_stats() reuses the previous rows of teams the change cannot
+reach. A changed match alters the records of its two teams, which changes the OWP of those teams
+and their opponents and the OOWP of teams up to two matches away, so only the changed teams and
+their neighbors within two hops are recomputed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+from typing import Callable, Hashable, Optional
+
+from ratings.models import Match
+from ratings.stats import RPIEngine
+
+# Bump whenever a change alters the values or the layout of the stats output.
+ENGINE_VERSION = '1'
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_key(config: dict) -> str:
+    """
+    Returns the SHA-256 hex digest of a JSON-serializable configuration and ENGINE_VERSION.
+    """
+    payload = json.dumps({'engine': ENGINE_VERSION, 'config': config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StatsCache:
+    """
+    Stores the output files of stats runs and the per-team state used for partial reuse.
+    """
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def restore_outputs(self, key: str, output_directory: str) -> Optional[list[str]]:
+        """
+        Copies the outputs stored under a key into a directory.
+
+        :param key: The run key.
+        :param output_directory: The directory the outputs are copied to.
+        :return: The restored files, or None if the key is not cached.
+        """
+        stored = self._path('outputs', key)
+        if not os.path.isdir(stored):
+            return None
+
+        restored = []
+        for name in sorted(os.listdir(stored)):
+            target = os.path.join(output_directory, name)
+            shutil.copyfile(os.path.join(stored, name), target)
+            restored.append(target)
+        return restored
+
+    def store_outputs(self, key: str, files: list[str]):
+        """
+        Stores the output files of a run under its key.
+        """
+        stored = self._path('outputs', key)
+        staging = stored + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        for file in files:
+            shutil.copyfile(file, os.path.join(staging, os.path.basename(file)))
+
+        # Renaming the finished directory keeps a concurrent run from restoring half of it.
+        shutil.rmtree(stored, ignore_errors=True)
+        os.replace(staging, stored)
+
+    def restore_file(self, key: str, path: str) -> bool:
+        """
+        Copies the file stored under a key to a path.
+
+        :return: True if the key was cached.
+        """
+        stored = self._path('files', key)
+        if not os.path.isfile(stored):
+            return False
+
+        shutil.copyfile(stored, path)
+        return True
+
+    def store_file(self, key: str, path: str):
+        """
+        Stores a copy of a file under a key.
+        """
+        os.makedirs(self._path('files'), exist_ok=True)
+        stored = self._path('files', key)
+        shutil.copyfile(path, stored + '.tmp')
+        os.replace(stored + '.tmp', stored)
+
+    def load_state(self, key: str) -> Optional[dict]:
+        """
+        Returns the partial-reuse state stored under a key, or None.
+        """
+        path = self._path('state', f'{key}.json')
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, 'r') as file:
+            return json.load(file)
+
+    def save_state(self, key: str, state: dict):
+        """
+        Stores partial-reuse state under a key.
+        """
+        os.makedirs(self._path('state'), exist_ok=True)
+        path = self._path('state', f'{key}.json')
+        with open(path + '.tmp', 'w') as file:
+            json.dump(state, file)
+        os.replace(path + '.tmp', path)
+
+
+def _neighbors(fingerprints: dict) -> dict[str, set[str]]:
+    neighbors = {}
+    for home, away, _, _ in fingerprints.values():
+        neighbors.setdefault(home, set()).add(away)
+        neighbors.setdefault(away, set()).add(home)
+    return neighbors
+
+
+def affected_teams(previous: dict, current: dict) -> set[str]:
+    """
+    Returns the teams whose statistics may differ between two sets of match fingerprints.
+
+    :param previous: The previous fingerprints, match ID to [home, away, home score, away score].
+    :param current: The current fingerprints.
+    :return: The changed teams and every team within two hops of them in either schedule.
+    """
+    changed = set()
+    for match_id in previous.keys() | current.keys():
+        before = previous.get(match_id)
+        after = current.get(match_id)
+        if before != after:
+            for fingerprint in (before, after):
+                if fingerprint is not None:
+                    changed.update(fingerprint[:2])
+
+    previous_neighbors = _neighbors(previous)
+    current_neighbors = _neighbors(current)
+
+    affected = set(changed)
+    frontier = changed
+    for _ in range(2):
+        reached = set()
+        for team in frontier:
+            reached |= previous_neighbors.get(team, set()) | current_neighbors.get(team, set())
+        frontier = reached - affected
+        affected |= frontier
+
+    return affected
+
+
+def partial_team_stats(matches: list[Match], state: Optional[dict], number_of_digits: int = 2,
+                       key: Callable[[Hashable], str] = str) -> tuple[dict, dict, set]:
+    """
+    Returns the team_stats_table() of a list of matches, reusing unaffected rows from a previous run.
+
+    :param matches: A list of Match objects.
+    :param state: The state returned by the previous run, or None.
+    :param number_of_digits: The number of digits to round the percentages to.
+    :param key: Maps a team to a string that identifies it across runs.
+    :return: The table, the state to store for the next run, and the teams that were recomputed.
+    """
+    fingerprints = {
+        str(match.id): [key(match.home_team), key(match.away_team), match.home_score, match.away_score]
+        for match in matches
+    }
+    order = [str(match.id) for match in matches]
+
+    engine = RPIEngine(matches)
+    teams = engine.teams()
+    previous_rows = {}
+    affected = None
+
+    if state is not None:
+        # OWP sums follow match order, so reordered matches could round differently.
+        current_ids = set(order)
+        previous_order = [match_id for match_id in state['order'] if match_id in current_ids]
+        previous_ids = set(state['order'])
+        if previous_order == [match_id for match_id in order if match_id in previous_ids]:
+            previous_rows = state['rows']
+            affected = affected_teams(state['fingerprints'], fingerprints)
+
+    ledger = engine.ledger
+    table = {}
+    recomputed = set()
+    for team in teams:
+        team_key = key(team)
+        if affected is not None and team_key not in affected and team_key in previous_rows:
+            table[team] = dict(previous_rows[team_key])
+            continue
+
+        recomputed.add(team)
+        table[team] = {
+            'wins': ledger.wins(team),
+            'losses': ledger.losses(team),
+            'ties': ledger.ties(team),
+            'matches_played': ledger.matches_played(team),
+            'goals_for': ledger.goals_for(team),
+            'goals_against': ledger.goals_against(team),
+            'goal_differential': ledger.goal_differential(team),
+            'goals_per_match': ledger.goals_per_match(team),
+            'points': ledger.points(team),
+            'wp': engine.wp(team, number_of_digits),
+            'owp': engine.owp(team, number_of_digits),
+            'oowp': engine.oowp(team, number_of_digits),
+            'rpi': engine.rpi(team, number_of_digits),
+            'record': ledger.record(team),
+        }
+
+    new_state = {
+        'order': order,
+        'fingerprints': fingerprints,
+        'rows': {key(team): dict(row) for team, row in table.items()},
+    }
+    return table, new_state, recomputed
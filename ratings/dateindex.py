@@ -0,0 +1,117 @@
+"""
+This module contains a date index for windowed and as-of-date statistics.
+
+Matches are sorted by date once. For every team the index keeps the dates of its matches and
+running totals of its wins, losses, ties, goals for and goals against, so the record of a team
+between any two dates is the difference of two prefix sums found by binary search.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Optional
+
+from ratings.models import Match
+from ratings.stats import SeasonLedger, TeamRecord
+
+
+class DateIndex:
+    """
+    Answers window queries over a season in O(log M) per team.
+
+    Windows include both bounds; a missing bound leaves that side of the window open.
+    """
+    matches: list[Match]
+    dates: list[datetime]
+
+    def __init__(self, matches: list[Match]):
+        self._positions = sorted(range(len(matches)), key=lambda i: matches[i].date)
+        self.matches = [matches[i] for i in self._positions]
+        self.dates = [match.date for match in self.matches]
+        self._input = list(matches)
+        self._team_dates = {}
+        self._team_totals = {}
+
+        for match in self.matches:
+            self._append(match.home_team, match.date, match.home_score, match.away_score)
+            self._append(match.away_team, match.date, match.away_score, match.home_score)
+
+    def _append(self, team: str, date: datetime, scored: int, conceded: int):
+        dates = self._team_dates.setdefault(team, [])
+        totals = self._team_totals.setdefault(team, [(0, 0, 0, 0, 0)])
+
+        wins, losses, ties, goals_for, goals_against = totals[-1]
+        dates.append(date)
+        totals.append((
+            wins + (scored > conceded),
+            losses + (scored < conceded),
+            ties + (scored == conceded),
+            goals_for + scored,
+            goals_against + conceded,
+        ))
+
+    @staticmethod
+    def _bounds(dates: list[datetime], since: Optional[datetime], until: Optional[datetime]) -> tuple[int, int]:
+        start = bisect_left(dates, since) if since is not None else 0
+        end = bisect_right(dates, until) if until is not None else len(dates)
+        return start, max(start, end)
+
+    def teams(self) -> list[str]:
+        """
+        Returns the teams in the index sorted by name.
+        """
+        return sorted(self._team_dates)
+
+    def window(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[Match]:
+        """
+        Returns the matches played in a window in the order they were given.
+
+        Keeping the input order means a window that covers the whole season gives the same OWP
+        sums, and so the same rounded values, as the full match list.
+        """
+        start, end = self._bounds(self.dates, since, until)
+        return [self._input[i] for i in sorted(self._positions[start:end])]
+
+    def record(self, team: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> TeamRecord:
+        """
+        Returns the record of a team over a window.
+
+        :param team: The name of the team.
+        :param since: The first date of the window.
+        :param until: The last date of the window.
+        :return: A TeamRecord holding the team's results in the window.
+        """
+        team_record = TeamRecord()
+        dates = self._team_dates.get(team)
+        if dates is None:
+            return team_record
+
+        start, end = self._bounds(dates, since, until)
+        totals = self._team_totals[team]
+        first, last = totals[start], totals[end]
+
+        team_record.wins = last[0] - first[0]
+        team_record.losses = last[1] - first[1]
+        team_record.ties = last[2] - first[2]
+        team_record.goals_for = last[3] - first[3]
+        team_record.goals_against = last[4] - first[4]
+        team_record.matches_played = end - start
+        return team_record
+
+    def records(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict[str, TeamRecord]:
+        """
+        Returns the record of every team that played in a window.
+        """
+        result = {}
+        for team in self.teams():
+            team_record = self.record(team, since, until)
+            if team_record.matches_played:
+                result[team] = team_record
+        return result
+
+    def ledger(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> SeasonLedger:
+        """
+        Returns a SeasonLedger holding the records of every team that played in a window.
+        """
+        season_ledger = SeasonLedger()
+        season_ledger.records = self.records(since, until)
+        return season_ledger
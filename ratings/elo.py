@@ -0,0 +1,312 @@
+"""
+This module contains Elo and Glicko-2 raters that update in constant time per match.
+
+Matches must be fed in date order. A rater's state can be saved to a JSON checkpoint and restored
+later, so a new day's matches extend the previous ratings without replaying the season.
+"""
+
+import json
+import math
+import os.path
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, Optional
+
+from ratings.log import logger
+from ratings.models import Match
+
+GLICKO2_SCALE = 173.7178
+
+
+class StreamingRater(ABC):
+    """
+    Base class for raters that consume matches in chronological order.
+
+    The rater remembers the date of the latest match it applied and the IDs of all the matches it
+    applied, so consume() can skip matches a checkpoint already covers. A match dated before the
+    latest one that was never applied arrived late; it cannot be applied in order, so consume()
+    skips it, counts it in late_match_ids and logs a warning.
+    """
+    method = ''
+
+    def __init__(self):
+        self.teams = {}
+        self.as_of = None
+        self.applied_match_ids = set()
+        self.late_match_ids = set()
+
+    def parameters(self) -> dict:
+        """
+        Returns the constructor arguments of the rater.
+        """
+        return {}
+
+    def update(self, match: Match):
+        """
+        Applies a single match to the ratings.
+
+        :param match: The match to apply. It must not be older than the last applied match.
+        """
+        if self.as_of is not None and match.date < self.as_of:
+            raise ValueError(f'Match {match.id} on {match.date} is older than the last applied match on {self.as_of}')
+
+        self.as_of = match.date
+        self.applied_match_ids.add(match.id)
+
+        if match.home_score > match.away_score:
+            home_result = 1.0
+        elif match.home_score < match.away_score:
+            home_result = 0.0
+        else:
+            home_result = 0.5
+
+        self._update(match.home_team, match.away_team, home_result, match.date)
+
+    @abstractmethod
+    def _update(self, home_team: str, away_team: str, home_result: float, date: datetime):
+        """
+        Applies one result, home_result being 1 for a home win, 0.5 for a draw and 0 for a loss.
+        """
+
+    def covers(self, match: Match) -> bool:
+        """
+        Returns True if the match was already applied.
+        """
+        return match.id in self.applied_match_ids
+
+    def consume(self, matches: Iterable[Match]) -> int:
+        """
+        Applies a stream of date-ordered matches, skipping the ones already applied and the ones
+        dated before the last applied match.
+
+        :param matches: An iterable of matches sorted by date.
+        :return: The number of matches applied.
+        """
+        count = 0
+        for match in matches:
+            if self.covers(match):
+                continue
+
+            if self.as_of is not None and match.date < self.as_of:
+                if match.id not in self.late_match_ids:
+                    logger.warning(f'Skipping match {match.id} on {match.date}: it is older than the last applied '
+                                   f'match on {self.as_of}')
+                    self.late_match_ids.add(match.id)
+                continue
+
+            self.update(match)
+            count += 1
+        return count
+
+    @abstractmethod
+    def rating(self, team: str) -> float:
+        """
+        Returns the current rating of a team.
+        """
+
+    def checkpoint(self, file: str):
+        """
+        Writes the state of the rater to a JSON file.
+
+        :param file: The file to write.
+        """
+        state = {
+            'method': self.method,
+            'parameters': self.parameters(),
+            'as_of': self.as_of.isoformat() if self.as_of is not None else None,
+            'applied_match_ids': sorted(self.applied_match_ids),
+            'teams': self.teams,
+        }
+
+        with open(file, 'w') as output_file:
+            json.dump(state, output_file)
+
+
+class EloRater(StreamingRater):
+    """
+    Classic Elo with an optional home advantage. A tie counts as half a win.
+
+    The state of each team is its rating.
+    """
+    method = 'elo'
+
+    def __init__(self, k: float = 32.0, home_advantage: float = 0.0, initial_rating: float = 1500.0):
+        super().__init__()
+        self.k = k
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+
+    def parameters(self) -> dict:
+        return {'k': self.k, 'home_advantage': self.home_advantage, 'initial_rating': self.initial_rating}
+
+    def _update(self, home_team: str, away_team: str, home_result: float, date: datetime):
+        home_rating = self.teams.get(home_team, self.initial_rating)
+        away_rating = self.teams.get(away_team, self.initial_rating)
+
+        expected = 1.0 / (1.0 + 10.0 ** ((away_rating - home_rating - self.home_advantage) / 400.0))
+        change = self.k * (home_result - expected)
+
+        self.teams[home_team] = home_rating + change
+        self.teams[away_team] = away_rating - change
+
+    def rating(self, team: str) -> float:
+        return self.teams.get(team, self.initial_rating)
+
+
+class Glicko2Rater(StreamingRater):
+    """
+    Glicko-2 where every match is its own rating period for the two teams that played it.
+
+    The state of each team is [rating, rating deviation, volatility, ordinal of last match]. A
+    team's deviation grows with the number of idle periods since its last match.
+    """
+    method = 'glicko2'
+
+    def __init__(self, tau: float = 0.5, initial_rating: float = 1500.0, initial_deviation: float = 350.0,
+                 initial_volatility: float = 0.06, period_days: int = 7):
+        super().__init__()
+        self.tau = tau
+        self.initial_rating = initial_rating
+        self.initial_deviation = initial_deviation
+        self.initial_volatility = initial_volatility
+        self.period_days = period_days
+
+    def parameters(self) -> dict:
+        return {
+            'tau': self.tau,
+            'initial_rating': self.initial_rating,
+            'initial_deviation': self.initial_deviation,
+            'initial_volatility': self.initial_volatility,
+            'period_days': self.period_days,
+        }
+
+    def _state(self, team: str, ordinal: int) -> tuple[float, float, float]:
+        """
+        Returns a team's (mu, phi, sigma) on the Glicko-2 scale, with phi grown for idle periods.
+        """
+        state = self.teams.get(team)
+        if state is None:
+            return 0.0, self.initial_deviation / GLICKO2_SCALE, self.initial_volatility
+
+        rating, deviation, volatility, last_ordinal = state
+        mu = (rating - self.initial_rating) / GLICKO2_SCALE
+        phi = deviation / GLICKO2_SCALE
+
+        idle_periods = max(0, (ordinal - last_ordinal) // self.period_days)
+        if idle_periods:
+            phi = min(math.sqrt(phi * phi + idle_periods * volatility * volatility), self.initial_deviation / GLICKO2_SCALE)
+
+        return mu, phi, volatility
+
+    def _update(self, home_team: str, away_team: str, home_result: float, date: datetime):
+        ordinal = date.toordinal()
+        home_state = self._state(home_team, ordinal)
+        away_state = self._state(away_team, ordinal)
+
+        self.teams[home_team] = self._rate(home_state, away_state, home_result, ordinal)
+        self.teams[away_team] = self._rate(away_state, home_state, 1.0 - home_result, ordinal)
+
+    def _rate(self, state: tuple[float, float, float], opponent: tuple[float, float, float], result: float,
+              ordinal: int) -> list:
+        mu, phi, sigma = state
+        opponent_mu, opponent_phi, _ = opponent
+
+        g = 1.0 / math.sqrt(1.0 + 3.0 * opponent_phi * opponent_phi / (math.pi * math.pi))
+        expected = 1.0 / (1.0 + math.exp(-g * (mu - opponent_mu)))
+        variance = 1.0 / (g * g * expected * (1.0 - expected))
+        delta = variance * g * (result - expected)
+
+        sigma = self._volatility(phi, sigma, variance, delta)
+
+        phi_star = math.sqrt(phi * phi + sigma * sigma)
+        phi = 1.0 / math.sqrt(1.0 / (phi_star * phi_star) + 1.0 / variance)
+        mu = mu + phi * phi * g * (result - expected)
+
+        return [mu * GLICKO2_SCALE + self.initial_rating, phi * GLICKO2_SCALE, sigma, ordinal]
+
+    def _volatility(self, phi: float, sigma: float, variance: float, delta: float, epsilon: float = 1e-6) -> float:
+        """
+        Returns the new volatility using the Illinois algorithm from the Glicko-2 paper.
+        """
+        a = math.log(sigma * sigma)
+        tau_squared = self.tau * self.tau
+
+        def f(x: float) -> float:
+            exp_x = math.exp(x)
+            denominator = phi * phi + variance + exp_x
+            return (exp_x * (delta * delta - phi * phi - variance - exp_x)) / (2.0 * denominator * denominator) - (x - a) / tau_squared
+
+        upper = a
+        if delta * delta > phi * phi + variance:
+            lower = math.log(delta * delta - phi * phi - variance)
+        else:
+            k = 1
+            while f(a - k * self.tau) < 0:
+                k += 1
+            lower = a - k * self.tau
+
+        f_upper = f(upper)
+        f_lower = f(lower)
+        while abs(lower - upper) > epsilon:
+            candidate = upper + (upper - lower) * f_upper / (f_lower - f_upper)
+            f_candidate = f(candidate)
+            if f_candidate * f_lower <= 0:
+                upper, f_upper = lower, f_lower
+            else:
+                f_upper = f_upper / 2.0
+            lower, f_lower = candidate, f_candidate
+
+        return math.exp(upper / 2.0)
+
+    def rating(self, team: str) -> float:
+        state = self.teams.get(team)
+        return self.initial_rating if state is None else state[0]
+
+    def deviation(self, team: str) -> float:
+        """
+        Returns the current rating deviation of a team.
+        """
+        state = self.teams.get(team)
+        return self.initial_deviation if state is None else state[1]
+
+
+RATERS = {
+    EloRater.method: EloRater,
+    Glicko2Rater.method: Glicko2Rater,
+}
+
+
+def restore(file: str) -> StreamingRater:
+    """
+    Restores a rater from a JSON checkpoint written by StreamingRater.checkpoint().
+
+    :param file: The checkpoint file.
+    :return: The restored rater.
+    """
+    with open(file, 'r') as input_file:
+        state = json.load(input_file)
+
+    rater = RATERS[state['method']](**state['parameters'])
+    rater.teams = state['teams']
+    rater.as_of = datetime.fromisoformat(state['as_of']) if state['as_of'] else None
+    rater.applied_match_ids = set(state['applied_match_ids'])
+
+    return rater
+
+
+def create_rater(method: str, checkpoint_file: Optional[str] = None) -> StreamingRater:
+    """
+    Returns a rater restored from a checkpoint if the file is given and exists, otherwise a new one.
+
+    :param method: 'elo' or 'glicko2'.
+    :param checkpoint_file: An optional checkpoint file.
+    :return: The rater.
+    """
+    if checkpoint_file and os.path.isfile(checkpoint_file):
+        rater = restore(checkpoint_file)
+        if rater.method != method:
+            raise ValueError(f"Checkpoint '{checkpoint_file}' holds {rater.method} ratings, not {method}")
+        return rater
+
+    return RATERS[method]()
@@ -0,0 +1,319 @@
+"""
+This module contains an out-of-core version of team_stats_table() for archives that do not fit in
+memory.
+
+Matches are read as a stream. Team counters are kept in memory, one small record per team, while
+the opponent index, two entries per match, goes to disk: entries are buffered, sorted by team and
+match order, and spilled as sorted runs that are then merged into one file sorted by team (an
+external sort). Two sequential reads of that file compute OWP and then OOWP one team at a time, so
+memory is bounded by the number of teams plus the size of a run. The results equal the in-memory
+path for the same matches in the same order.
+
+ExternalScheduleSystem does the same for the Colley and Massey ratings: the pairs of teams that
+met are spilled to disk, and every conjugate gradient step reads them back in chunks.
+"""
+
+import csv
+import heapq
+import os
+import tempfile
+
+from array import array
+from itertools import groupby
+from typing import Callable, Iterable, Iterator, Optional
+
+from ratings import matrix
+from ratings.linear import conjugate_gradient
+from ratings.models import Match
+from ratings.stats import TeamRecord
+
+
+class MatchStream:
+    """
+    A re-iterable view of matches produced by a function, so every pass reads them again from
+    their source instead of holding them in memory.
+    """
+    source: Callable[[], Iterable[Match]]
+
+    def __init__(self, source: Callable[[], Iterable[Match]]):
+        self.source = source
+
+    def __iter__(self) -> Iterator[Match]:
+        return iter(self.source())
+
+
+def _write_run(directory: str, number: int, entries: list[tuple]) -> str:
+    entries.sort(key=lambda entry: (entry[0], entry[1]))
+    path = os.path.join(directory, f'run_{number}.csv')
+    with open(path, 'w', newline='') as file:
+        csv.writer(file).writerows(entries)
+    return path
+
+
+def _read_entries(path: str) -> Iterator[tuple]:
+    with open(path, 'r', newline='') as file:
+        for team, order, opponent, home_won, tied in csv.reader(file):
+            yield int(team), int(order), int(opponent), home_won == '1', tied == '1'
+
+
+def _team_entries(path: str) -> Iterator[tuple[int, list[tuple]]]:
+    for team, entries in groupby(_read_entries(path), key=lambda entry: entry[0]):
+        yield team, list(entries)
+
+
+def external_team_stats_table(matches: Iterable[Match], number_of_digits: int = 2, chunk_size: int = 200000,
+                              directory: Optional[str] = None) -> dict:
+    """
+    Returns the statistics of every team in a stream of matches, as team_stats_table() does.
+
+    :param matches: An iterable of Match objects; it is read once.
+    :param number_of_digits: The number of digits to round the percentages to.
+    :param chunk_size: The number of opponent entries sorted in memory before a run is spilled.
+    :param directory: Where to create the temporary run files, the system default if None.
+    :return: A dict mapping each team, by the key the matches use, to the same values as
+        team_stats_table().
+    """
+    # Teams are written to the run files as positions in this list, whatever their key type.
+    teams = []
+    positions = {}
+    records = []
+
+    def position(team) -> int:
+        team_position = positions.get(team)
+        if team_position is None:
+            team_position = len(teams)
+            positions[team] = team_position
+            teams.append(team)
+            records.append(TeamRecord())
+        return team_position
+
+    with tempfile.TemporaryDirectory(dir=directory) as work_directory:
+        runs = []
+        buffer = []
+
+        for order, match in enumerate(matches):
+            home = position(match.home_team)
+            away = position(match.away_team)
+            records[home].add_result(match.home_score, match.away_score)
+            records[away].add_result(match.away_score, match.home_score)
+
+            home_won = int(match.home_score > match.away_score)
+            tied = int(match.home_score == match.away_score)
+            buffer.append((home, order, away, home_won, tied))
+            if away != home:
+                buffer.append((away, order, home, home_won, tied))
+
+            if len(buffer) >= chunk_size:
+                runs.append(_write_run(work_directory, len(runs), buffer))
+                buffer = []
+
+        if buffer:
+            runs.append(_write_run(work_directory, len(runs), buffer))
+
+        sorted_path = os.path.join(work_directory, 'entries.csv')
+        with open(sorted_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            merged = heapq.merge(*[_read_entries(run) for run in runs], key=lambda entry: (entry[0], entry[1]))
+            for team, order, opponent, home_won, tied in merged:
+                writer.writerow((team, order, opponent, int(home_won), int(tied)))
+
+        for run in runs:
+            os.remove(run)
+
+        # OWP of every team, at the requested digits and at the two digits OOWP averages.
+        owp = {}
+        owp_2 = {}
+        for team, entries in _team_entries(sorted_path):
+            opponents_wp = []
+            for _, _, opponent, home_won, tied in entries:
+                opponent_record = records[opponent]
+                opponent_matches_played = opponent_record.matches_played - 1
+
+                if opponent_matches_played > 0:
+                    opponent_wins = opponent_record.wins - home_won
+                    opponent_ties = opponent_record.ties - tied
+                    opponents_wp.append((opponent_wins + 0.5 * opponent_ties) / opponent_matches_played)
+
+            value = sum(opponents_wp) / len(opponents_wp) if opponents_wp else None
+            owp[team] = 0.0 if value is None else round(value, number_of_digits)
+            owp_2[team] = 0.0 if value is None else round(value, 2)
+
+        rows = {}
+        for team, entries in _team_entries(sorted_path):
+            opponents_owp = [owp_2[opponent] for _, _, opponent, _, _ in entries]
+            team_oowp = round(sum(opponents_owp) / len(opponents_owp), number_of_digits)
+
+            team_record = records[team]
+            team_wp = round(team_record.wins / team_record.matches_played, number_of_digits)
+            goals_per_match = round(team_record.goals_for / team_record.matches_played, 2)
+
+            rows[team] = {
+                'wins': team_record.wins,
+                'losses': team_record.losses,
+                'ties': team_record.ties,
+                'matches_played': team_record.matches_played,
+                'goals_for': team_record.goals_for,
+                'goals_against': team_record.goals_against,
+                'goal_differential': team_record.goals_for - team_record.goals_against,
+                'goals_per_match': goals_per_match,
+                'points': team_record.wins * 3 + team_record.ties,
+                'wp': team_wp,
+                'owp': owp[team],
+                'oowp': team_oowp,
+                'rpi': round(0.25 * team_wp + 0.50 * owp[team] + 0.25 * team_oowp, number_of_digits),
+                'record': f"{team_record.wins}-{team_record.losses}-{team_record.ties}",
+            }
+
+    return {teams[team]: rows[team] for team in sorted(rows, key=lambda team: teams[team])}
+
+
+class ExternalScheduleSystem:
+    """
+    The Colley and Massey systems of ScheduleSystem for a stream of matches.
+
+    ScheduleSystem keeps the game count of every pair of teams that met. Here one pass over the
+    matches keeps the games and margins of each team in memory and writes the two team positions of
+    every match to a binary file; each conjugate gradient step reads that file in chunks to
+    multiply by the pair matrix, so memory is bounded by the number of teams plus one chunk. Use
+    it as a context manager, or call close(), to remove the file.
+    """
+    teams: list
+    games: list[int]
+    win_margin: list[int]
+    goal_margin: list[int]
+
+    def __init__(self, matches: Iterable[Match], chunk_size: int = 200000, directory: Optional[str] = None):
+        """
+        :param matches: An iterable of Match objects; it is read once.
+        :param chunk_size: The number of matches whose pairs are read or written at a time.
+        :param directory: Where to create the temporary pair file, the system default if None.
+        """
+        self.teams = []
+        self.games = []
+        self.win_margin = []
+        self.goal_margin = []
+        self.chunk_size = chunk_size
+        positions = {}
+
+        def position(team) -> int:
+            team_position = positions.get(team)
+            if team_position is None:
+                team_position = len(self.teams)
+                positions[team] = team_position
+                self.teams.append(team)
+                self.games.append(0)
+                self.win_margin.append(0)
+                self.goal_margin.append(0)
+            return team_position
+
+        self._directory = tempfile.TemporaryDirectory(dir=directory)
+        self._path = os.path.join(self._directory.name, 'pairs.bin')
+
+        with open(self._path, 'wb') as file:
+            buffer = array('q')
+            for match in matches:
+                home = position(match.home_team)
+                away = position(match.away_team)
+
+                if home == away:
+                    continue
+
+                self.games[home] += 1
+                self.games[away] += 1
+
+                if match.home_score > match.away_score:
+                    self.win_margin[home] += 1
+                    self.win_margin[away] -= 1
+                elif match.home_score < match.away_score:
+                    self.win_margin[home] -= 1
+                    self.win_margin[away] += 1
+
+                self.goal_margin[home] += match.home_score - match.away_score
+                self.goal_margin[away] += match.away_score - match.home_score
+
+                buffer.append(home)
+                buffer.append(away)
+                if len(buffer) >= 2 * chunk_size:
+                    buffer.tofile(file)
+                    buffer = array('q')
+
+            buffer.tofile(file)
+
+    def __enter__(self) -> 'ExternalScheduleSystem':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Removes the pair file.
+        """
+        self._directory.cleanup()
+
+    def _chunks(self) -> Iterator[array]:
+        with open(self._path, 'rb') as file:
+            while True:
+                chunk = array('q')
+                try:
+                    chunk.fromfile(file, 2 * self.chunk_size)
+                except EOFError:
+                    # fromfile() keeps the items it read before the end of the file.
+                    pass
+                if not chunk:
+                    return
+                yield chunk
+
+    def _pair_products(self, vector: list[float]) -> list[float]:
+        """
+        Returns pairs @ vector, reading the pairs from disk.
+        """
+        size = len(self.teams)
+
+        if matrix.HAS_NUMPY:
+            np = matrix.np
+            values = np.asarray(vector, dtype=np.float64)
+            products = np.zeros(size)
+            for chunk in self._chunks():
+                pairs = np.frombuffer(chunk, dtype=np.int64).reshape(-1, 2)
+                products += np.bincount(pairs[:, 0], weights=values[pairs[:, 1]], minlength=size)
+                products += np.bincount(pairs[:, 1], weights=values[pairs[:, 0]], minlength=size)
+            return products.tolist()
+
+        products = [0.0] * size
+        for chunk in self._chunks():
+            for k in range(0, len(chunk), 2):
+                home = chunk[k]
+                away = chunk[k + 1]
+                products[home] += vector[away]
+                products[away] += vector[home]
+        return products
+
+    def _solve(self, diagonal: list[float], rhs: list[float]) -> list[float]:
+        """
+        Solves (diag(diagonal) - pairs) x = rhs with conjugate gradient.
+        """
+        if not self.teams:
+            return []
+
+        def multiply(vector: list[float]) -> list[float]:
+            products = self._pair_products(vector)
+            return [d * x - p for d, x, p in zip(diagonal, vector, products)]
+
+        return conjugate_gradient(multiply, rhs)
+
+    def colley(self) -> dict:
+        """
+        Returns the Colley rating of every team, as ScheduleSystem.colley() does.
+        """
+        diagonal = [2.0 + games for games in self.games]
+        rhs = [1.0 + margin / 2.0 for margin in self.win_margin]
+        return dict(zip(self.teams, self._solve(diagonal, rhs)))
+
+    def massey(self) -> dict:
+        """
+        Returns the Massey rating of every team, as ScheduleSystem.massey() does.
+        """
+        diagonal = [float(games) for games in self.games]
+        rhs = [float(margin) for margin in self.goal_margin]
+        return dict(zip(self.teams, self._solve(diagonal, rhs)))
@@ -0,0 +1,182 @@
+"""
+This module contains connectivity analysis of the schedule graph.
+
+Teams are vertices and every match between two different teams is an edge. RPI only compares
+teams that are connected through the schedule, so merged seasons from several organizations are
+split into connected components with a union-find structure. Within a component, teams with few
+distinct opponents are weakly connected, and bridge teams are the articulation points whose
+removal would split their component. Both passes are linear in the number of matches.
+"""
+
+from typing import Iterable
+
+from ratings.models import Match
+
+
+class DisjointSet:
+    """
+    Union-find over hashable items with path halving and union by size.
+    """
+    parent: dict
+    size: dict
+
+    def __init__(self, items: Iterable = ()):
+        self.parent = {}
+        self.size = {}
+
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """
+        Adds an item as its own set if it is not already present.
+        """
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        """
+        Returns the representative of the set containing an item.
+        """
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        """
+        Merges the sets containing two items and returns the new representative.
+        """
+        first = self.find(first)
+        second = self.find(second)
+
+        if first == second:
+            return first
+
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return first
+
+    def groups(self) -> list[list]:
+        """
+        Returns the sets, largest first, each sorted, ties broken by their first item.
+        """
+        members = {}
+        for item in self.parent:
+            members.setdefault(self.find(item), []).append(item)
+
+        return sorted((sorted(group) for group in members.values()), key=lambda group: (-len(group), group[0]))
+
+
+class ScheduleGraph:
+    """
+    The teams of a list of matches, their distinct opponents and their connected components.
+    """
+    opponents: dict[str, set[str]]
+    components: list[list[str]]
+    component: dict[str, int]
+
+    def __init__(self, matches: Iterable[Match]):
+        self.opponents = {}
+        disjoint_set = DisjointSet()
+
+        for match in matches:
+            disjoint_set.add(match.home_team)
+            disjoint_set.add(match.away_team)
+            self.opponents.setdefault(match.home_team, set())
+            self.opponents.setdefault(match.away_team, set())
+
+            if match.home_team != match.away_team:
+                self.opponents[match.home_team].add(match.away_team)
+                self.opponents[match.away_team].add(match.home_team)
+                disjoint_set.union(match.home_team, match.away_team)
+
+        self.components = disjoint_set.groups()
+        self.component = {team: number for number, group in enumerate(self.components, 1) for team in group}
+
+    def teams(self) -> list[str]:
+        """
+        Returns the teams in the graph sorted by name.
+        """
+        return sorted(self.opponents)
+
+    def weakly_connected(self, min_opponents: int = 3) -> list[str]:
+        """
+        Returns the teams that played fewer than min_opponents distinct opponents.
+        """
+        return [team for team in self.teams() if len(self.opponents[team]) < min_opponents]
+
+    def bridges(self) -> list[str]:
+        """
+        Returns the bridge teams, the teams whose removal splits their component.
+
+        The articulation points are found with an iterative depth-first search, so deep
+        components do not hit the recursion limit.
+        """
+        discovery = {}
+        low = {}
+        result = set()
+
+        for root in self.teams():
+            if root in discovery:
+                continue
+
+            discovery[root] = low[root] = len(discovery)
+            root_children = 0
+            stack = [(root, None, iter(sorted(self.opponents[root])))]
+
+            while stack:
+                team, parent, neighbors = stack[-1]
+                advanced = False
+
+                for neighbor in neighbors:
+                    if neighbor not in discovery:
+                        discovery[neighbor] = low[neighbor] = len(discovery)
+                        stack.append((neighbor, team, iter(sorted(self.opponents[neighbor]))))
+                        if team == root:
+                            root_children += 1
+                        advanced = True
+                        break
+
+                    if neighbor != parent:
+                        low[team] = min(low[team], discovery[neighbor])
+
+                if advanced:
+                    continue
+
+                stack.pop()
+                if parent is not None:
+                    low[parent] = min(low[parent], low[team])
+                    if parent != root and low[team] >= discovery[parent]:
+                        result.add(parent)
+
+            if root_children > 1:
+                result.add(root)
+
+        return sorted(result)
+
+
+def merge_matches(sources: Iterable[Iterable[Match]]) -> list[Match]:
+    """
+    Merges match lists from several organizations, keeping the first copy of every match ID.
+
+    :param sources: The match lists, in order of preference.
+    :return: The merged list.
+    """
+    seen = set()
+    merged = []
+
+    for matches in sources:
+        for match in matches:
+            if match.id in seen:
+                continue
+
+            seen.add(match.id)
+            merged.append(match)
+
+    return merged
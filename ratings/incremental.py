@@ -0,0 +1,221 @@
+"""
+This module contains a stateful RPI model that is kept up to date as match results arrive.
+
+A change to one match only alters the counters of its two teams. That changes the OWP of the two
+teams and of their opponents, and the OOWP of those teams and their opponents. The model drops
+just those cached values and recomputes them on the next lookup.
+"""
+
+from typing import Optional
+
+from ratings.models import Match
+from ratings.stats import TeamRecord
+
+
+class IncrementalRPI:
+    """
+    Maintains WP, OWP, OOWP and RPI for every team under add, remove and score updates.
+
+    Values agree with RPIEngine built from the same matches in the same order.
+    """
+    records: dict[str, TeamRecord]
+    schedule: dict[str, dict[int, tuple[str, bool, bool]]]
+
+    def __init__(self, matches: Optional[list[Match]] = None):
+        self.records = {}
+        self.schedule = {}
+        self._matches = {}
+        self._owp_raw = {}
+        self._oowp_raw = {}
+
+        for match in matches or []:
+            self.add_match(match)
+
+    def __len__(self):
+        return len(self._matches)
+
+    def __contains__(self, match_id: int):
+        return match_id in self._matches
+
+    def add_match(self, match: Match):
+        """
+        Adds a match result to the model.
+
+        :param match: The match to add.
+        """
+        if match.id in self._matches:
+            raise ValueError(f'Match {match.id} has already been added')
+
+        self._apply(match.id, match.home_team, match.away_team, match.home_score, match.away_score)
+
+    def remove_match(self, match_id: int):
+        """
+        Removes a match result from the model.
+
+        :param match_id: The ID of the match to remove.
+        """
+        home_team, away_team, home_score, away_score = self._get(match_id)
+
+        self._invalidate(home_team, away_team)
+
+        self.records[home_team].remove_result(home_score, away_score)
+        self.records[away_team].remove_result(away_score, home_score)
+        del self._matches[match_id]
+
+        for team in {home_team, away_team}:
+            del self.schedule[team][match_id]
+            if not self.schedule[team]:
+                del self.schedule[team]
+                del self.records[team]
+                self._owp_raw.pop(team, None)
+                self._oowp_raw.pop(team, None)
+
+    def update_score(self, match_id: int, home_score: int, away_score: int):
+        """
+        Replaces the score of a match already in the model.
+
+        :param match_id: The ID of the match to update.
+        :param home_score: The new home score.
+        :param away_score: The new away score.
+        """
+        home_team, away_team, old_home_score, old_away_score = self._get(match_id)
+
+        self.records[home_team].remove_result(old_home_score, old_away_score)
+        self.records[away_team].remove_result(old_away_score, old_home_score)
+        del self._matches[match_id]
+
+        # Updating in place keeps the match at its position in each team's schedule.
+        self._apply(match_id, home_team, away_team, home_score, away_score)
+
+    def _get(self, match_id: int) -> tuple[str, str, int, int]:
+        if match_id not in self._matches:
+            raise KeyError(f'Match {match_id} is not in the model')
+
+        return self._matches[match_id]
+
+    def _apply(self, match_id: int, home_team: str, away_team: str, home_score: int, away_score: int):
+        self._matches[match_id] = (home_team, away_team, home_score, away_score)
+        self._record(home_team).add_result(home_score, away_score)
+        self._record(away_team).add_result(away_score, home_score)
+
+        home_won = home_score > away_score
+        tied = home_score == away_score
+        self.schedule.setdefault(home_team, {})[match_id] = (away_team, home_won, tied)
+        if away_team != home_team:
+            self.schedule.setdefault(away_team, {})[match_id] = (home_team, home_won, tied)
+
+        self._invalidate(home_team, away_team)
+
+    def _record(self, team: str) -> TeamRecord:
+        team_record = self.records.get(team)
+
+        if team_record is None:
+            team_record = TeamRecord()
+            self.records[team] = team_record
+
+        return team_record
+
+    def _neighbors(self, team: str) -> set[str]:
+        return {opponent for opponent, _, _ in self.schedule.get(team, {}).values()}
+
+    def _invalidate(self, home_team: str, away_team: str):
+        """
+        Drops the cached OWP and OOWP values that depend on the two teams of a changed match.
+        """
+        owp_dirty = {home_team, away_team} | self._neighbors(home_team) | self._neighbors(away_team)
+
+        oowp_dirty = set(owp_dirty)
+        for team in owp_dirty:
+            oowp_dirty |= self._neighbors(team)
+
+        for team in owp_dirty:
+            self._owp_raw.pop(team, None)
+
+        for team in oowp_dirty:
+            self._oowp_raw.pop(team, None)
+
+    def teams(self) -> list[str]:
+        """
+        Returns the teams in the model sorted by name.
+        """
+        return sorted(self.schedule)
+
+    def wp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the winning percentage for a team.
+        """
+        team_record = self.records.get(team)
+
+        if team_record is None or team_record.matches_played == 0:
+            return 0.0
+
+        return round(team_record.wins / team_record.matches_played, number_of_digits)
+
+    def _owp(self, team: str) -> Optional[float]:
+        if team in self._owp_raw:
+            return self._owp_raw[team]
+
+        opponents_wp = []
+        for opponent, home_won, tied in self.schedule.get(team, {}).values():
+            opponent_record = self.records[opponent]
+            opponent_matches_played = opponent_record.matches_played - 1
+
+            if opponent_matches_played > 0:
+                opponent_wins = opponent_record.wins - home_won
+                opponent_ties = opponent_record.ties - tied
+                opponents_wp.append((opponent_wins + 0.5 * opponent_ties) / opponent_matches_played)
+
+        value = sum(opponents_wp) / len(opponents_wp) if opponents_wp else None
+        self._owp_raw[team] = value
+        return value
+
+    def owp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the opponents' winning percentage for a team.
+        """
+        value = self._owp(team)
+        return 0.0 if value is None else round(value, number_of_digits)
+
+    def _oowp(self, team: str) -> Optional[float]:
+        if team in self._oowp_raw:
+            return self._oowp_raw[team]
+
+        opponents_owp = [self.owp(opponent) for opponent, _, _ in self.schedule.get(team, {}).values()]
+
+        value = sum(opponents_owp) / len(opponents_owp) if opponents_owp else None
+        self._oowp_raw[team] = value
+        return value
+
+    def oowp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the opponents' opponents' winning percentage for a team.
+        """
+        value = self._oowp(team)
+        return 0.0 if value is None else round(value, number_of_digits)
+
+    def rpi(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the Rating Percentage Index (RPI) for a team.
+        """
+        team_wp = self.wp(team, number_of_digits)
+        team_owp = self.owp(team, number_of_digits)
+        team_oowp = self.oowp(team, number_of_digits)
+
+        return round(0.25 * team_wp + 0.50 * team_owp + 0.25 * team_oowp, number_of_digits)
+
+    def table(self, number_of_digits: int = 2) -> dict[str, dict]:
+        """
+        Returns the WP, OWP, OOWP and RPI of every team.
+
+        :param number_of_digits: The number of digits to round to.
+        :return: A dict mapping each team to its 'wp', 'owp', 'oowp' and 'rpi' values.
+        """
+        result = {}
+        for team in self.teams():
+            result[team] = {
+                'wp': self.wp(team, number_of_digits),
+                'owp': self.owp(team, number_of_digits),
+                'oowp': self.oowp(team, number_of_digits),
+                'rpi': self.rpi(team, number_of_digits),
+            }
+        return result
@@ -0,0 +1,180 @@
+"""
+This module contains the Colley matrix and Massey least-squares rating methods.
+
+Both methods solve a linear system built from the same schedule: the number of games each team
+played and the number of games between each pair of teams. ScheduleSystem builds that structure
+once and solves both systems with the conjugate gradient method, using SciPy sparse matrices when
+they are installed and a pure-Python solver otherwise.
+"""
+
+from typing import Callable
+
+from ratings import matrix
+from ratings.log import logger
+from ratings.models import Match
+
+
+class ScheduleSystem:
+    """
+    Holds the games-played diagonal and the pairwise game counts of a season.
+
+    The Colley matrix is diag(2 + games) - pairs and the Massey matrix is diag(games) - pairs.
+    The Massey matrix is singular; conjugate gradient started from zero converges to the
+    least-squares solution whose ratings sum to zero within each connected group of teams.
+    """
+    teams: list[str]
+    index: dict[str, int]
+    games: list[int]
+    pairs: list[dict[int, int]]
+    win_margin: list[int]
+    goal_margin: list[int]
+
+    def __init__(self, matches: list[Match], use_numpy: bool = True):
+        self.teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+        self.index = {team: i for i, team in enumerate(self.teams)}
+
+        size = len(self.teams)
+        self.games = [0] * size
+        self.pairs = [{} for _ in range(size)]
+        self.win_margin = [0] * size
+        self.goal_margin = [0] * size
+
+        for match in matches:
+            home = self.index[match.home_team]
+            away = self.index[match.away_team]
+
+            if home == away:
+                continue
+
+            self.games[home] += 1
+            self.games[away] += 1
+            self.pairs[home][away] = self.pairs[home].get(away, 0) + 1
+            self.pairs[away][home] = self.pairs[away].get(home, 0) + 1
+
+            if match.home_score > match.away_score:
+                self.win_margin[home] += 1
+                self.win_margin[away] -= 1
+            elif match.home_score < match.away_score:
+                self.win_margin[home] -= 1
+                self.win_margin[away] += 1
+
+            self.goal_margin[home] += match.home_score - match.away_score
+            self.goal_margin[away] += match.away_score - match.home_score
+
+        self._pair_matrix = None
+        if use_numpy and matrix.HAS_NUMPY:
+            self._pair_matrix = self._build_pair_matrix()
+
+    def _build_pair_matrix(self):
+        np = matrix.np
+        rows, columns, data = [], [], []
+        for i, opponents in enumerate(self.pairs):
+            for j, count in opponents.items():
+                rows.append(i)
+                columns.append(j)
+                data.append(count)
+
+        size = len(self.teams)
+        return matrix.sparse.csr_matrix((np.asarray(data, dtype=np.float64), (rows, columns)), shape=(size, size))
+
+    def _solve(self, diagonal: list[float], rhs: list[float]) -> list[float]:
+        """
+        Solves (diag(diagonal) - pairs) x = rhs with conjugate gradient.
+        """
+        if not self.teams:
+            return []
+
+        if self._pair_matrix is not None:
+            np = matrix.np
+            system = matrix.sparse.diags(np.asarray(diagonal, dtype=np.float64)) - self._pair_matrix
+            solution, converged = matrix.sparse_cg(system.tocsr(), np.asarray(rhs, dtype=np.float64), 1e-10, 10 * len(self.teams))
+            if converged:
+                return solution.tolist()
+
+            logger.warning('SciPy conjugate gradient did not converge, solving with the pure-Python solver')
+
+        def multiply(vector: list[float]) -> list[float]:
+            result = []
+            for i, opponents in enumerate(self.pairs):
+                total = diagonal[i] * vector[i]
+                for j, count in opponents.items():
+                    total -= count * vector[j]
+                result.append(total)
+            return result
+
+        return conjugate_gradient(multiply, rhs)
+
+    def colley(self) -> dict[str, float]:
+        """
+        Returns the Colley rating of every team keyed by team name.
+        """
+        diagonal = [2.0 + games for games in self.games]
+        rhs = [1.0 + margin / 2.0 for margin in self.win_margin]
+        return dict(zip(self.teams, self._solve(diagonal, rhs)))
+
+    def massey(self) -> dict[str, float]:
+        """
+        Returns the Massey rating of every team keyed by team name.
+        """
+        diagonal = [float(games) for games in self.games]
+        rhs = [float(margin) for margin in self.goal_margin]
+        return dict(zip(self.teams, self._solve(diagonal, rhs)))
+
+
+def conjugate_gradient(multiply: Callable[[list[float]], list[float]], rhs: list[float],
+                       tolerance: float = 1e-10) -> list[float]:
+    """
+    Solves A x = rhs for a symmetric positive semi-definite matrix A.
+
+    :param multiply: Returns the product of A and a vector; A itself is never needed.
+    :param rhs: The right-hand side.
+    :param tolerance: The residual norm, relative to the initial one, at which to stop.
+    :return: The solution.
+    """
+    size = len(rhs)
+    solution = [0.0] * size
+    residual = list(rhs)
+    direction = list(residual)
+    residual_norm = sum(value * value for value in residual)
+    threshold = tolerance * tolerance * residual_norm
+
+    for _ in range(10 * size):
+        if residual_norm <= threshold:
+            break
+
+        product = multiply(direction)
+        curvature = sum(d * p for d, p in zip(direction, product))
+        if curvature <= 0.0:
+            break
+
+        step = residual_norm / curvature
+        solution = [x + step * d for x, d in zip(solution, direction)]
+        residual = [r - step * p for r, p in zip(residual, product)]
+
+        next_norm = sum(value * value for value in residual)
+        direction = [r + (next_norm / residual_norm) * d for r, d in zip(residual, direction)]
+        residual_norm = next_norm
+
+    return solution
+
+
+def colley(matches: list[Match], number_of_digits: int = 2) -> dict[str, float]:
+    """
+    Returns the Colley matrix rating of every team in a list of matches.
+
+    :param matches: A list of Match objects.
+    :param number_of_digits: The number of digits to round to.
+    :return: A dict mapping each team to its rating.
+    """
+    return {team: round(value, number_of_digits) for team, value in ScheduleSystem(matches).colley().items()}
+
+
+def massey(matches: list[Match], number_of_digits: int = 2) -> dict[str, float]:
+    """
+    Returns the Massey least-squares rating of every team in a list of matches.
+
+    :param matches: A list of Match objects.
+    :param number_of_digits: The number of digits to round to.
+    :return: A dict mapping each team to its rating.
+    """
+    return {team: round(value, number_of_digits) for team, value in ScheduleSystem(matches).massey().items()}
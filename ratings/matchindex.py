@@ -0,0 +1,172 @@
+"""
+This module contains an in-memory index for answering questions about a list of matches.
+
+The index is built once. Each team, each pair of teams, each division and each flight gets a
+posting list of match positions sorted by date, with the dates alongside. A lookup finds its
+posting list by key and narrows it to a date range by binary search, so it costs O(log M) plus
+the size of the result instead of a scan over the whole season.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Hashable, Optional
+
+from ratings.models import Match
+
+
+class _Postings:
+    """
+    Match positions sorted by date, with their dates for range lookups.
+    """
+    positions: list[int]
+    dates: list[datetime]
+
+    def __init__(self):
+        self.positions = []
+        self.dates = []
+
+    def between(self, since: Optional[datetime], until: Optional[datetime]) -> list[int]:
+        """
+        Returns the positions of the matches dated within the inclusive range; None leaves a side open.
+        """
+        start = bisect_left(self.dates, since) if since is not None else 0
+        end = bisect_right(self.dates, until) if until is not None else len(self.dates)
+        return self.positions[start:end]
+
+
+class MatchIndex:
+    """
+    Per-team, per-pair, per-division, per-flight and by-date lookups over a list of matches.
+
+    Every lookup returns matches sorted by date, oldest first, and accepts an optional inclusive
+    date range.
+    """
+    matches: list[Match]
+
+    def __init__(self, matches: list[Match]):
+        self.matches = sorted(matches, key=lambda m: m.date)
+        self._all = _Postings()
+        self._teams = {}
+        self._pairs = {}
+        self._divisions = {}
+        self._flights = {}
+        self._opponents = {}
+
+        for position, match in enumerate(self.matches):
+            self._post(self._all, position, match)
+            self._post(self._postings(self._teams, match.home_team), position, match)
+            if match.away_team != match.home_team:
+                self._post(self._postings(self._teams, match.away_team), position, match)
+
+            self._post(self._postings(self._pairs, self._pair(match.home_team, match.away_team)), position, match)
+
+            division = match.meta_value('division')
+            if division:
+                self._post(self._postings(self._divisions, division), position, match)
+
+            flight = match.meta_value('flight')
+            if flight:
+                self._post(self._postings(self._flights, flight), position, match)
+
+            self._opponents.setdefault(match.home_team, set()).add(match.away_team)
+            self._opponents.setdefault(match.away_team, set()).add(match.home_team)
+
+    @staticmethod
+    def _pair(first: Hashable, second: Hashable) -> tuple:
+        return (first, second) if str(first) <= str(second) else (second, first)
+
+    @staticmethod
+    def _postings(index: dict, key: Hashable) -> _Postings:
+        postings = index.get(key)
+        if postings is None:
+            postings = _Postings()
+            index[key] = postings
+        return postings
+
+    @staticmethod
+    def _post(postings: _Postings, position: int, match: Match):
+        postings.positions.append(position)
+        postings.dates.append(match.date)
+
+    def _lookup(self, index: dict, key: Hashable, since: Optional[datetime], until: Optional[datetime]) -> list[Match]:
+        postings = index.get(key)
+        if postings is None:
+            return []
+        return [self.matches[position] for position in postings.between(since, until)]
+
+    def teams(self) -> list:
+        """
+        Returns the teams in the index sorted by name.
+        """
+        return sorted(self._teams)
+
+    def team_matches(self, team: Hashable, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[Match]:
+        """
+        Returns the matches a team played.
+        """
+        return self._lookup(self._teams, team, since, until)
+
+    def head_to_head(self, first: Hashable, second: Hashable, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> list[Match]:
+        """
+        Returns the matches between two teams, home or away.
+        """
+        return self._lookup(self._pairs, self._pair(first, second), since, until)
+
+    def opponents(self, team: Hashable) -> set:
+        """
+        Returns the distinct opponents of a team.
+        """
+        return set(self._opponents.get(team, ())) - {team}
+
+    def common_opponents(self, first: Hashable, second: Hashable) -> dict:
+        """
+        Returns the opponents both teams played, with each team's matches against them.
+
+        :param first: The first team.
+        :param second: The second team.
+        :return: A dict mapping each common opponent, sorted by name, to a (first team's matches,
+            second team's matches) pair.
+        """
+        first_opponents = self.opponents(first)
+        second_opponents = self.opponents(second)
+        if len(second_opponents) < len(first_opponents):
+            common = {opponent for opponent in second_opponents if opponent in first_opponents}
+        else:
+            common = {opponent for opponent in first_opponents if opponent in second_opponents}
+
+        common -= {first, second}
+        return {
+            opponent: (self.head_to_head(first, opponent), self.head_to_head(second, opponent))
+            for opponent in sorted(common, key=str)
+        }
+
+    def matches_in(self, division: Optional[str] = None, flight: Optional[str] = None,
+                   since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[Match]:
+        """
+        Returns the matches of a division and/or flight in a date range.
+
+        When both a division and a flight are given, the smaller posting list is read and filtered
+        by the other.
+        """
+        if division is None and flight is None:
+            return [self.matches[position] for position in self._all.between(since, until)]
+
+        if division is not None and flight is not None:
+            division_postings = self._divisions.get(division)
+            flight_postings = self._flights.get(flight)
+            if division_postings is None or flight_postings is None:
+                return []
+
+            if len(flight_postings.positions) <= len(division_postings.positions):
+                candidates, key, value = flight_postings, 'division', division
+            else:
+                candidates, key, value = division_postings, 'flight', flight
+
+            selected = (self.matches[position] for position in candidates.between(since, until))
+            return [match for match in selected if match.meta_value(key) == value]
+
+        if division is not None:
+            return self._lookup(self._divisions, division, since, until)
+
+        return self._lookup(self._flights, flight, since, until)
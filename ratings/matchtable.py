@@ -0,0 +1,275 @@
+"""
+This module contains a columnar container for a season of matches.
+
+A MatchTable keeps matches as parallel typed arrays instead of Match objects: match ID, home and
+away team IDs, home and away club IDs, scores, the date as seconds since the epoch and an interned
+division code. Rows are stored in chunks, one per division, and each chunk is sorted by date, so
+selecting a division or a date range only narrows memoryviews over the existing arrays, and
+concatenating tables joins their chunk lists. None of these copy a column.
+
+Teams are identified by their TGS team ID, and the stats engines accept a MatchTable wherever they
+accept a list of matches, keyed by that ID.
+"""
+
+import csv
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from ratings.dict_utils import compile_decoder
+from ratings.models import Match
+from ratings.models.match import COMPACT_META_KEYS
+
+COLUMNS = ('id', 'home_team_id', 'away_team_id', 'home_club_id', 'away_club_id', 'home_score', 'away_score',
+           'date', 'division')
+
+EPOCH = datetime(1970, 1, 1)
+
+_decode_record = compile_decoder([
+    ('matchID', int), ('gameDate', datetime), ('hometeamID', int), ('awayteamID', int), ('homeTeamClubID', int),
+    ('awayTeamClubID', int), ('homeTeamScore', int), ('awayTeamScore', int), ('division', str),
+])
+
+# Division codes are shared by every table, so tables from different organizations concatenate as is.
+_division_names = []
+_division_codes = {}
+
+
+def division_code(name: str) -> int:
+    """
+    Returns the code of a division name, assigning the next code if it has not been seen.
+    """
+    code = _division_codes.get(name)
+    if code is None:
+        code = len(_division_names)
+        _division_codes[name] = code
+        _division_names.append(name)
+    return code
+
+
+def division_name(code: int) -> str:
+    """
+    Returns the division name of a code.
+    """
+    return _division_names[code]
+
+
+def to_epoch(date: datetime) -> int:
+    """
+    Returns a naive datetime as whole seconds since 1970-01-01, without a time zone conversion.
+    """
+    return int((date - EPOCH).total_seconds())
+
+
+def from_epoch(seconds: int) -> datetime:
+    """
+    Returns the naive datetime of a number of seconds since 1970-01-01.
+    """
+    return EPOCH + timedelta(seconds=seconds)
+
+
+class _Chunk:
+    """
+    The rows of one division sorted by date, as one memoryview per column.
+    """
+    division: int
+    columns: dict[str, memoryview]
+
+    def __init__(self, division: int, columns: dict[str, memoryview]):
+        self.division = division
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns['date'])
+
+    def slice(self, start: int, end: int) -> '_Chunk':
+        """
+        Returns the rows from start up to end as a chunk sharing this one's memory.
+        """
+        return _Chunk(self.division, {name: column[start:end] for name, column in self.columns.items()})
+
+
+class MatchTable:
+    """
+    A season of matches stored column by column.
+
+    Build one with from_matches(), from_records() or from_csv(). Within a division, rows keep the
+    order they were given in among matches on the same date.
+    """
+    chunks: list[_Chunk]
+
+    def __init__(self, chunks: Optional[list[_Chunk]] = None):
+        self.chunks = [chunk for chunk in chunks or [] if len(chunk)]
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def __add__(self, other: 'MatchTable') -> 'MatchTable':
+        return MatchTable(self.chunks + other.chunks)
+
+    @classmethod
+    def concat(cls, tables: Iterable['MatchTable']) -> 'MatchTable':
+        """
+        Returns a table with the rows of several tables, sharing their arrays.
+        """
+        return cls([chunk for table in tables for chunk in table.chunks])
+
+    @classmethod
+    def _build(cls, rows: Iterable[tuple]) -> 'MatchTable':
+        """
+        Builds a table from (division, id, home team ID, away team ID, home club ID, away club ID,
+        home score, away score, epoch date) rows.
+        """
+        buffers = {}
+        for division, *values in rows:
+            columns = buffers.get(division)
+            if columns is None:
+                columns = [array('q') for _ in range(8)]
+                buffers[division] = columns
+            for column, value in zip(columns, values):
+                column.append(value)
+
+        chunks = []
+        for division, columns in buffers.items():
+            dates = columns[7]
+            order = sorted(range(len(dates)), key=dates.__getitem__)
+            code = division_code(division)
+            sorted_columns = {name: memoryview(array('q', (column[i] for i in order)))
+                              for name, column in zip(COLUMNS, columns)}
+            sorted_columns['division'] = memoryview(array('q', [code]) * len(order))
+            chunks.append(_Chunk(code, sorted_columns))
+
+        chunks.sort(key=lambda chunk: division_name(chunk.division))
+        return cls(chunks)
+
+    @classmethod
+    def from_matches(cls, matches: Iterable[Match]) -> 'MatchTable':
+        """
+        Builds a table from Match objects, reading the division from their metadata.
+        """
+        def rows():
+            for match in matches:
+                date = match.date
+                if isinstance(date, str):
+                    date = datetime.fromisoformat(date)
+                yield (match.meta_value('division') or '', match.id, match.home_team_id, match.away_team_id,
+                       match.home_team_club_id, match.away_team_club_id, match.home_score, match.away_score,
+                       to_epoch(date))
+
+        return cls._build(rows())
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], include_future: bool = False,
+                     now: Optional[datetime] = None) -> 'MatchTable':
+        """
+        Builds a table from the schedule records of the TGS API, as get_match_results_by_club_id_and_event_id()
+        reads them, without creating Match objects.
+
+        :param records: The items of a schedule response's eventPastScheduleList.
+        :param include_future: Whether to keep matches dated after now.
+        :param now: The time that separates played matches from future ones, the current time if None.
+        :return: The table.
+        """
+        cutoff = to_epoch(now or datetime.now())
+
+        def rows():
+            for record in records:
+                match_id, date, *values, division = _decode_record(record)
+                if match_id <= 0:
+                    continue
+
+                date = to_epoch(date)
+                if date > cutoff and not include_future:
+                    continue
+
+                yield (division, match_id, *values, date)
+
+        return cls._build(rows())
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'MatchTable':
+        """
+        Builds a table from a file written by the driver matches command.
+        """
+        def rows():
+            with open(path, 'r', newline='') as file:
+                for row in csv.DictReader(file):
+                    yield ((row.get('division') or '').strip(), int(row['match_id']), int(row['home_team_id']),
+                           int(row['away_team_id']), int(row['home_team_club_id']), int(row['away_team_club_id']),
+                           int(row['home_score']), int(row['away_score']),
+                           to_epoch(datetime.strptime(row['date'].strip(), '%Y-%m-%d')))
+
+        return cls._build(rows())
+
+    def column(self, name: str) -> list[memoryview]:
+        """
+        Returns a column as one memoryview per chunk.
+        """
+        return [chunk.columns[name] for chunk in self.chunks]
+
+    def values(self, name: str) -> array:
+        """
+        Returns a column as a single array; unlike column(), this copies it.
+        """
+        values = array('q')
+        for chunk in self.chunks:
+            values.frombytes(chunk.columns[name].tobytes())
+        return values
+
+    def divisions(self) -> list[str]:
+        """
+        Returns the names of the divisions in the table.
+        """
+        return sorted({division_name(chunk.division) for chunk in self.chunks})
+
+    def division(self, name: str) -> 'MatchTable':
+        """
+        Returns the rows of a division.
+        """
+        code = _division_codes.get(name)
+        return MatchTable([chunk for chunk in self.chunks if chunk.division == code])
+
+    def between(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> 'MatchTable':
+        """
+        Returns the rows dated within an inclusive range; a missing bound leaves that side open.
+        """
+        chunks = []
+        for chunk in self.chunks:
+            dates = chunk.columns['date']
+            start = bisect_left(dates, to_epoch(since)) if since is not None else 0
+            end = bisect_right(dates, to_epoch(until)) if until is not None else len(dates)
+            chunks.append(chunk.slice(start, max(start, end)))
+        return MatchTable(chunks)
+
+    def results(self) -> Iterator[tuple[int, int, int, int]]:
+        """
+        Yields the (home team ID, away team ID, home score, away score) of every row.
+        """
+        for chunk in self.chunks:
+            columns = chunk.columns
+            yield from zip(columns['home_team_id'], columns['away_team_id'], columns['home_score'], columns['away_score'])
+
+    def to_matches(self) -> list[Match]:
+        """
+        Returns the rows as Match objects whose home_team and away_team are team IDs.
+        """
+        matches = []
+        for chunk in self.chunks:
+            columns = chunk.columns
+            name = division_name(chunk.division)
+            meta = tuple(name if key == 'division' else None for key in COMPACT_META_KEYS)
+            for i in range(len(chunk)):
+                match = Match()
+                match.id = columns['id'][i]
+                match.home_team = match.home_team_id = columns['home_team_id'][i]
+                match.away_team = match.away_team_id = columns['away_team_id'][i]
+                match.home_team_club_id = columns['home_club_id'][i]
+                match.away_team_club_id = columns['away_club_id'][i]
+                match.home_score = columns['home_score'][i]
+                match.away_score = columns['away_score'][i]
+                match.date = from_epoch(columns['date'][i])
+                match.set_compact_meta(meta)
+                matches.append(match)
+        return matches
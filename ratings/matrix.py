@@ -0,0 +1,284 @@
+"""
+This module contains a NumPy/SciPy backend that computes team statistics for a whole population of
+teams at once.
+
+Teams are mapped to integer indices and every match is expanded into one entry per team that
+played in it. Per-team sums are then sparse matrix-vector products over those entries. NumPy and
+SciPy are optional; check HAS_NUMPY before using this module.
+"""
+
+import inspect
+
+from typing import Optional
+
+from ratings.matchtable import MatchTable
+from ratings.models import Match
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse.linalg import cg
+except ImportError:
+    np = None
+    sparse = None
+    cg = None
+
+HAS_NUMPY = np is not None and sparse is not None
+
+
+
+def _tolerance_keyword(solver) -> str:
+    # SciPy 1.12 renamed the relative tolerance of its iterative solvers from tol to rtol.
+    return 'rtol' if 'rtol' in inspect.signature(solver).parameters else 'tol'
+
+
+_CG_TOLERANCE = None if cg is None else _tolerance_keyword(cg)
+
+
+def sparse_cg(operator, rhs, rtol: float, maxiter: int) -> tuple:
+    """
+    Solves operator @ x = rhs with SciPy's conjugate gradient, whatever the SciPy version.
+
+    :param operator: A symmetric positive semi-definite matrix or LinearOperator.
+    :param rhs: The right-hand side.
+    :param rtol: The residual norm, relative to that of rhs, at which to stop.
+    :param maxiter: The maximum number of iterations.
+    :return: The solution and whether it converged.
+    """
+    solution, info = cg(operator, rhs, atol=0.0, maxiter=maxiter, **{_CG_TOLERANCE: rtol})
+    return solution, info == 0
+
+
+class ScheduleMatrix:
+    """
+    Holds a season's results as integer arrays and sparse team-by-entry matrices.
+
+    Entries are ordered match by match (home entry first), so summing a row of a matrix adds the
+    team's values in the same order as the pure-Python path and yields identical floats.
+    """
+    teams: list[str]
+    index: dict[str, int]
+
+    def __init__(self, matches: list[Match] | MatchTable):
+        if not HAS_NUMPY:
+            raise ImportError('ScheduleMatrix requires numpy and scipy')
+
+        if isinstance(matches, MatchTable):
+            home, away, home_score, away_score = self._table_arrays(matches)
+        else:
+            self.teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+            self.index = {team: i for i, team in enumerate(self.teams)}
+
+            home = np.fromiter((self.index[match.home_team] for match in matches), dtype=np.int64, count=len(matches))
+            away = np.fromiter((self.index[match.away_team] for match in matches), dtype=np.int64, count=len(matches))
+            home_score = np.fromiter((match.home_score for match in matches), dtype=np.int64, count=len(matches))
+            away_score = np.fromiter((match.away_score for match in matches), dtype=np.int64, count=len(matches))
+
+        self.home = home
+        self.away = away
+        self.home_score = home_score
+        self.away_score = away_score
+
+        # One entry per (match, side), interleaved so each team's entries stay in match order.
+        self.entry_team = np.column_stack((home, away)).ravel()
+        self.entry_opponent = np.column_stack((away, home)).ravel()
+        self.entry_scored = np.column_stack((home_score, away_score)).ravel()
+        self.entry_conceded = np.column_stack((away_score, home_score)).ravel()
+        self.entry_home_won = np.repeat(home_score > away_score, 2)
+        self.entry_tied = np.repeat(home_score == away_score, 2)
+
+        # A match a team plays against itself only appears once in its opponent list.
+        self_match = np.column_stack((np.zeros(len(matches), dtype=bool), home == away)).ravel()
+        self.entry_scheduled = ~self_match
+
+        size = len(self.teams)
+        self.wins = np.bincount(self.entry_team[self.entry_scored > self.entry_conceded], minlength=size)
+        self.losses = np.bincount(self.entry_team[self.entry_scored < self.entry_conceded], minlength=size)
+        self.ties = np.bincount(self.entry_team[self.entry_scored == self.entry_conceded], minlength=size)
+        self.matches_played = np.bincount(self.entry_team, minlength=size)
+        self.goals_for = np.bincount(self.entry_team, weights=self.entry_scored, minlength=size).astype(np.int64)
+        self.goals_against = np.bincount(self.entry_team, weights=self.entry_conceded, minlength=size).astype(np.int64)
+
+        self._owp_raw = None
+
+    def _table_arrays(self, table: MatchTable) -> tuple:
+        """
+        Reads the columns of a MatchTable straight from its buffers and indexes its team IDs.
+        """
+        def column(name):
+            views = [np.frombuffer(view, dtype=np.int64) for view in table.column(name)]
+            return np.concatenate(views) if views else np.zeros(0, dtype=np.int64)
+
+        team_ids, positions = np.unique(np.concatenate((column('home_team_id'), column('away_team_id'))),
+                                        return_inverse=True)
+        self.teams = team_ids.tolist()
+        self.index = {team: i for i, team in enumerate(self.teams)}
+
+        number_of_matches = len(positions) // 2
+        return positions[:number_of_matches], positions[number_of_matches:], column('home_score'), column('away_score')
+
+    def _incidence(self, mask) -> 'sparse.csr_matrix':
+        """
+        Returns a teams-by-entries matrix with a one wherever an entry in the mask belongs to a team.
+        """
+        columns = np.flatnonzero(mask)
+        rows = self.entry_team[columns]
+        data = np.ones(len(columns))
+        return sparse.csr_matrix((data, (rows, columns)), shape=(len(self.teams), len(self.entry_team)))
+
+    def owp_raw(self):
+        """
+        Returns the unrounded opponents' winning percentage for every team, or NaN for teams
+        without a qualifying opponent.
+        """
+        if self._owp_raw is not None:
+            return self._owp_raw
+
+        opponent = self.entry_opponent
+        opponent_matches_played = self.matches_played[opponent] - 1
+        valid = self.entry_scheduled & (opponent_matches_played > 0)
+
+        opponent_wins = self.wins[opponent] - self.entry_home_won
+        opponent_ties = self.ties[opponent] - self.entry_tied
+        contribution = np.zeros(len(opponent), dtype=np.float64)
+        contribution[valid] = (opponent_wins[valid] + 0.5 * opponent_ties[valid]) / opponent_matches_played[valid]
+
+        incidence = self._incidence(valid)
+        total = incidence @ contribution
+        count = incidence @ np.ones(len(opponent))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._owp_raw = total / count
+
+        return self._owp_raw
+
+    def owp(self, number_of_digits: int = 2) -> list[float]:
+        """
+        Returns the opponents' winning percentage for every team, in team index order.
+        """
+        return [0.0 if value != value else round(value, number_of_digits) for value in self.owp_raw().tolist()]
+
+    def oowp(self, number_of_digits: int = 2) -> list[float]:
+        """
+        Returns the opponents' opponents' winning percentage for every team, in team index order.
+        """
+        opponents_owp = np.asarray(self.owp(2))
+
+        incidence = self._incidence(self.entry_scheduled)
+        total = incidence @ opponents_owp[self.entry_opponent]
+        count = incidence @ np.ones(len(self.entry_team))
+
+        result = []
+        for value, matches_counted in zip(total.tolist(), count.tolist()):
+            result.append(round(value / matches_counted, number_of_digits) if matches_counted else 0.0)
+        return result
+
+    def wp(self, number_of_digits: int = 2) -> list[float]:
+        """
+        Returns the winning percentage for every team, in team index order.
+        """
+        result = []
+        for team_wins, team_matches_played in zip(self.wins.tolist(), self.matches_played.tolist()):
+            result.append(round(team_wins / team_matches_played, number_of_digits) if team_matches_played else 0.0)
+        return result
+
+    def table(self, number_of_digits: int = 2, teams: Optional[list[str]] = None) -> dict[str, dict]:
+        """
+        Returns the statistics table for every team keyed by team name.
+
+        :param number_of_digits: The number of digits to round the percentages to.
+        :param teams: The teams to include, all teams by default.
+        :return: A dict mapping each team to its statistics.
+        """
+        team_wp = self.wp(number_of_digits)
+        team_owp = self.owp(number_of_digits)
+        team_oowp = self.oowp(number_of_digits)
+
+        wins = self.wins.tolist()
+        losses = self.losses.tolist()
+        ties = self.ties.tolist()
+        matches_played = self.matches_played.tolist()
+        goals_for = self.goals_for.tolist()
+        goals_against = self.goals_against.tolist()
+
+        result = {}
+        for team in teams if teams is not None else self.teams:
+            i = self.index[team]
+            result[team] = {
+                'wins': wins[i],
+                'losses': losses[i],
+                'ties': ties[i],
+                'matches_played': matches_played[i],
+                'goals_for': goals_for[i],
+                'goals_against': goals_against[i],
+                'goal_differential': goals_for[i] - goals_against[i],
+                'goals_per_match': round(goals_for[i] / matches_played[i], 2) if matches_played[i] else 0.0,
+                'points': wins[i] * 3 + ties[i],
+                'wp': team_wp[i],
+                'owp': team_owp[i],
+                'oowp': team_oowp[i],
+                'rpi': round(0.25 * team_wp[i] + 0.50 * team_owp[i] + 0.25 * team_oowp[i], number_of_digits),
+                'record': f"{wins[i]}-{losses[i]}-{ties[i]}",
+            }
+        return result
+
+
+def batch_rpi(size: int, home, away, home_won, tied, weights=None):
+    """
+    Returns the unrounded RPI of every team in a batch of seasons that share a list of matches.
+
+    Seasons can differ in their results and, through weights, in how many times each match is
+    played. A match played w times counts w times everywhere, and each copy excludes only itself
+    from the opponent's record, as if the match list contained w copies of it.
+
+    :param size: The number of teams.
+    :param home: The home team index of each match.
+    :param away: The away team index of each match.
+    :param home_won: A seasons-by-matches boolean array of home wins.
+    :param tied: A seasons-by-matches boolean array of ties.
+    :param weights: An optional seasons-by-matches array of match multiplicities.
+    :return: A teams-by-seasons array of RPI values, NaN for teams without a match in a season.
+    """
+    seasons, number_of_matches = home_won.shape
+    if weights is None:
+        weights = np.ones((seasons, number_of_matches))
+
+    entry_team = np.column_stack((home, away)).ravel()
+    entry_opponent = np.column_stack((away, home)).ravel()
+    scheduled = np.column_stack((np.ones(number_of_matches, dtype=bool), home != away)).ravel()
+
+    # Entries are matches-by-seasons: each match contributes a home and an away entry.
+    away_won = ~home_won & ~tied
+    entry_won = np.stack((home_won, away_won), axis=2).reshape(seasons, -1).T
+    entry_tied = np.repeat(tied, 2, axis=1).T
+    entry_home_won = np.repeat(home_won, 2, axis=1).T
+    entry_weight = np.repeat(weights, 2, axis=1).T.astype(np.float64)
+
+    def incidence(mask):
+        columns = np.flatnonzero(mask)
+        return sparse.csr_matrix((np.ones(len(columns)), (entry_team[columns], columns)), shape=(size, len(entry_team)))
+
+    everything = incidence(np.ones(len(entry_team), dtype=bool))
+    wins = everything @ (entry_weight * entry_won)
+    ties = everything @ (entry_weight * entry_tied)
+    matches_played = everything @ entry_weight
+
+    opponent_matches_played = matches_played[entry_opponent] - 1
+    valid = scheduled[:, None] & (opponent_matches_played > 0) & (entry_weight > 0)
+    denominator = np.where(valid, opponent_matches_played, 1.0)
+    contribution = (wins[entry_opponent] - entry_home_won + 0.5 * (ties[entry_opponent] - entry_tied)) / denominator
+    contribution = np.where(valid, contribution * entry_weight, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        counted = everything @ np.where(valid, entry_weight, 0.0)
+        owp = np.where(counted > 0, (everything @ contribution) / counted, 0.0)
+
+        schedule_weight = np.where(scheduled[:, None], entry_weight, 0.0)
+        degree = everything @ schedule_weight
+        oowp = np.where(degree > 0, (everything @ (schedule_weight * owp[entry_opponent])) / degree, 0.0)
+
+        wp = np.where(matches_played > 0, wins / matches_played, 0.0)
+
+    rpi = 0.25 * wp + 0.50 * owp + 0.25 * oowp
+    rpi[matches_played == 0] = np.nan
+    return rpi
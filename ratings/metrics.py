@@ -0,0 +1,256 @@
+"""
+This module contains a registry of team metrics evaluated together in a single pass.
+
+Each metric declares the metrics it is computed from and a function that turns those input
+columns into its own column, a dict mapping each team to a value. A registry orders the requested
+metrics and their inputs by dependency and evaluates each one exactly once, so metrics that share
+inputs share the computed values. All metrics of one evaluation read the same MetricContext, whose
+RPIEngine walks the matches once, and only if a metric needs it: an evaluation can start from a
+table that already holds some columns, such as the one team_stats_table() returns, so a custom
+metric built on wp, owp and oowp costs no further pass over the matches.
+
+Custom metrics are registered next to the standard ones:
+
+    registry = standard_registry()
+
+    @registry.metric('road_rpi', inputs=('wp', 'owp', 'oowp'))
+    def road_rpi(context, wp, owp, oowp):
+        ...
+"""
+
+from typing import Callable, Iterable, Optional
+
+from ratings.models import Match
+from ratings.stats import RPIEngine
+
+STATS_METRICS = [
+    'wins', 'losses', 'ties', 'matches_played', 'goals_for', 'goals_against', 'goal_differential',
+    'goals_per_match', 'points', 'wp', 'owp', 'oowp', 'rpi', 'record',
+]
+
+
+class MetricContext:
+    """
+    Holds the inputs shared by every metric of one evaluation.
+    """
+    matches: list[Match]
+    number_of_digits: int
+    teams: list[str]
+
+    def __init__(self, matches: list[Match], number_of_digits: int = 2, teams: Optional[list[str]] = None):
+        """
+        :param matches: A list of Match objects.
+        :param number_of_digits: The number of digits to round percentages to.
+        :param teams: The teams to evaluate, every team of the matches by default.
+        """
+        self.matches = matches
+        self.number_of_digits = number_of_digits
+        self._engine = None
+        self.teams = self.engine.teams() if teams is None else teams
+
+    @property
+    def engine(self) -> RPIEngine:
+        """
+        Returns the RPIEngine of the matches, walking them on first access.
+        """
+        if self._engine is None:
+            self._engine = RPIEngine(self.matches)
+        return self._engine
+
+    def column(self, function: Callable) -> dict:
+        """
+        Returns a column with function(team) for every team.
+        """
+        return {team: function(team) for team in self.teams}
+
+
+class Metric:
+    """
+    A named metric, the metrics it is computed from and the function that computes it.
+    """
+    name: str
+    inputs: tuple[str, ...]
+    function: Callable
+
+    def __init__(self, name: str, inputs: Iterable[str], function: Callable):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.function = function
+
+    def __repr__(self):
+        return f"Metric({self.name}, inputs={self.inputs})"
+
+
+class MetricRegistry:
+    """
+    Keeps metrics by name and evaluates any selection of them in dependency order.
+    """
+    metrics: dict[str, Metric]
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, name: str, inputs: Iterable[str], function: Callable):
+        """
+        Adds a metric to the registry.
+
+        :param name: The name of the metric; it must not be registered yet.
+        :param inputs: The names of the metrics it is computed from.
+        :param function: Called as function(context, **inputs) with one column per input; returns
+            the metric's column.
+        """
+        if name in self.metrics:
+            raise ValueError(f"Metric '{name}' is already registered")
+
+        self.metrics[name] = Metric(name, inputs, function)
+
+    def metric(self, name: str, inputs: Iterable[str] = ()):
+        """
+        Returns a decorator that registers the decorated function as a metric.
+        """
+        def decorator(function: Callable) -> Callable:
+            self.register(name, inputs, function)
+            return function
+
+        return decorator
+
+    def copy(self) -> 'MetricRegistry':
+        """
+        Returns a registry with the same metrics, which can be extended independently.
+        """
+        registry = MetricRegistry()
+        registry.metrics = dict(self.metrics)
+        return registry
+
+    def order(self, names: Iterable[str]) -> list[str]:
+        """
+        Returns the metrics needed for the given names, each after all of its inputs.
+
+        :param names: The requested metric names.
+        :return: The evaluation order.
+        """
+        order = []
+        state = {}
+
+        def visit(name: str, path: tuple[str, ...]):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Metrics depend on each other in a cycle: {' -> '.join(path + (name,))}")
+            if name not in self.metrics:
+                raise KeyError(f"Unknown metric '{name}'")
+
+            state[name] = 'visiting'
+            for input_name in self.metrics[name].inputs:
+                visit(input_name, path + (name,))
+            state[name] = 'done'
+            order.append(name)
+
+        for name in names:
+            visit(name, ())
+        return order
+
+    def evaluate(self, matches: list[Match], names: Optional[Iterable[str]] = None,
+                 number_of_digits: int = 2, table: Optional[dict[str, dict]] = None) -> dict[str, dict]:
+        """
+        Evaluates metrics for every team in a list of matches.
+
+        :param matches: A list of Match objects.
+        :param names: The metrics to return, all registered metrics by default.
+        :param number_of_digits: The number of digits to round percentages to.
+        :param table: Rows already computed for the teams, such as team_stats_table() returns; the
+            metrics they hold are taken from them instead of being computed.
+        :return: A dict mapping each team to a dict of the requested metrics.
+        """
+        names = list(self.metrics) if names is None else list(names)
+        context = MetricContext(matches, number_of_digits, None if table is None else list(table))
+
+        columns = {}
+        if table:
+            known = set.intersection(*(set(row) for row in table.values()))
+            columns = {name: {team: row[name] for team, row in table.items()} for name in known & set(self.metrics)}
+
+        for name in self.order(names):
+            if name in columns:
+                continue
+
+            metric = self.metrics[name]
+            columns[name] = metric.function(context, **{input_name: columns[input_name] for input_name in metric.inputs})
+
+        return {team: {name: columns[name][team] for name in names} for team in context.teams}
+
+
+def _counter(field: str) -> Callable:
+    def function(context: MetricContext) -> dict:
+        return context.column(lambda team: getattr(context.engine.ledger.get(team), field))
+
+    return function
+
+
+def _ratio(numerator: dict, denominator: dict, number_of_digits: int) -> dict:
+    return {
+        team: round(numerator[team] / denominator[team], number_of_digits) if denominator[team] else 0.0
+        for team in numerator
+    }
+
+
+def add_weighted_rpi(registry: MetricRegistry, name: str, wp_weight: float, owp_weight: float, oowp_weight: float):
+    """
+    Registers an RPI variant with its own weights for WP, OWP and OOWP.
+
+    :param registry: The registry to add the metric to.
+    :param name: The name of the new metric.
+    :param wp_weight: The weight of the winning percentage.
+    :param owp_weight: The weight of the opponents' winning percentage.
+    :param oowp_weight: The weight of the opponents' opponents' winning percentage.
+    """
+    def function(context: MetricContext, wp: dict, owp: dict, oowp: dict) -> dict:
+        return {
+            team: round(wp_weight * wp[team] + owp_weight * owp[team] + oowp_weight * oowp[team], context.number_of_digits)
+            for team in wp
+        }
+
+    registry.register(name, ('wp', 'owp', 'oowp'), function)
+
+
+def standard_registry() -> MetricRegistry:
+    """
+    Returns a new registry holding the metrics of team_stats_table().
+    """
+    registry = MetricRegistry()
+
+    for field in ('wins', 'losses', 'ties', 'matches_played', 'goals_for', 'goals_against'):
+        registry.register(field, (), _counter(field))
+
+    registry.register(
+        'goal_differential', ('goals_for', 'goals_against'),
+        lambda context, goals_for, goals_against: {team: goals_for[team] - goals_against[team] for team in goals_for},
+    )
+    registry.register(
+        'goals_per_match', ('goals_for', 'matches_played'),
+        lambda context, goals_for, matches_played: _ratio(goals_for, matches_played, 2),
+    )
+    registry.register(
+        'points', ('wins', 'ties'),
+        lambda context, wins, ties: {team: wins[team] * 3 + ties[team] for team in wins},
+    )
+    registry.register(
+        'record', ('wins', 'losses', 'ties'),
+        lambda context, wins, losses, ties: {team: f"{wins[team]}-{losses[team]}-{ties[team]}" for team in wins},
+    )
+    registry.register(
+        'wp', ('wins', 'matches_played'),
+        lambda context, wins, matches_played: _ratio(wins, matches_played, context.number_of_digits),
+    )
+    registry.register(
+        'owp', (),
+        lambda context: context.column(lambda team: context.engine.owp(team, context.number_of_digits)),
+    )
+    # OOWP averages the opponents' OWP at two digits regardless of number_of_digits, as oowp() does.
+    registry.register(
+        'oowp', (),
+        lambda context: context.column(lambda team: context.engine.oowp(team, context.number_of_digits)),
+    )
+    add_weighted_rpi(registry, 'rpi', 0.25, 0.50, 0.25)
+
+    return registry
@@ -5,3 +5,4 @@ from .club import Club
 from .team import Team
 from .event import Event
 from .match import Match
+from .entity import Entity, IdentityMap, identity_map
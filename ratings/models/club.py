@@ -1,4 +1,14 @@
-class Club:
+from .entity import Entity
+
+
+class Club(Entity):
+    """
+    Represents a club's entry in an event of an organization; a club playing in two events, or in
+    another organization, has one entry for each.
+    """
+    __slots__ = ('id', 'name', 'full_name', 'city', 'logo', 'state_code', 'org_id', 'org_season_id', 'event_id')
+    _key = ('id', 'org_id', 'event_id')
+
     id: int
     name: str
     full_name: str
@@ -0,0 +1,113 @@
+"""
+This module contains the base class of the reference entities and the identity map that keeps
+one instance of each of them per process.
+"""
+
+from typing import Any, Optional
+
+
+class Entity:
+    """
+    An immutable, hashable record with a fixed set of fields.
+
+    Subclasses list their fields in __slots__ and name the fields that identify an instance in _key.
+    Fields can be passed by position, in __slots__ order, or by name.
+    """
+    __slots__ = ()
+    _key: tuple[str, ...] = ('id',)
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self.__slots__):
+            raise TypeError(f'{type(self).__name__} takes at most {len(self.__slots__)} fields')
+
+        values = dict(zip(self.__slots__, args))
+        for name, value in kwargs.items():
+            if name not in self.__slots__:
+                raise TypeError(f"{type(self).__name__} has no field '{name}'")
+            if name in values:
+                raise TypeError(f"{type(self).__name__} got field '{name}' twice")
+            values[name] = value
+
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.values()))
+
+    def __reduce__(self):
+        return type(self), self.values()
+
+    def values(self) -> tuple:
+        """
+        Returns the values of the fields in __slots__ order.
+        """
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def key(self) -> tuple:
+        """
+        Returns the values that identify the entity in the identity map.
+        """
+        return tuple(getattr(self, name) for name in self._key)
+
+    def replace(self, **changes) -> 'Entity':
+        """
+        Returns a copy of the entity with some fields changed.
+        """
+        values = dict(zip(self.__slots__, self.values()))
+        values.update(changes)
+        return type(self)(**values)
+
+
+class IdentityMap:
+    """
+    Holds one instance of each entity by its type and key.
+
+    resolve() returns the held instance when it equals the one passed in, so loaders that read the
+    same club or event again hand out the object they returned before. When the fields of an entity
+    changed, the new instance replaces the held one.
+    """
+
+    def __init__(self):
+        self._entities = {}
+
+    def __len__(self):
+        return len(self._entities)
+
+    def resolve(self, entity: Entity) -> Entity:
+        """
+        Returns the held instance equal to an entity, holding the entity if there is none.
+        """
+        key = (type(entity), entity.key())
+        held = self._entities.get(key)
+        if held is not None and held == entity:
+            return held
+
+        self._entities[key] = entity
+        return entity
+
+    def get(self, entity_type: type, *key) -> Optional[Entity]:
+        """
+        Returns the held entity of a type by its key, or None.
+        """
+        return self._entities.get((entity_type, key))
+
+    def clear(self):
+        """
+        Drops every held entity.
+        """
+        self._entities.clear()
+
+
+# The identity map the TGS loaders resolve entities through.
+identity_map = IdentityMap()
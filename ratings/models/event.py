@@ -1,4 +1,9 @@
-class Event:
+from .entity import Entity
+
+
+class Event(Entity):
+    __slots__ = ('id', 'name', 'org_id', 'org_name', 'org_season_id', 'org_season_name')
+
     id: int
     name: str
     org_id: int
@@ -1,15 +1,62 @@
+import sys
+
 from datetime import datetime
+from typing import Any, Optional
+
+from ratings.dict_utils import parse_timestamp
+
+# The keys of match.meta for a match read from TGS, in the order they are read. Keys that repeat
+# a typed attribute are not stored again; they are rebuilt from the attribute when meta is decoded.
+META_KEYS = (
+    'matchID', 'gameDate', 'homeTeamID', 'homeTeamClubID', 'awayTeamID', 'awayTeamClubID', 'gameTime',
+    'flight', 'division', 'homeclublogo', 'awayclublogo', 'homeTeam', 'awayTeam', 'complex', 'venue',
+    'scheduleID', 'homeTeamScore', 'awayTeamScore', 'eventName', 'eventLogo', 'startDate', 'endDate',
+    'eventTypeID',
+)
+
+META_ATTRIBUTES = {
+    'matchID': 'id',
+    'gameDate': 'date',
+    'homeTeamID': 'home_team_id',
+    'homeTeamClubID': 'home_team_club_id',
+    'awayTeamID': 'away_team_id',
+    'awayTeamClubID': 'away_team_club_id',
+    'homeTeam': 'home_team',
+    'awayTeam': 'away_team',
+    'homeTeamScore': 'home_score',
+    'awayTeamScore': 'away_score',
+}
+
+# The keys held in a match's compact metadata tuple, in tuple order.
+COMPACT_META_KEYS = tuple(key for key in META_KEYS if key not in META_ATTRIBUTES)
+
+_COMPACT_INDEX = {key: i for i, key in enumerate(COMPACT_META_KEYS)}
+
+def share(value: Any) -> Any:
+    """
+    Returns the interned instance of a string, so names repeated across many matches are stored
+    once. Other values are returned unchanged; a process-wide table of them would only grow.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+
+    return value
 
-from typing import Optional
 
 class Match:
+    """
+    A single match. Metadata read from TGS is kept in a compact tuple and only decoded into the
+    meta dict when meta is accessed; meta_value() reads a single key without decoding.
+    """
+    __slots__ = ('id', 'home_team', 'home_team_id', 'home_team_club_id', 'away_team', 'away_team_id',
+                 'away_team_club_id', 'home_score', 'away_score', 'date', '_compact_meta', '_meta')
+
     id: int
     home_team: Optional[str]
     away_team: Optional[str]
     home_score: int
     away_score: int
     date: datetime
-    meta: dict
 
     def __init__(self):
         self.id = 0
@@ -22,7 +69,8 @@ class Match:
         self.home_score = 0
         self.away_score = 0
         self.date = datetime.now()
-        self.meta = {}
+        self._compact_meta = None
+        self._meta = None
 
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} on {self.date} - {self.home_score}-{self.away_score}"
@@ -30,10 +78,76 @@ class Match:
     def __repr__(self):
         return str(self)
 
-    def is_future(self):
+    @property
+    def meta(self) -> dict:
+        """
+        Returns the match's metadata as a dict, decoding the compact form on first access.
+        """
+        if self._meta is None:
+            self._meta = self._decode_meta()
+            self._compact_meta = None
+        return self._meta
+
+    @meta.setter
+    def meta(self, value: dict):
+        self._meta = value
+        self._compact_meta = None
+
+    def set_compact_meta(self, values: tuple, shared: bool = False):
+        """
+        Stores TGS metadata compactly.
+
+        :param values: The values of COMPACT_META_KEYS, in that order.
+        :param shared: Whether the strings are already interned, as a decoder that interns them
+            returns them.
+        """
+        if shared:
+            self._compact_meta = tuple(values)
+        else:
+            self._compact_meta = tuple(share(value) for value in values)
+        self._meta = None
+
+    def meta_value(self, key: str, default: Any = None) -> Any:
+        """
+        Returns a single metadata value without decoding the whole meta dict.
+        """
+        if self._meta is not None:
+            return self._meta.get(key, default)
+
+        if self._compact_meta is None:
+            return default
+
+        if key in META_ATTRIBUTES:
+            return self._meta_attribute(key)
+
+        index = _COMPACT_INDEX.get(key)
+        return default if index is None else self._compact_meta[index]
+
+    def _meta_attribute(self, key: str) -> Any:
+        value = getattr(self, META_ATTRIBUTES[key])
+        if key == 'gameDate' and isinstance(value, datetime):
+            return value.strftime('%Y-%m-%dT%H:%M:%S')
+        return value
+
+    def _decode_meta(self) -> dict:
+        if self._compact_meta is None:
+            return {}
+
+        meta = {}
+        for key in META_KEYS:
+            if key in META_ATTRIBUTES:
+                meta[key] = self._meta_attribute(key)
+            else:
+                meta[key] = self._compact_meta[_COMPACT_INDEX[key]]
+        return meta
+
+    def is_future(self, now: Optional[datetime] = None) -> bool:
+        """
+        Returns whether the match is dated after now, the current time if None. Callers checking many
+        matches pass one clock so they are all judged against the same instant.
+        """
         # if self.date is a string in the format 'YYYY-MM-DDTHH:MM:SS' convert it to a datetime object
         if isinstance(self.date, str):
-            self.date = datetime.strptime(self.date, '%Y-%m-%dT%H:%M:%S')
-
-        return self.date > datetime.now()
+            self.date = parse_timestamp(self.date)
 
+        return self.date > (now or datetime.now())
@@ -1,16 +1,17 @@
-class State:
+from .entity import Entity
+
+
+class State(Entity):
     """
     Represents a state.
     """
+    __slots__ = ('id', 'name')
+
     id: int
     name: str
 
-    def __init__(self, id: int, name: str):
-        self.id = id
-        self.name = name
-
     def __str__(self):
         return f"State(id={self.id}, name='{self.name}')"
 
     def __repr__(self):
-        return str(self)
\ No newline at end of file
+        return str(self)
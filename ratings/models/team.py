@@ -1,10 +1,12 @@
-class Team:
-    def __init__(self, name, rating):
-        self.name = name
+from .entity import Entity
+
+
+class Team(Entity):
+    __slots__ = ('name', 'rating')
+    _key = ('name',)
 
     def __str__(self):
         return f'{self.name}'
 
     def __repr__(self):
         return str(self)
-
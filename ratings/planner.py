@@ -0,0 +1,165 @@
+"""
+This module contains a planner that skips club schedule requests whose matches are already known.
+
+Every match appears in the schedules of both of its clubs. When the matches of an event are all
+played between clubs of that event, each match of the last club left has an opponent whose
+schedule was already fetched, so the last schedule adds nothing. The planner defers the last club
+of every event and skips it if the schedules fetched for the event only name clubs of the event;
+an unknown opponent means the event is not closed, and the deferred club is fetched after all.
+Repeated (club, event) entries in the club list are requested once.
+
+In verify mode every deferred schedule is fetched anyway, and the matches the plan would have
+missed are counted, so the assumption can be checked against a full harvest.
+"""
+
+from typing import Callable, Iterable
+
+from ratings.models import Club, Match
+
+
+class _EventState:
+    """
+    What the fetched schedules of one event have shown.
+    """
+    club_ids: set[int]
+    seen_club_ids: set[int]
+    matches_seen: int
+
+    def __init__(self):
+        self.club_ids = set()
+        self.seen_club_ids = set()
+        self.matches_seen = 0
+
+    def closed(self) -> bool:
+        """
+        Returns True if the event's fetched schedules hold matches and name only clubs of the event.
+        """
+        return self.matches_seen > 0 and self.seen_club_ids <= self.club_ids
+
+
+class SchedulePlanner:
+    """
+    Chooses which club schedules to request and records how many requests the plan saved.
+    """
+    verify: bool
+    requests_needed: int
+    requests_made: int
+    requests_skipped: int
+    missed_match_ids: set[int]
+
+    def __init__(self, verify: bool = False):
+        self.verify = verify
+        self.requests_needed = 0
+        self.requests_made = 0
+        self.requests_skipped = 0
+        self.missed_match_ids = set()
+        self._events = {}
+        self._seen_match_ids = set()
+
+    @property
+    def requests_saved(self) -> int:
+        """
+        Returns the number of requests the plan made unnecessary.
+        """
+        return self.requests_needed - self.requests_made
+
+    @staticmethod
+    def summarize(matches: list[Match]) -> tuple[frozenset, frozenset]:
+        """
+        Returns the club IDs and match IDs of a schedule, all the planner needs to know about it.
+        """
+        club_ids = frozenset(club_id for match in matches for club_id in (match.home_team_club_id, match.away_team_club_id))
+        return club_ids, frozenset(match.id for match in matches)
+
+    def plan(self, clubs: Iterable[Club]) -> tuple[list[Club], list[Club]]:
+        """
+        Splits the clubs into the schedules to fetch first and the last club of each event.
+
+        :param clubs: The clubs of the organization, in the order their matches should be merged.
+        :return: The clubs to fetch first, then the deferred clubs, each in club order.
+        """
+        unique = {}
+        for club in clubs:
+            if club.id == 0 or club.event_id == 0:
+                continue
+
+            self.requests_needed += 1
+            unique.setdefault((club.id, club.event_id), club)
+
+        by_event = {}
+        for club in unique.values():
+            by_event.setdefault(club.event_id, []).append(club)
+            self._events.setdefault(club.event_id, _EventState()).club_ids.add(club.id)
+
+        deferred = {event_clubs[-1] for event_clubs in by_event.values() if len(event_clubs) > 1}
+        first = [club for club in unique.values() if club not in deferred]
+        return first, [club for club in unique.values() if club in deferred]
+
+    def observe(self, club: Club, summary: tuple[frozenset, frozenset]):
+        """
+        Records the schedule of a club fetched in the first wave.
+        """
+        club_ids, match_ids = summary
+        event = self._events[club.event_id]
+        event.seen_club_ids |= club_ids
+        event.matches_seen += len(match_ids)
+        self._seen_match_ids |= match_ids
+
+    def needs_fetch(self, club: Club) -> bool:
+        """
+        Returns whether a deferred club has to be fetched.
+        """
+        return self.verify or not self._events[club.event_id].closed()
+
+    def observe_deferred(self, club: Club, summary: tuple[frozenset, frozenset]):
+        """
+        Records the schedule of a deferred club; in verify mode, counts the matches the plan would
+        have missed by skipping it.
+        """
+        if self._events[club.event_id].closed():
+            self.requests_skipped += 1
+            self.missed_match_ids |= summary[1] - self._seen_match_ids
+
+    def fetch(self, clubs: list[Club], fetch: Callable[[Club], tuple[list, tuple[frozenset, frozenset]]],
+              fan_out: Callable[[Callable, list], list]) -> list[list]:
+        """
+        Fetches the planned schedules.
+
+        :param clubs: The clubs of the organization.
+        :param fetch: Fetches a club's schedule and returns the part of it to keep with its summarize().
+        :param fan_out: Maps a function over a list, returning the results in order.
+        :return: The kept part of each club's schedule, in club order; clubs not fetched, or fetched
+            earlier under the same (club, event), get an empty list.
+        """
+        first, deferred = self.plan(clubs)
+        kept = {}
+
+        for club, (selected, summary) in zip(first, fan_out(fetch, first)):
+            self.observe(club, summary)
+            kept[(club.id, club.event_id)] = selected
+
+        second = [club for club in deferred if self.needs_fetch(club)]
+        self.requests_skipped += len(deferred) - len(second)
+        for club, (selected, summary) in zip(second, fan_out(fetch, second)):
+            if self.verify:
+                self.observe_deferred(club, summary)
+            kept[(club.id, club.event_id)] = selected
+
+        self.requests_made = len(first) + len(second)
+
+        result = []
+        for club in clubs:
+            result.append(kept.pop((club.id, club.event_id), []))
+        return result
+
+    def report(self) -> str:
+        """
+        Returns a one-line summary of the requests made and saved.
+        """
+        if self.verify:
+            return (f'Fetched all {self.requests_made} of {self.requests_needed} schedules; the plan would skip '
+                    f'{self.requests_needed - self.requests_made + self.requests_skipped} and miss '
+                    f'{len(self.missed_match_ids)} matches')
+
+        return (f'Fetched {self.requests_made} of {self.requests_needed} schedules, saving {self.requests_saved} '
+                f'requests ({self.requests_skipped} covered by earlier schedules)')
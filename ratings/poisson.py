@@ -0,0 +1,313 @@
+"""
+This module contains a Dixon-Coles style Poisson goal model.
+
+Each team has an attack and a defence strength. The home team's goals are Poisson with mean
+exp(intercept + home_advantage + attack[home] - defence[away]) and the away team's goals with mean
+exp(intercept + attack[away] - defence[home]). The Dixon-Coles correction rho adjusts the
+probability of 0-0, 1-0, 0-1 and 1-1 scores, and older matches can be down-weighted with an
+exponential time decay.
+
+The model is fitted with Newton steps on the penalized likelihood. The gradient and the Fisher
+information products are computed over all matches at once, and each step is solved with
+conjugate gradient. Without the Dixon-Coles correction, the Fisher information of the Poisson log
+link equals the Hessian, so the steps are exact Newton steps. With it, the rho terms enter the
+gradient but the operator leaves out their second derivatives and only approximates the curvature
+in rho. The steps are then quasi-Newton steps, and a backtracking line search keeps each one
+decreasing the objective. Either way, a fit warm started from the previous night's parameters
+converges in a few iterations. NumPy and SciPy are required; check matrix.HAS_NUMPY before using
+this module.
+"""
+
+import json
+
+from datetime import datetime
+from typing import Callable, Hashable, Optional
+
+from ratings import matrix
+from ratings.log import logger
+from ratings.models import Match
+
+if matrix.HAS_NUMPY:
+    from scipy.sparse.linalg import LinearOperator
+
+np = matrix.np
+
+
+class PoissonModel:
+    """
+    Attack/defence Poisson ratings fitted from match scores.
+    """
+    teams: list[str]
+    attack: dict[str, float]
+    defence: dict[str, float]
+    intercept: float
+    home_advantage: float
+    rho: float
+    iterations: int
+
+    def __init__(self, decay: float = 0.0, ridge: float = 0.01, dixon_coles: bool = True):
+        """
+        :param decay: The time decay per day; a match d days before the latest one has weight exp(-decay * d).
+        :param ridge: The L2 penalty on the attack and defence strengths.
+        :param dixon_coles: Whether to fit the low-score correction rho.
+        """
+        self.decay = decay
+        self.ridge = ridge
+        self.dixon_coles = dixon_coles
+
+        self.teams = []
+        self.attack = {}
+        self.defence = {}
+        self.intercept = 0.0
+        self.home_advantage = 0.0
+        self.rho = 0.0
+        self.iterations = 0
+
+    def fit(self, matches: list[Match], warm_start: Optional['PoissonModel'] = None,
+            reference_date: Optional[datetime] = None, max_iterations: int = 100,
+            tolerance: float = 1e-6) -> 'PoissonModel':
+        """
+        Fits the model to a list of matches.
+
+        :param matches: A list of Match objects.
+        :param warm_start: A previous fit whose parameters are used as the starting point.
+        :param reference_date: The date the time decay is measured from, the latest match by default.
+        :param max_iterations: The maximum number of Newton iterations.
+        :param tolerance: The Newton decrement at which the fit has converged.
+        :return: The fitted model.
+        """
+        if not matrix.HAS_NUMPY:
+            raise ImportError('PoissonModel requires numpy and scipy')
+
+        self.teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+        index = {team: i for i, team in enumerate(self.teams)}
+        size = len(self.teams)
+
+        home = np.fromiter((index[match.home_team] for match in matches), dtype=np.int64, count=len(matches))
+        away = np.fromiter((index[match.away_team] for match in matches), dtype=np.int64, count=len(matches))
+        home_goals = np.fromiter((match.home_score for match in matches), dtype=np.float64, count=len(matches))
+        away_goals = np.fromiter((match.away_score for match in matches), dtype=np.float64, count=len(matches))
+
+        weights = np.ones(len(matches))
+        if self.decay and matches:
+            ordinals = np.fromiter((match.date.toordinal() for match in matches), dtype=np.float64, count=len(matches))
+            latest = reference_date.toordinal() if reference_date is not None else ordinals.max()
+            weights = np.exp(-self.decay * (latest - ordinals))
+
+        low_00 = (home_goals == 0) & (away_goals == 0)
+        low_01 = (home_goals == 0) & (away_goals == 1)
+        low_10 = (home_goals == 1) & (away_goals == 0)
+        low_11 = (home_goals == 1) & (away_goals == 1)
+
+        def objective(theta):
+            intercept, home_advantage, rho = theta[0], theta[1], theta[2]
+            attack = theta[3:3 + size]
+            defence = theta[3 + size:]
+
+            home_log_rate = intercept + home_advantage + attack[home] - defence[away]
+            away_log_rate = intercept + attack[away] - defence[home]
+            home_rate = np.exp(home_log_rate)
+            away_rate = np.exp(away_log_rate)
+
+            log_likelihood = home_goals * home_log_rate - home_rate + away_goals * away_log_rate - away_rate
+            home_gradient = home_goals - home_rate
+            away_gradient = away_goals - away_rate
+            rho_gradient = 0.0
+            rho_curvature = 1.0
+
+            if self.dixon_coles:
+                tau = np.ones(len(home_goals))
+                tau[low_00] = 1.0 - home_rate[low_00] * away_rate[low_00] * rho
+                tau[low_01] = 1.0 + home_rate[low_01] * rho
+                tau[low_10] = 1.0 + away_rate[low_10] * rho
+                tau[low_11] = 1.0 - rho
+                tau = np.maximum(tau, 1e-10)
+                log_likelihood = log_likelihood + np.log(tau)
+
+                product = home_rate * away_rate
+                home_gradient = home_gradient - np.where(low_00, product * rho / tau, 0.0) + np.where(low_01, home_rate * rho / tau, 0.0)
+                away_gradient = away_gradient - np.where(low_00, product * rho / tau, 0.0) + np.where(low_10, away_rate * rho / tau, 0.0)
+                rho_terms = (
+                    np.where(low_00, -product / tau, 0.0)
+                    + np.where(low_01, home_rate / tau, 0.0)
+                    + np.where(low_10, away_rate / tau, 0.0)
+                    + np.where(low_11, -1.0 / tau, 0.0)
+                )
+                rho_gradient = np.dot(weights, rho_terms)
+                rho_curvature += np.dot(weights, rho_terms * rho_terms)
+
+            home_gradient = weights * home_gradient
+            away_gradient = weights * away_gradient
+
+            attack_gradient = np.bincount(home, home_gradient, size) + np.bincount(away, away_gradient, size)
+            defence_gradient = -np.bincount(away, home_gradient, size) - np.bincount(home, away_gradient, size)
+
+            value = -np.dot(weights, log_likelihood) + self.ridge * (np.dot(attack, attack) + np.dot(defence, defence))
+            gradient = np.concatenate((
+                [-(home_gradient.sum() + away_gradient.sum()), -home_gradient.sum(), -rho_gradient],
+                -attack_gradient + 2.0 * self.ridge * attack,
+                -defence_gradient + 2.0 * self.ridge * defence,
+            ))
+            return value, gradient, rho_curvature
+
+        def fisher_operator(theta, rho_curvature):
+            intercept, home_advantage = theta[0], theta[1]
+            attack = theta[3:3 + size]
+            defence = theta[3 + size:]
+            home_rate = weights * np.exp(intercept + home_advantage + attack[home] - defence[away])
+            away_rate = weights * np.exp(intercept + attack[away] - defence[home])
+
+            def product(direction):
+                attack_direction = direction[3:3 + size]
+                defence_direction = direction[3 + size:]
+                home_change = home_rate * (direction[0] + direction[1] + attack_direction[home] - defence_direction[away])
+                away_change = away_rate * (direction[0] + attack_direction[away] - defence_direction[home])
+                return np.concatenate((
+                    [home_change.sum() + away_change.sum(), home_change.sum(), rho_curvature * direction[2]],
+                    np.bincount(home, home_change, size) + np.bincount(away, away_change, size) + 2.0 * self.ridge * attack_direction,
+                    -np.bincount(away, home_change, size) - np.bincount(home, away_change, size) + 2.0 * self.ridge * defence_direction,
+                ))
+
+            return product
+
+        theta = self._initial_parameters(warm_start, home_goals, away_goals)
+        value, gradient, rho_curvature = objective(theta)
+        dimension = len(theta)
+
+        self.iterations = 0
+        while self.iterations < max_iterations:
+            operator = LinearOperator((dimension, dimension), matvec=fisher_operator(theta, rho_curvature), dtype=np.float64)
+            step, converged = matrix.sparse_cg(operator, -gradient, 1e-8, 10 * dimension)
+            self.iterations += 1
+
+            decrement = -np.dot(gradient, step)
+            if not converged:
+                # An unfinished solve can still descend; if it does not, take a gradient step.
+                logger.warning(f'Conjugate gradient did not converge in Poisson iteration {self.iterations}')
+                if decrement <= 0.0:
+                    step = -gradient
+                    decrement = np.dot(gradient, gradient)
+            elif decrement <= 2.0 * tolerance:
+                break
+
+            # Backtracking line search, keeping rho within (-0.2, 0.2).
+            size_factor = 1.0
+            while True:
+                candidate = theta + size_factor * step
+                candidate[2] = np.clip(candidate[2], -0.2, 0.2) if self.dixon_coles else 0.0
+                candidate_value, candidate_gradient, candidate_curvature = objective(candidate)
+                if candidate_value <= value - 0.25 * size_factor * decrement or size_factor < 1e-6:
+                    break
+                size_factor /= 2.0
+
+            theta, value, gradient, rho_curvature = candidate, candidate_value, candidate_gradient, candidate_curvature
+
+        self.intercept = float(theta[0])
+        self.home_advantage = float(theta[1])
+        self.rho = float(theta[2])
+        self.attack = dict(zip(self.teams, theta[3:3 + size].tolist()))
+        self.defence = dict(zip(self.teams, theta[3 + size:].tolist()))
+
+        return self
+
+    def _initial_parameters(self, warm_start: Optional['PoissonModel'], home_goals, away_goals):
+        size = len(self.teams)
+        theta = np.zeros(3 + 2 * size)
+
+        if warm_start is not None and warm_start.teams:
+            theta[0] = warm_start.intercept
+            theta[1] = warm_start.home_advantage
+            theta[2] = warm_start.rho if self.dixon_coles else 0.0
+            theta[3:3 + size] = [warm_start.attack.get(team, 0.0) for team in self.teams]
+            theta[3 + size:] = [warm_start.defence.get(team, 0.0) for team in self.teams]
+        elif len(home_goals):
+            mean_goals = (home_goals.sum() + away_goals.sum()) / (2 * len(home_goals))
+            theta[0] = np.log(max(mean_goals, 1e-3))
+
+        return theta
+
+    def expected_goals(self, home_team: str, away_team: str) -> tuple[float, float]:
+        """
+        Returns the expected goals of the home and away team in a match between them.
+        """
+        home_rate = np.exp(self.intercept + self.home_advantage + self.attack.get(home_team, 0.0) - self.defence.get(away_team, 0.0))
+        away_rate = np.exp(self.intercept + self.attack.get(away_team, 0.0) - self.defence.get(home_team, 0.0))
+        return float(home_rate), float(away_rate)
+
+    def table(self, number_of_digits: int = 2) -> dict[str, dict]:
+        """
+        Returns the attack and defence strength of every team.
+
+        :param number_of_digits: The number of digits to round to.
+        :return: A dict mapping each team to its 'attack' and 'defence' values.
+        """
+        return {
+            team: {
+                'attack': round(self.attack[team], number_of_digits),
+                'defence': round(self.defence[team], number_of_digits),
+            }
+            for team in self.teams
+        }
+
+    def rekey(self, key: Callable[[Hashable], Optional[Hashable]]) -> 'PoissonModel':
+        """
+        Returns a copy of the model with every team renamed.
+
+        Models fitted on interned matches are keyed by indices that only hold for one run; rekey
+        them by a stable key before save(), and back to indices after load().
+
+        :param key: Maps a team to its new key, or to None to drop the team.
+        :return: The renamed model.
+        """
+        model = PoissonModel(decay=self.decay, ridge=self.ridge, dixon_coles=self.dixon_coles)
+        model.intercept = self.intercept
+        model.home_advantage = self.home_advantage
+        model.rho = self.rho
+        model.iterations = self.iterations
+
+        for team in self.teams:
+            new_key = key(team)
+            if new_key is None:
+                continue
+
+            model.teams.append(new_key)
+            model.attack[new_key] = self.attack[team]
+            model.defence[new_key] = self.defence[team]
+
+        return model
+
+    def save(self, file: str):
+        """
+        Writes the fitted parameters to a JSON file.
+        """
+        state = {
+            'decay': self.decay,
+            'ridge': self.ridge,
+            'dixon_coles': self.dixon_coles,
+            'intercept': self.intercept,
+            'home_advantage': self.home_advantage,
+            'rho': self.rho,
+            'attack': self.attack,
+            'defence': self.defence,
+        }
+
+        with open(file, 'w') as output_file:
+            json.dump(state, output_file)
+
+    @classmethod
+    def load(cls, file: str) -> 'PoissonModel':
+        """
+        Reads fitted parameters written by save().
+        """
+        with open(file, 'r') as input_file:
+            state = json.load(input_file)
+
+        model = cls(decay=state['decay'], ridge=state['ridge'], dixon_coles=state['dixon_coles'])
+        model.intercept = state['intercept']
+        model.home_advantage = state['home_advantage']
+        model.rho = state['rho']
+        model.attack = state['attack']
+        model.defence = state['defence']
+        model.teams = sorted(model.attack)
+
+        return model
@@ -0,0 +1,93 @@
+"""
+This module contains a registry that interns teams to dense integer indices.
+
+Teams are identified by their TGS team ID, so two teams that share a display name stay separate.
+Interned matches carry the indices in home_team and away_team, so the stats engines hash and
+compare small ints instead of names, and names are looked up again only when writing output.
+"""
+
+import copy
+
+from typing import Iterable, Iterator
+
+from ratings.models import Match
+
+
+class TeamRegistry:
+    """
+    Maps teams to indices 0, 1, 2, ... in the order they are first seen, and back.
+    """
+    names: list[str]
+    team_ids: list[int]
+    club_ids: list[int]
+
+    def __init__(self):
+        self.names = []
+        self.team_ids = []
+        self.club_ids = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name: str, team_id: int = 0, club_id: int = 0) -> int:
+        """
+        Returns the index of a team, adding it if it has not been seen.
+
+        :param name: The display name of the team; it identifies teams without an ID.
+        :param team_id: The TGS team ID, or 0 if it is not known.
+        :param club_id: The TGS club ID.
+        :return: The index of the team.
+        """
+        key = ('id', team_id) if team_id else ('name', name)
+        index = self._index.get(key)
+
+        if index is None:
+            index = len(self.names)
+            self._index[key] = index
+            self.names.append(name)
+            self.team_ids.append(team_id)
+            self.club_ids.append(club_id)
+
+        return index
+
+    def intern_match(self, match: Match) -> Match:
+        """
+        Returns a copy of a match whose home_team and away_team are team indices.
+        """
+        interned = copy.copy(match)
+        interned.home_team = self.intern(match.home_team, match.home_team_id, match.home_team_club_id)
+        interned.away_team = self.intern(match.away_team, match.away_team_id, match.away_team_club_id)
+        return interned
+
+    def intern_matches(self, matches: Iterable[Match]) -> list[Match]:
+        """
+        Returns interned copies of a list of matches.
+        """
+        return [self.intern_match(match) for match in matches]
+
+    def iter_interned(self, matches: Iterable[Match]) -> Iterator[Match]:
+        """
+        Interns a stream of matches lazily.
+        """
+        for match in matches:
+            yield self.intern_match(match)
+
+    def name(self, index: int) -> str:
+        """
+        Returns the display name of a team.
+        """
+        return self.names[index]
+
+    def stable_key(self, index: int) -> str:
+        """
+        Returns a string that identifies a team across runs, unlike its index.
+        """
+        team_id = self.team_ids[index]
+        return f'id:{team_id}' if team_id else f'name:{self.names[index]}'
+
+    def key(self, index: int) -> tuple[str, int, int]:
+        """
+        Returns the (name, team ID, club ID) of a team.
+        """
+        return self.names[index], self.team_ids[index], self.club_ids[index]
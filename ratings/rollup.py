@@ -0,0 +1,140 @@
+"""
+This module contains group-by rollups of team results.
+
+A rollup level is a tuple of dimensions such as ('club',), ('event', 'flight') or
+('event', 'flight', 'team'). Every side of every match is assigned to one group per requested
+level, so all levels are aggregated in a single scan over the matches. A group's totals are the sum
+of its teams' records, so a match between two teams of the same group counts for both sides.
+"""
+
+from typing import Callable, Iterable, Optional
+
+from ratings.models import Match
+from ratings.stats import TeamRecord
+
+DIMENSIONS = ('team', 'club', 'event', 'flight', 'division', 'state')
+
+ROLLUP_COLUMNS = ['teams', 'wins', 'losses', 'ties', 'matches_played', 'goals_for', 'goals_against', 'goal_differential', 'points', 'wp', 'record']
+
+
+class GroupRecord(TeamRecord):
+    """
+    Holds the summed counters of a group and the teams that contributed to them.
+    """
+    teams: set[str]
+
+    def __init__(self):
+        super().__init__()
+        self.teams = set()
+
+    def row(self, number_of_digits: int = 2) -> dict:
+        """
+        Returns the group's totals keyed by the names in ROLLUP_COLUMNS.
+        """
+        wp = round(self.wins / self.matches_played, number_of_digits) if self.matches_played else 0.0
+        return {
+            'teams': len(self.teams),
+            'wins': self.wins,
+            'losses': self.losses,
+            'ties': self.ties,
+            'matches_played': self.matches_played,
+            'goals_for': self.goals_for,
+            'goals_against': self.goals_against,
+            'goal_differential': self.goals_for - self.goals_against,
+            'points': self.wins * 3 + self.ties,
+            'wp': wp,
+            'record': f"{self.wins}-{self.losses}-{self.ties}",
+        }
+
+
+class Rollup:
+    """
+    Aggregates match results for several group levels at once.
+    """
+    levels: list[tuple[str, ...]]
+    groups: dict[tuple[str, ...], dict[tuple, GroupRecord]]
+
+    def __init__(self, levels: Iterable[Iterable[str]], club_states: Optional[dict[int, str]] = None):
+        """
+        :param levels: The group levels, each a sequence of names from DIMENSIONS.
+        :param club_states: Maps club IDs to state codes; required for the 'state' dimension.
+        """
+        self.levels = [tuple(level) for level in levels]
+        self.club_states = club_states or {}
+        self.groups = {level: {} for level in self.levels}
+
+        for level in self.levels:
+            for dimension in level:
+                if dimension not in DIMENSIONS:
+                    raise ValueError(f"Unknown rollup dimension '{dimension}'")
+
+    def _sides(self, match: Match) -> Iterable[tuple[str, int, int, int]]:
+        yield match.home_team, match.home_team_club_id, match.home_score, match.away_score
+        yield match.away_team, match.away_team_club_id, match.away_score, match.home_score
+
+    def add_match(self, match: Match):
+        """
+        Adds both sides of a match to their group at every level.
+
+        :param match: The match to add.
+        """
+        for team, club_id, scored, conceded in self._sides(match):
+            values = {
+                'team': team,
+                'club': club_id,
+                'event': match.meta_value('eventName'),
+                'flight': match.meta_value('flight'),
+                'division': match.meta_value('division'),
+                'state': self.club_states.get(club_id),
+            }
+
+            for level, groups in self.groups.items():
+                key = tuple(values[dimension] for dimension in level)
+                group = groups.get(key)
+                if group is None:
+                    group = GroupRecord()
+                    groups[key] = group
+
+                group.add_result(scored, conceded)
+                group.teams.add(team)
+
+    def consume(self, matches: Iterable[Match]) -> 'Rollup':
+        """
+        Adds a stream of matches and returns the rollup.
+        """
+        for match in matches:
+            self.add_match(match)
+        return self
+
+    def table(self, level: Iterable[str], number_of_digits: int = 2,
+              sort_key: Optional[Callable[[tuple, dict], tuple]] = None) -> list[tuple[tuple, dict]]:
+        """
+        Returns the groups of one level as (key, row) pairs.
+
+        :param level: The level, as given to the constructor.
+        :param number_of_digits: The number of digits to round the winning percentage to.
+        :param sort_key: Orders the groups, by default by key with points descending inside the
+            parent group.
+        :return: A list of (key, row) pairs.
+        """
+        rows = [(key, group.row(number_of_digits)) for key, group in self.groups[tuple(level)].items()]
+
+        if sort_key is None:
+            def sort_key(key: tuple, row: dict) -> tuple:
+                parent = tuple('' if value is None else str(value) for value in key[:-1])
+                return parent + (-row['points'], -row['goal_differential'], str(key[-1]))
+
+        return sorted(rows, key=lambda item: sort_key(*item))
+
+
+def rollup(matches: list[Match], levels: Iterable[Iterable[str]],
+           club_states: Optional[dict[int, str]] = None) -> Rollup:
+    """
+    Returns a Rollup of a list of matches for the given levels.
+
+    :param matches: A list of Match objects.
+    :param levels: The group levels, each a sequence of names from DIMENSIONS.
+    :param club_states: Maps club IDs to state codes; required for the 'state' dimension.
+    :return: The filled Rollup.
+    """
+    return Rollup(levels, club_states).consume(matches)
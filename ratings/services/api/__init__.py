@@ -0,0 +1,6 @@
+from ratings.services.api.exceptions import TGSAPIError
+from ratings.services.api.tgs_client import (
+    TGSClient,
+    default_client,
+    set_default_client,
+)
@@ -0,0 +1,161 @@
+"""
+This module contains a client for the Total Global Sports (TGS) API.
+
+The client owns one requests.Session, so requests to the API reuse pooled keep-alive connections
+instead of opening a new TCP and TLS connection each time. Every request has a timeout, and every
+failure, whether a connection error, a timeout, an unexpected status or a body that is not JSON, is
+raised as a TGSAPIError.
+"""
+
+from typing import Optional, Union
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ratings.constants import TGS_PREFIX
+from ratings.log import logger
+from ratings.services.api.exceptions import TGSAPIError
+
+
+class TGSClient:
+    """
+    Typed access to the TGS endpoints the ratings package uses.
+
+    The methods return the records of each response as dicts, in the shape the API sends them.
+    A client can be shared between threads; size pool_maxsize to the number of concurrent requests.
+    """
+    base_url: str
+    timeout: Union[float, tuple[float, float]]
+    session: requests.Session
+
+    def __init__(self, base_url: str = TGS_PREFIX, timeout: Union[float, tuple[float, float]] = (5.0, 30.0),
+                 pool_connections: int = 1, pool_maxsize: int = 10, session: Optional[requests.Session] = None):
+        """
+        :param base_url: The root URL of the API.
+        :param timeout: The connect and read timeouts of every request, in seconds.
+        :param pool_connections: The number of hosts to keep connection pools for.
+        :param pool_maxsize: The number of connections kept alive per host.
+        :param session: A session to use as is instead of creating one.
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        self.session = session
+
+    def __enter__(self) -> 'TGSClient':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the pooled connections.
+        """
+        self.session.close()
+
+    def get_json(self, resource: str) -> dict:
+        """
+        Requests a resource and returns its decoded JSON body.
+
+        :param resource: The path of the resource, such as '/api/Association/get-all-states'.
+        :return: The decoded body.
+        :raises TGSAPIError: If the request fails, the status is not 200 or the body is not JSON.
+        """
+        url = urljoin(self.base_url, resource)
+        logger.debug(f"Requesting URL: '{url}'")
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error occurred: {http_err}")
+            raise TGSAPIError(http_err.response.status_code if http_err.response is not None else None,
+                              f"HTTP error occurred: {http_err}")
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error(f"Connection error occurred: {conn_err}")
+            raise TGSAPIError(None, f"Connection error occurred: {conn_err}")
+        except requests.exceptions.Timeout as timeout_err:
+            logger.error(f"Timeout error occurred: {timeout_err}")
+            raise TGSAPIError(None, f"Timeout error occurred: {timeout_err}")
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"An error occurred: {req_err}")
+            raise TGSAPIError(None, f"An error occurred: {req_err}")
+
+        if response.status_code != 200:
+            logger.error(f"Unexpected status code: {response.status_code}")
+            raise TGSAPIError(response.status_code)
+
+        try:
+            return response.json()
+        except ValueError as err:
+            raise TGSAPIError(response.status_code, message=str(err))
+
+    def _data(self, resource: str):
+        return self.get_json(resource).get('data')
+
+    def states(self) -> list[dict]:
+        """
+        Returns the state records.
+        """
+        return self._data('/api/Association/get-all-states') or []
+
+    def countries(self) -> list[dict]:
+        """
+        Returns the country records.
+        """
+        return self._data('/api/Association/get-all-countries') or []
+
+    def organizations(self) -> list[dict]:
+        """
+        Returns the records of the current organizations.
+        """
+        return self._data('/api/Association/get-current-orgs-list') or []
+
+    def clubs(self, organization_id: int) -> list[dict]:
+        """
+        Returns the club records of an organization.
+        """
+        return self._data(f'/api/Event/get-org-club-list-by-orgID-improved/{organization_id}') or []
+
+    def event(self, event_id: int) -> Optional[dict]:
+        """
+        Returns the record of an event, or None if the API has none.
+        """
+        return self._data(f'/api/Event/get-org-event-by-eventID/{event_id}')
+
+    def schedule(self, club_id: int, event_id: int) -> list[dict]:
+        """
+        Returns the records of a club's past matches in an event.
+        """
+        data = self._data(f'/api/Club/get-score-reporting-schedule-list/{club_id}/{event_id}') or {}
+        return data.get('eventPastScheduleList') or []
+
+
+_default_client: Optional[TGSClient] = None
+
+
+def default_client() -> TGSClient:
+    """
+    Returns the client shared by the TGS loaders, creating it on first use so every request of a
+    run draws on one connection pool.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = TGSClient()
+    return _default_client
+
+
+def set_default_client(client: Optional[TGSClient]):
+    """
+    Replaces the shared client; None makes the next default_client() call create a new one.
+    """
+    global _default_client
+    _default_client = client
@@ -0,0 +1,169 @@
+"""
+This module contains a Monte Carlo season simulator that projects end-of-season RPI and ranks.
+
+Played matches are kept as they are. Each future fixture gets home win, tie and away win
+probabilities from Elo or Poisson strengths fitted to the played matches. Outcomes are sampled for
+a whole batch of simulated seasons at once, and RPI is computed for every team in every season of
+the batch with matrix.batch_rpi. Batches run in a process pool with seeds derived from a
+single base seed, so results do not depend on the number of workers.
+
+Projected RPI is not rounded, so close teams are ranked by their exact values. NumPy and SciPy are
+required; check matrix.HAS_NUMPY before using this module.
+"""
+
+import math
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from ratings import matrix
+from ratings.elo import EloRater
+from ratings.models import Match
+from ratings.poisson import PoissonModel
+
+np = matrix.np
+
+MAX_GOALS = 10
+
+
+class SeasonSimulator:
+    """
+    Samples the outcomes of future fixtures and reports each team's projected RPI and rank.
+    """
+    teams: list[str]
+    played: list[Match]
+    future: list[Match]
+
+    def __init__(self, matches: list[Match], model: str = 'elo', as_of: Optional[datetime] = None):
+        """
+        :param matches: Played and future matches.
+        :param model: 'elo' or 'poisson', the strengths used to sample future fixtures.
+        :param as_of: Matches after this moment are future fixtures, now by default.
+        """
+        if not matrix.HAS_NUMPY:
+            raise ImportError('SeasonSimulator requires numpy and scipy')
+
+        as_of = as_of or datetime.now()
+        self.played = [match for match in matches if match.date <= as_of]
+        self.future = [match for match in matches if match.date > as_of]
+        self.teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+
+        index = {team: i for i, team in enumerate(self.teams)}
+        ordered = self.played + self.future
+
+        home = np.fromiter((index[match.home_team] for match in ordered), dtype=np.int64, count=len(ordered))
+        away = np.fromiter((index[match.away_team] for match in ordered), dtype=np.int64, count=len(ordered))
+        played_home_won = np.fromiter((match.home_score > match.away_score for match in self.played), dtype=bool, count=len(self.played))
+        played_tied = np.fromiter((match.home_score == match.away_score for match in self.played), dtype=bool, count=len(self.played))
+
+        home_win, tie = self._probabilities(model)
+
+        self.setup = {
+            'size': len(self.teams),
+            'home': home,
+            'away': away,
+            'played_home_won': played_home_won,
+            'played_tied': played_tied,
+            'home_win_probability': home_win,
+            'tie_probability': tie,
+        }
+
+    def _probabilities(self, model: str):
+        """
+        Returns the home win and tie probabilities of every future fixture.
+        """
+        if model == 'elo':
+            rater = EloRater()
+            rater.consume(iter(sorted(self.played, key=lambda m: m.date)))
+
+            ties = sum(1 for match in self.played if match.home_score == match.away_score)
+            tie = ties / len(self.played) if self.played else 0.25
+
+            home_win, tie_probability = [], []
+            for match in self.future:
+                expected = 1.0 / (1.0 + 10.0 ** ((rater.rating(match.away_team) - rater.rating(match.home_team) - rater.home_advantage) / 400.0))
+                home_win.append(min(max(expected - tie / 2.0, 0.0), 1.0 - tie))
+                tie_probability.append(tie)
+            return np.asarray(home_win, dtype=np.float64), np.asarray(tie_probability, dtype=np.float64)
+
+        if model == 'poisson':
+            fitted = PoissonModel().fit(self.played)
+            goals = np.arange(MAX_GOALS + 1)
+            log_factorials = np.asarray([math.lgamma(g + 1) for g in goals])
+
+            home_win, tie_probability = [], []
+            for match in self.future:
+                home_rate, away_rate = fitted.expected_goals(match.home_team, match.away_team)
+                home_goals = np.exp(goals * np.log(home_rate) - home_rate - log_factorials)
+                away_goals = np.exp(goals * np.log(away_rate) - away_rate - log_factorials)
+                grid = np.outer(home_goals, away_goals)
+                total = grid.sum()
+                home_win.append(np.tril(grid, -1).sum() / total)
+                tie_probability.append(np.trace(grid) / total)
+            return np.asarray(home_win, dtype=np.float64), np.asarray(tie_probability, dtype=np.float64)
+
+        raise ValueError(f"Unknown model '{model}'")
+
+    def run(self, simulations: int = 10000, chunk_size: int = 500, workers: Optional[int] = None,
+            seed: int = 0) -> dict[str, dict]:
+        """
+        Runs the simulations and summarizes each team's projected RPI and rank.
+
+        :param simulations: The number of simulated seasons.
+        :param chunk_size: The number of seasons simulated together in one batch.
+        :param workers: The number of worker processes, one per CPU by default; 1 runs in-process.
+        :param seed: The base seed.
+        :return: A dict mapping each team to 'rpi_mean', 'rpi_p05', 'rpi_p50', 'rpi_p95',
+            'rank_mean', 'rank_best', 'rank_worst' and 'first'.
+        """
+        counts = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(counts))
+        arguments = [(self.setup, count, chunk_seed) for count, chunk_seed in zip(counts, seeds)]
+
+        if workers == 1:
+            results = [_simulate_chunk(*argument) for argument in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_simulate_chunk, *zip(*arguments)))
+
+        rpi = np.concatenate([chunk_rpi for chunk_rpi, _ in results], axis=1)
+        ranks = np.concatenate([chunk_ranks for _, chunk_ranks in results], axis=1)
+
+        rpi_p05, rpi_p50, rpi_p95 = np.percentile(rpi, [5, 50, 95], axis=1)
+        summary = {}
+        for i, team in enumerate(self.teams):
+            summary[team] = {
+                'rpi_mean': float(rpi[i].mean()),
+                'rpi_p05': float(rpi_p05[i]),
+                'rpi_p50': float(rpi_p50[i]),
+                'rpi_p95': float(rpi_p95[i]),
+                'rank_mean': float(ranks[i].mean()),
+                'rank_best': int(ranks[i].min()),
+                'rank_worst': int(ranks[i].max()),
+                'first': float((ranks[i] == 1).mean()),
+            }
+        return summary
+
+
+def _simulate_chunk(setup: dict, count: int, seed):
+    """
+    Simulates a batch of seasons and returns their RPI values and ranks as teams-by-seasons arrays.
+    """
+    generator = np.random.default_rng(seed)
+    future_count = len(setup['home_win_probability'])
+
+    draws = generator.random((count, future_count))
+    future_home_won = draws < setup['home_win_probability']
+    future_tied = ~future_home_won & (draws < setup['home_win_probability'] + setup['tie_probability'])
+
+    home_won = np.hstack((np.broadcast_to(setup['played_home_won'], (count, len(setup['played_home_won']))), future_home_won))
+    tied = np.hstack((np.broadcast_to(setup['played_tied'], (count, len(setup['played_tied']))), future_tied))
+
+    rpi = matrix.batch_rpi(setup['size'], setup['home'], setup['away'], home_won, tied)
+
+    order = np.argsort(-rpi, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, setup['size'] + 1)[:, None], axis=0)
+
+    return rpi, ranks
@@ -2,8 +2,346 @@
 This module contains functions that calculate various statistics for a team given a list of matches.
 """
 
+from typing import Optional
+
+from ratings import matrix
+from ratings.matchtable import MatchTable
 from ratings.models import Match
 
+
+class TeamRecord:
+    """
+    Holds the season counters for a single team.
+    """
+    wins: int
+    losses: int
+    ties: int
+    matches_played: int
+    goals_for: int
+    goals_against: int
+
+    def __init__(self):
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+        self.matches_played = 0
+        self.goals_for = 0
+        self.goals_against = 0
+
+    def __str__(self):
+        return f"TeamRecord(wins={self.wins}, losses={self.losses}, ties={self.ties}, goals_for={self.goals_for}, goals_against={self.goals_against})"
+
+    def __repr__(self):
+        return str(self)
+
+    def add_result(self, scored: int, conceded: int):
+        """
+        Adds the result of a single match to the counters.
+
+        :param scored: The number of goals scored by the team.
+        :param conceded: The number of goals conceded by the team.
+        """
+        if scored > conceded:
+            self.wins += 1
+        elif scored < conceded:
+            self.losses += 1
+        else:
+            self.ties += 1
+
+        self.matches_played += 1
+        self.goals_for += scored
+        self.goals_against += conceded
+
+    def remove_result(self, scored: int, conceded: int):
+        """
+        Removes the result of a single match from the counters.
+
+        :param scored: The number of goals scored by the team.
+        :param conceded: The number of goals conceded by the team.
+        """
+        if scored > conceded:
+            self.wins -= 1
+        elif scored < conceded:
+            self.losses -= 1
+        else:
+            self.ties -= 1
+
+        self.matches_played -= 1
+        self.goals_for -= scored
+        self.goals_against -= conceded
+
+
+class SeasonLedger:
+    """
+    Walks a list of matches once and keeps a TeamRecord for every team that appears in it.
+
+    The per-team statistics functions in this module are lookups on a ledger, so callers that need
+    several statistics for many teams should build a single ledger and query it instead.
+    """
+    records: dict[str, TeamRecord]
+
+    def __init__(self, matches: Optional[list[Match] | MatchTable] = None):
+        self.records = {}
+
+        if isinstance(matches, MatchTable):
+            for home_team, away_team, home_score, away_score in matches.results():
+                self.add_result(home_team, away_team, home_score, away_score)
+            return
+
+        for match in matches or []:
+            self.add_match(match)
+
+    def add_match(self, match: Match):
+        """
+        Adds a match to the ledger.
+
+        :param match: The match to add.
+        """
+        self.add_result(match.home_team, match.away_team, match.home_score, match.away_score)
+
+    def add_result(self, home_team: str, away_team: str, home_score: int, away_score: int):
+        """
+        Adds the result of a match given by its teams and scores.
+        """
+        self._record(home_team).add_result(home_score, away_score)
+        self._record(away_team).add_result(away_score, home_score)
+
+    def _record(self, team: str) -> TeamRecord:
+        team_record = self.records.get(team)
+
+        if team_record is None:
+            team_record = TeamRecord()
+            self.records[team] = team_record
+
+        return team_record
+
+    def get(self, team: str) -> TeamRecord:
+        """
+        Returns the record for a team, or an empty record if the team has not played.
+
+        :param team: The team to look up.
+        :return: The team's record.
+        """
+        return self.records.get(team) or TeamRecord()
+
+    def teams(self) -> list[str]:
+        """
+        Returns the teams in the ledger sorted by name.
+        """
+        return sorted(self.records)
+
+    def wins(self, team: str) -> int:
+        """
+        Returns the number of wins for a team.
+        """
+        return self.get(team).wins
+
+    def losses(self, team: str) -> int:
+        """
+        Returns the number of losses for a team.
+        """
+        return self.get(team).losses
+
+    def ties(self, team: str) -> int:
+        """
+        Returns the number of ties for a team.
+        """
+        return self.get(team).ties
+
+    def matches_played(self, team: str) -> int:
+        """
+        Returns the number of matches played by a team.
+        """
+        return self.get(team).matches_played
+
+    def goals_for(self, team: str) -> int:
+        """
+        Returns the number of goals scored by a team.
+        """
+        return self.get(team).goals_for
+
+    def goals_against(self, team: str) -> int:
+        """
+        Returns the number of goals conceded by a team.
+        """
+        return self.get(team).goals_against
+
+    def record(self, team: str) -> str:
+        """
+        Returns the W-L-T record of a team.
+        """
+        team_record = self.get(team)
+        return f"{team_record.wins}-{team_record.losses}-{team_record.ties}"
+
+    def goal_differential(self, team: str) -> int:
+        """
+        Returns the goal differential for a team.
+        """
+        team_record = self.get(team)
+        return team_record.goals_for - team_record.goals_against
+
+    def points(self, team: str) -> int:
+        """
+        Returns the number of points for a team.
+        """
+        team_record = self.get(team)
+        return team_record.wins * 3 + team_record.ties
+
+    def wp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the winning percentage (wins over matches played) for a team.
+        """
+        team_record = self.get(team)
+
+        if team_record.matches_played == 0:
+            return 0.0
+
+        return round(team_record.wins / team_record.matches_played, number_of_digits)
+
+    def goals_per_match(self, team: str) -> float:
+        """
+        Returns the average number of goals scored per match by a team.
+        """
+        team_record = self.get(team)
+
+        if team_record.matches_played == 0:
+            return 0.0
+
+        return round(team_record.goals_for / team_record.matches_played, 2)
+
+
+class RPIEngine:
+    """
+    Computes WP, OWP, OOWP and RPI for every team from an opponent index built in one pass.
+
+    Each team maps to its matches as (opponent, home_won, tied) entries, in the order the matches
+    were given. OWP values are memoized per team so OOWP only looks them up, which keeps a
+    whole-season table linear in the number of matches.
+    """
+    ledger: SeasonLedger
+    schedule: dict[str, list[tuple[str, bool, bool]]]
+
+    def __init__(self, matches: Optional[list[Match] | MatchTable] = None):
+        self.ledger = SeasonLedger()
+        self.schedule = {}
+        self._owp_cache = {}
+
+        if isinstance(matches, MatchTable):
+            for home_team, away_team, home_score, away_score in matches.results():
+                self.add_result(home_team, away_team, home_score, away_score)
+            return
+
+        for match in matches or []:
+            self.add_match(match)
+
+    def add_match(self, match: Match):
+        """
+        Adds a match to the ledger and the opponent index.
+
+        :param match: The match to add.
+        """
+        self.add_result(match.home_team, match.away_team, match.home_score, match.away_score)
+
+    def add_result(self, home_team: str, away_team: str, home_score: int, away_score: int):
+        """
+        Adds the result of a match given by its teams and scores.
+        """
+        self.ledger.add_result(home_team, away_team, home_score, away_score)
+        self._owp_cache.clear()
+
+        home_won = home_score > away_score
+        tied = home_score == away_score
+
+        self.schedule.setdefault(home_team, []).append((away_team, home_won, tied))
+        if away_team != home_team:
+            self.schedule.setdefault(away_team, []).append((home_team, home_won, tied))
+
+    def teams(self) -> list[str]:
+        """
+        Returns the teams in the index sorted by name.
+        """
+        return sorted(self.schedule)
+
+    def opponents(self, team: str) -> list[str]:
+        """
+        Returns the opponent of a team in each of its matches, in match order.
+        """
+        return [opponent for opponent, _, _ in self.schedule.get(team, [])]
+
+    def wp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the winning percentage for a team.
+        """
+        return self.ledger.wp(team, number_of_digits)
+
+    def owp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the opponents' winning percentage for a team.
+
+        Each match contributes its opponent's winning percentage with that match removed. As in
+        owp(), removing the match takes a win away from the opponent whenever the home team won.
+        """
+        key = (team, number_of_digits)
+        value = self._owp_cache.get(key)
+        if value is not None:
+            return value
+
+        opponents_wp = []
+        for opponent, home_won, tied in self.schedule.get(team, []):
+            opponent_record = self.ledger.get(opponent)
+            opponent_matches_played = opponent_record.matches_played - 1
+
+            if opponent_matches_played > 0:
+                opponent_wins = opponent_record.wins - home_won
+                opponent_ties = opponent_record.ties - tied
+                opponents_wp.append((opponent_wins + 0.5 * opponent_ties) / opponent_matches_played)
+
+        value = 0.0
+        if opponents_wp:
+            value = round(sum(opponents_wp) / len(opponents_wp), number_of_digits)
+
+        self._owp_cache[key] = value
+        return value
+
+    def oowp(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the opponents' opponents' winning percentage for a team.
+        """
+        opponents_owp = [self.owp(opponent) for opponent in self.opponents(team)]
+
+        if not opponents_owp:
+            return 0.0
+
+        return round(sum(opponents_owp) / len(opponents_owp), number_of_digits)
+
+    def rpi(self, team: str, number_of_digits: int = 2) -> float:
+        """
+        Returns the Rating Percentage Index (RPI) for a team.
+        """
+        team_wp = self.wp(team, number_of_digits)
+        team_owp = self.owp(team, number_of_digits)
+        team_oowp = self.oowp(team, number_of_digits)
+
+        return round(0.25 * team_wp + 0.50 * team_owp + 0.25 * team_oowp, number_of_digits)
+
+    def table(self, number_of_digits: int = 2) -> dict[str, dict]:
+        """
+        Returns the WP, OWP, OOWP and RPI of every team.
+
+        :param number_of_digits: The number of digits to round to.
+        :return: A dict mapping each team to its 'wp', 'owp', 'oowp' and 'rpi' values.
+        """
+        result = {}
+        for team in self.teams():
+            result[team] = {
+                'wp': self.wp(team, number_of_digits),
+                'owp': self.owp(team, number_of_digits),
+                'oowp': self.oowp(team, number_of_digits),
+                'rpi': self.rpi(team, number_of_digits),
+            }
+        return result
+
+
 def wins(matches: list[Match], team: str) -> int:
     """
     Returns the number of wins for a given team in a list of matches.
@@ -15,13 +353,8 @@ def wins(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of wins for the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team and match.home_score > match.away_score:
-            count += 1
-        elif match.away_team == team and match.away_score > match.home_score:
-            count += 1
-    return count
+    return SeasonLedger(matches).wins(team)
+
 
 def losses(matches: list[Match], team: str) -> int:
     """
@@ -34,13 +367,8 @@ def losses(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of losses for the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team and match.home_score < match.away_score:
-            count += 1
-        elif match.away_team == team and match.away_score < match.home_score:
-            count += 1
-    return count
+    return SeasonLedger(matches).losses(team)
+
 
 def ties(matches: list[Match], team: str) -> int:
     """
@@ -53,13 +381,8 @@ def ties(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of ties for the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team and match.home_score == match.away_score:
-            count += 1
-        elif match.away_team == team and match.away_score == match.home_score:
-            count += 1
-    return count
+    return SeasonLedger(matches).ties(team)
+
 
 def matches_played(matches: list[Match], team: str) -> int:
     """
@@ -72,11 +395,8 @@ def matches_played(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of matches played by the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team or match.away_team == team:
-            count += 1
-    return count
+    return SeasonLedger(matches).matches_played(team)
+
 
 def goals_for(matches: list[Match], team: str) -> int:
     """
@@ -89,13 +409,8 @@ def goals_for(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of goals scored by the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team:
-            count += match.home_score
-        elif match.away_team == team:
-            count += match.away_score
-    return count
+    return SeasonLedger(matches).goals_for(team)
+
 
 def goals_against(matches: list[Match], team: str) -> int:
     """
@@ -108,13 +423,8 @@ def goals_against(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of goals conceded by the given team.
     """
-    count = 0
-    for match in matches:
-        if match.home_team == team:
-            count += match.away_score
-        elif match.away_team == team:
-            count += match.home_score
-    return count
+    return SeasonLedger(matches).goals_against(team)
+
 
 def record(matches: list[Match], team: str) -> str:
     """
@@ -127,7 +437,8 @@ def record(matches: list[Match], team: str) -> str:
     Returns:
         str: The record of the given
     """
-    return f"{wins(matches, team)}-{losses(matches, team)}-{ties(matches, team)}"
+    return SeasonLedger(matches).record(team)
+
 
 def goal_differential(matches: list[Match], team: str) -> int:
     """
@@ -140,7 +451,8 @@ def goal_differential(matches: list[Match], team: str) -> int:
     Returns:
         int: The goal differential for the given team.
     """
-    return goals_for(matches, team) - goals_against(matches, team)
+    return SeasonLedger(matches).goal_differential(team)
+
 
 def points(matches: list[Match], team: str) -> int:
     """
@@ -153,8 +465,7 @@ def points(matches: list[Match], team: str) -> int:
     Returns:
         int: The number of points for the given team.
     """
-    return wins(matches, team) * 3 + ties(matches, team)
-
+    return SeasonLedger(matches).points(team)
 
 def wp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     """
@@ -168,10 +479,7 @@ def wp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     Returns:
         float: The winning percentage for the given team.
     """
-    if matches_played(matches, team) == 0:
-        return 0.0
-    
-    return round(wins(matches, team) / matches_played(matches, team), number_of_digits)
+    return SeasonLedger(matches).wp(team, number_of_digits)
 
 def owp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     """
@@ -182,55 +490,7 @@ def owp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     :param number_of_digits: 
     :return: 
     """
-    opponents_wp = []
-
-    for match in matches:
-        if match.home_team == team:
-            opponent = match.away_team
-            opponent_matches = [m for m in matches if m.home_team == opponent or m.away_team == opponent]
-            opponent_wins = wins(opponent_matches, opponent)
-            opponent_losses = losses(opponent_matches, opponent)
-            opponent_ties = ties(opponent_matches, opponent)
-            opponent_matches_played = matches_played(opponent_matches, opponent)
-
-            # Exclude the match against the given team
-            if match.away_team == opponent:
-                if match.home_score > match.away_score:
-                    opponent_wins -= 1
-                elif match.home_score < match.away_score:
-                    opponent_losses -= 1
-                else:
-                    opponent_ties -= 1
-                opponent_matches_played -= 1
-
-            if opponent_matches_played > 0:
-                opponents_wp.append((opponent_wins + 0.5 * opponent_ties) / opponent_matches_played)
-
-        elif match.away_team == team:
-            opponent = match.home_team
-            opponent_matches = [m for m in matches if m.home_team == opponent or m.away_team == opponent]
-            opponent_wins = wins(opponent_matches, opponent)
-            opponent_losses = losses(opponent_matches, opponent)
-            opponent_ties = ties(opponent_matches, opponent)
-            opponent_matches_played = matches_played(opponent_matches, opponent)
-
-            # Exclude the match against the given team
-            if match.home_team == opponent:
-                if match.home_score > match.away_score:
-                    opponent_wins -= 1
-                elif match.home_score < match.away_score:
-                    opponent_losses -= 1
-                else:
-                    opponent_ties -= 1
-                opponent_matches_played -= 1
-
-            if opponent_matches_played > 0:
-                opponents_wp.append((opponent_wins + 0.5 * opponent_ties) / opponent_matches_played)
-
-    if not opponents_wp:
-        return 0.0
-
-    return round(sum(opponents_wp) / len(opponents_wp), number_of_digits)
+    return RPIEngine(matches).owp(team, number_of_digits)
 
 def oowp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     """
@@ -241,22 +501,7 @@ def oowp(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     :param number_of_digits: 
     :return: 
     """
-    opponents_owp = []
-
-    for match in matches:
-        if match.home_team == team:
-            opponent = match.away_team
-        elif match.away_team == team:
-            opponent = match.home_team
-        else:
-            continue
-
-        opponents_owp.append(owp(matches, opponent))
-
-    if not opponents_owp:
-        return 0.0
-
-    return round(sum(opponents_owp) / len(opponents_owp), number_of_digits)
+    return RPIEngine(matches).oowp(team, number_of_digits)
 
 def rpi(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     """
@@ -267,11 +512,7 @@ def rpi(matches: list[Match], team: str, number_of_digits: int = 2) -> float:
     :param number_of_digits: 
     :return: 
     """
-    team_wp = wp(matches, team, number_of_digits)
-    team_owp = owp(matches, team, number_of_digits)
-    team_oowp = oowp(matches, team, number_of_digits)
-
-    return round(0.25 * team_wp + 0.50 * team_owp + 0.25 * team_oowp, number_of_digits)
+    return RPIEngine(matches).rpi(team, number_of_digits)
 
 def goals_per_match(matches: list[Match], team: str) -> float:
     """
@@ -284,7 +525,37 @@ def goals_per_match(matches: list[Match], team: str) -> float:
     Returns:
         float: The average number of goals scored per match by the given team.
     """
-    if matches_played(matches, team) == 0:
-        return 0.0
+    return SeasonLedger(matches).goals_per_match(team)
+
+def resolve_backend(backend: str) -> str:
+    """
+    Returns the backend team_stats_table() uses for a backend option: 'python' or 'numpy'.
+    """
+    if backend not in ('auto', 'python', 'numpy'):
+        raise ValueError(f"Unknown backend '{backend}'")
+
+    if backend == 'numpy' or (backend == 'auto' and matrix.HAS_NUMPY):
+        return 'numpy'
+    return 'python'
+
+
+def team_stats_table(matches: list[Match] | MatchTable, number_of_digits: int = 2, backend: str = 'auto') -> dict[str, dict]:
+    """
+    Returns the statistics of every team in a list of matches, keyed by team name.
+
+    Parameters:
+        matches (list[Match] | MatchTable): A list of Match objects, or a MatchTable keyed by team ID.
+        number_of_digits (int): The number of digits to round the percentages to.
+        backend (str): 'python', 'numpy', or 'auto' to use NumPy when it is installed.
+
+    Returns:
+        dict: A dict mapping each team to its wins, losses, ties, matches_played, goals_for,
+        goals_against, goal_differential, goals_per_match, points, wp, owp, oowp, rpi and record.
+    """
+    if resolve_backend(backend) == 'numpy':
+        return matrix.ScheduleMatrix(matches).table(number_of_digits)
+
+    # The metric registry is built on RPIEngine, so it is imported here rather than at the top.
+    from ratings.metrics import STATS_METRICS, standard_registry
 
-    return round(goals_for(matches, team) / matches_played(matches, team), 2)
+    return standard_registry().evaluate(matches, STATS_METRICS, number_of_digits)
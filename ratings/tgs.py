@@ -6,18 +6,33 @@ see https://github.com/jedi-knights/ecnl/blob/main/pkg/services/tgs.go
 import os
 import csv
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from urllib.parse import urljoin
-from typing import Optional
+from typing import Callable, Iterable, Optional, TypeVar
 from enum import StrEnum
-from ratings.dict_utils import read_str_value, read_int_value, read_datetime_value
+from ratings.dict_utils import compile_decoder
 from ratings.log import logger
+from ratings.services.api import default_client
 
-import requests
+from ratings.models import State, Country, Organization, Club, Event, Match, identity_map
+from ratings.planner import SchedulePlanner
 
-from ratings.models import State, Country, Organization, Club, Event, Match
 
-PREFIX = 'https://public.totalglobalsports.com'
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def _fan_out(function: Callable[[T], R], items: Iterable[T], concurrency: int = 1) -> list[R]:
+    """
+    Calls a function on every item with at most concurrency calls in flight, and returns the
+    results in item order however the calls finish.
+    """
+    if concurrency <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(function, items))
+
 
 class OrganizationName(StrEnum):
     BOYS_PRE_ECNL = 'BOYS PRE-ECNL'
@@ -27,6 +42,35 @@ class OrganizationName(StrEnum):
     ECNL_GIRLS_REGIONAL_LEAGUE = 'ECNL Girls Regional League'
     GIRLS_PRE_ECNL = 'GIRLS PRE-ECNL'
 
+# Field specs of the TGS records; each is compiled once into a decoder that returns the values in spec order.
+STATE_FIELDS = [('stateID', int), ('stateName', str)]
+
+ORGANIZATION_FIELDS = [('orgID', int), ('orgSeasonID', int), ('orgName', str), ('orgSeasonGroupID', int)]
+
+CLUB_FIELDS = [
+    ('clubID', int), ('clubName', str), ('clubFullName', str), ('city', str), ('clubLogo', str), ('stateCode', str),
+    ('orgID', int), ('orgSeasonID', int), ('eventID', int),
+]
+
+EVENT_FIELDS = [
+    ('eventID', int), ('eventName', str), ('orgID', int), ('orgName', str), ('orgSeasonID', int), ('orgSeasonName', str),
+]
+
+# The typed Match attributes first, then the compact metadata in COMPACT_META_KEYS order.
+MATCH_FIELDS = [
+    ('matchID', int), ('gameDate', datetime), ('homeTeam', str), ('hometeamID', int), ('homeTeamClubID', int),
+    ('awayTeam', str), ('awayteamID', int), ('awayTeamClubID', int), ('homeTeamScore', int), ('awayTeamScore', int),
+    ('gameTime', str), ('flight', str), ('division', str), ('homeclublogo', str), ('awayclublogo', str),
+    ('complex', str), ('venue', str), ('scheduleID', int), ('eventName', str), ('eventLogo', str),
+    ('startDate', datetime), ('endDate', datetime), ('eventTypeID', int),
+]
+
+_decode_state = compile_decoder(STATE_FIELDS)
+_decode_organization = compile_decoder(ORGANIZATION_FIELDS)
+_decode_club = compile_decoder(CLUB_FIELDS)
+_decode_event = compile_decoder(EVENT_FIELDS)
+_decode_match = compile_decoder(MATCH_FIELDS, intern_strings=True)
+
 def get_states() -> list[State]:
     """
     Returns a list of states retrieved from the TGS API.
@@ -39,20 +83,12 @@ def get_states() -> list[State]:
         with open(file_name, 'r') as file:
             reader = csv.reader(file)
             next(reader)
-            states = [State(int(row[0]), row[1]) for row in reader]
+            states = [identity_map.resolve(State(int(row[0]), row[1])) for row in reader]
         return states
 
-    response = requests.get(urljoin(PREFIX, '/api/Association/get-all-states'))
-    response.raise_for_status()
-
-    json_data = response.json()
-
     selected_states = []
-    for item in json_data.get('data', []):
-        current_id = item.get('stateID')
-        name = item.get('stateName')
-
-        current_state = State(id=current_id, name=name)
+    for item in default_client().states():
+        current_state = identity_map.resolve(State(*_decode_state(item)))
 
         selected_states.append(current_state)
 
@@ -80,13 +116,8 @@ def get_countries() -> list[Country]:
             countries = [Country(int(row[0]), row[1]) for row in reader]
         return countries
 
-    response = requests.get(urljoin(PREFIX, '/api/Association/get-all-countries'))
-    response.raise_for_status()
-
-    json_data = response.json()
-
     selected_countries = []
-    for item in json_data.get('data', []):
+    for item in default_client().countries():
         current_id = item.get('countryID')
         name = item.get('countryName')
 
@@ -115,26 +146,17 @@ def get_organizations(ecnl_only: bool = True) -> list[Organization]:
         with open(file_name, 'r') as file:
             reader = csv.reader(file)
             next(reader)
-            organizations = [Organization(int(row[0]), int(row[1]), row[2], int(row[3])) for row in reader]
+            organizations = [identity_map.resolve(Organization(int(row[0]), int(row[1]), row[2], int(row[3]))) for row in reader]
         return organizations
 
-    response = requests.get(urljoin(PREFIX, '/api/Association/get-current-orgs-list'))
-    response.raise_for_status()
-
-    json_data = response.json()
-
     selected_organizations = []
-    for item in json_data.get('data', []):
-        name = item.get('orgName')
+    for item in default_client().organizations():
+        current_organization = Organization(*_decode_organization(item))
 
-        if ecnl_only and 'ECNL' not in name:
+        if ecnl_only and 'ECNL' not in current_organization.name:
             continue
 
-        current_id = item.get('orgID')
-        season_id = item.get('orgSeasonID')
-        season_group_id = item.get('orgSeasonGroupID')
-
-        current_organization = Organization(id=current_id, season_id=season_id, name=name, season_group_id=season_group_id)
+        current_organization = identity_map.resolve(current_organization)
 
         selected_organizations.append(current_organization)
 
@@ -188,41 +210,25 @@ def get_clubs_by_organization_id(organization_id: int) -> list[Club]:
 
             clubs = []
             for row in reader:
-                club = Club()
-                club.id = int(row['id'])
-                club.name = row['name']
-                club.full_name = row['full_name']
-                club.city = row['city']
-                club.logo = row['logo']
-                club.state_code = row['state_code']
-                club.org_id = int(row['org_id'])
-                club.org_season_id = int(row['org_season_id'])
-                club.event_id = int(row['event_id'])
-
-                clubs.append(club)
+                club = Club(
+                    id=int(row['id']),
+                    name=row['name'],
+                    full_name=row['full_name'],
+                    city=row['city'],
+                    logo=row['logo'],
+                    state_code=row['state_code'],
+                    org_id=int(row['org_id']),
+                    org_season_id=int(row['org_season_id']),
+                    event_id=int(row['event_id']),
+                )
+
+                clubs.append(identity_map.resolve(club))
 
         return clubs
 
-    response = requests.get(urljoin(PREFIX, f'/api/Event/get-org-club-list-by-orgID-improved/{organization_id}'))
-    response.raise_for_status()
-
-    json_data = response.json()
-
     selected_clubs = []
-    for item in json_data.get('data', []):
-        current_club = Club()
-
-        current_club.id = item.get('clubID')
-        current_club.name = item.get('clubName')
-        current_club.full_name = item.get('clubFullName')
-        current_club.city = item.get('city')
-        current_club.logo = item.get('clubLogo')
-        current_club.state_code = item.get('stateCode')
-        current_club.org_id = item.get('orgID')
-        current_club.org_season_id = item.get('orgSeasonID')
-        current_club.event_id = item.get('eventID')
-
-        selected_clubs.append(current_club)
+    for item in default_client().clubs(organization_id):
+        selected_clubs.append(identity_map.resolve(Club(*_decode_club(item))))
 
     with open(file_name, 'w', newline='') as file:
         writer = csv.writer(file)
@@ -278,32 +284,25 @@ def get_event_ids_by_organization(organization: Organization) -> list[int]:
     return get_events_by_organization_id(organization.id)
 
 def get_event_by_id(event_id: int) -> Optional[Event]:
-    response = requests.get(urljoin(PREFIX, f'/api/Event/get-org-event-by-eventID/{event_id}'))
-    response.raise_for_status()
-
-    json_response = response.json()
-    data = json_response.get('data')
+    data = default_client().event(event_id)
 
     if data is None:
         return None
 
-    event = Event()
-    event.id = read_int_value(data, 'eventID')
-    event.name = read_str_value(data, 'eventName')
-    event.org_id = read_int_value(data, 'orgID')
-    event.org_name = read_str_value(data, 'orgName')
-    event.org_season_id = read_int_value(data, 'orgSeasonID')
-    event.org_season_name = read_str_value(data, 'orgSeasonName')
+    return identity_map.resolve(Event(*_decode_event(data)))
 
-    return event
+def get_events_by_organization(organization: Organization, concurrency: int = 1) -> list[Event]:
+    """
+    Returns the events of an organization, in event ID order.
 
-def get_events_by_organization(organization: Organization) -> list[Event]:
+    :param organization: The organization.
+    :param concurrency: The maximum number of event lookups in flight at once.
+    :return: A list of events.
+    """
     event_ids = get_event_ids_by_organization(organization)
 
     events = []
-    for event_id in event_ids:
-        event = get_event_by_id(event_id)
-
+    for event in _fan_out(get_event_by_id, event_ids, concurrency):
         if event is None:
             continue
 
@@ -312,7 +311,7 @@ def get_events_by_organization(organization: Organization) -> list[Event]:
     return events
 
 
-def get_events(ecnl_only: bool = False) -> list[Event]:
+def get_events(ecnl_only: bool = False, concurrency: int = 1) -> list[Event]:
     file_name = 'events.csv'
 
     if os.path.isfile(file_name):
@@ -321,15 +320,16 @@ def get_events(ecnl_only: bool = False) -> list[Event]:
 
             events = []
             for row in reader:
-                event = Event()
-                event.id = int(row['id'])
-                event.name = row['name']
-                event.org_id = int(row['org_id'])
-                event.org_name = row['org_name']
-                event.org_season_id = int(row['org_season_id'])
-                event.org_season_name = row['org_season_name']
+                event = Event(
+                    id=int(row['id']),
+                    name=row['name'],
+                    org_id=int(row['org_id']),
+                    org_name=row['org_name'],
+                    org_season_id=int(row['org_season_id']),
+                    org_season_name=row['org_season_name'],
+                )
 
-                events.append(event)
+                events.append(identity_map.resolve(event))
 
         return events
 
@@ -337,7 +337,7 @@ def get_events(ecnl_only: bool = False) -> list[Event]:
 
     events = []
     for organization in organizations:
-        organization_events = get_events_by_organization(organization)
+        organization_events = get_events_by_organization(organization, concurrency)
         events.extend(organization_events)
 
     # Sort the events by name
@@ -359,49 +359,29 @@ def _read_match(record: dict, match: Match) -> Match:
     :param match: The match to populate.
     :return: The populated match.
     """
-    match.meta['matchID'] = read_int_value(record, 'matchID')
-    match.meta['gameDate'] = read_str_value(record, 'gameDate')
-    match.meta['homeTeamID'] = read_int_value(record, 'hometeamID')
-    match.meta['homeTeamClubID'] = read_int_value(record, 'homeTeamClubID')
-    match.meta['awayTeamID'] = read_int_value(record, 'awayteamID')
-    match.meta['awayTeamClubID'] = read_int_value(record, 'awayTeamClubID')
-    match.meta['gameTime'] = read_str_value(record, 'gameTime')
-    match.meta['flight'] = read_str_value(record, 'flight')
-    match.meta['division'] = read_str_value(record, 'division')
-    match.meta['homeclublogo'] = read_str_value(record, 'homeclublogo')
-    match.meta['awayclublogo'] = read_str_value(record, 'awayclublogo')
-    match.meta['homeTeam'] = read_str_value(record, 'homeTeam')
-    match.meta['awayTeam'] = read_str_value(record, 'awayTeam')
-    match.meta['complex'] = read_str_value(record, 'complex')
-    match.meta['venue'] = read_str_value(record, 'venue')
-    match.meta['scheduleID'] = read_int_value(record, 'scheduleID')
-    match.meta['homeTeamScore'] = read_int_value(record, 'homeTeamScore')
-    match.meta['awayTeamScore'] = read_int_value(record, 'awayTeamScore')
-    match.meta['eventName'] = read_str_value(record, 'eventName')
-    match.meta['eventLogo'] = read_str_value(record, 'eventLogo')
-    match.meta['startDate'] = read_datetime_value(record, 'startDate')
-    match.meta['endDate'] = read_datetime_value(record, 'endDate')
-    match.meta['eventTypeID'] = read_int_value(record, 'eventTypeID')
-
-    match.id = match.meta.get('matchID')
-    match.date = match.meta.get('gameDate')
-    match.home_team = match.meta.get('homeTeam')
-    match.home_team_id = match.meta.get('homeTeamID')
-    match.home_team_club_id = match.meta.get('homeTeamClubID')
-    match.away_team = match.meta.get('awayTeam')
-    match.away_team_id = match.meta.get('awayTeamID')
-    match.away_team_club_id = match.meta.get('awayTeamClubID')
-    match.home_score = match.meta.get('homeTeamScore')
-    match.away_score = match.meta.get('awayTeamScore')
+    values = _decode_match(record)
+
+    match.id = values[0]
+    match.date = values[1]
+    match.home_team = values[2]
+    match.home_team_id = values[3]
+    match.home_team_club_id = values[4]
+    match.away_team = values[5]
+    match.away_team_id = values[6]
+    match.away_team_club_id = values[7]
+    match.home_score = values[8]
+    match.away_score = values[9]
+    match.set_compact_meta(values[10:], shared=True)
 
     return match
 
-def _should_include_match(match: Match, include_future: bool = False) -> bool:
+def _should_include_match(match: Match, include_future: bool = False, now: Optional[datetime] = None) -> bool:
     """
     Determines if a match should be included in the results
 
     :param match: The match to check.
     :param include_future: Whether to include future matches.
+    :param now: The time that separates played matches from future ones, the current time if None.
     :return: True if the match should be included, otherwise False.
     """
     if match is None:
@@ -410,29 +390,26 @@ def _should_include_match(match: Match, include_future: bool = False) -> bool:
     if match.id <= 0:
         return False
 
-    if not match.is_future():
+    if not match.is_future(now):
         return True
 
     return include_future
 
-def get_match_results_by_club_id_and_event_id(club_id: int, event_id: int, include_future: bool = False) -> list[Match]:
+def get_match_results_by_club_id_and_event_id(club_id: int, event_id: int, include_future: bool = False,
+                                              now: Optional[datetime] = None) -> list[Match]:
     if club_id == 0 or event_id == 0:
         return []
 
-    response = requests.get(urljoin(PREFIX, f'/api/Club/get-score-reporting-schedule-list/{club_id}/{event_id}'))
-    response.raise_for_status()
-
-    json_data = response.json()
-    data = json_data.get('data')
-    event_past_schedule_list = data.get('eventPastScheduleList')
+    event_past_schedule_list = default_client().schedule(club_id, event_id)
 
+    now = now or datetime.now()
     matches = []
     match_ids = set()
 
     for item in event_past_schedule_list:
         match = _read_match(item, Match())
 
-        if not _should_include_match(match, include_future):
+        if not _should_include_match(match, include_future, now):
             continue
 
         match_ids.add(match.id)
@@ -441,8 +418,8 @@ def get_match_results_by_club_id_and_event_id(club_id: int, event_id: int, inclu
     return matches
 
 
-def get_match_results_by_club(club: Club) -> list[Match]:
-    return get_match_results_by_club_id_and_event_id(club.id, club.event_id)
+def get_match_results_by_club(club: Club, include_future: bool = False, now: Optional[datetime] = None) -> list[Match]:
+    return get_match_results_by_club_id_and_event_id(club.id, club.event_id, include_future, now)
 
 
 def _generate_division(gender: str, year: str) -> str:
@@ -458,7 +435,8 @@ def _generate_division(gender: str, year: str) -> str:
 
     return f'B20{year}'
 
-def get_matches(gender: str, year: str, organization: Organization) -> list[Match]:
+def get_matches(gender: str, year: str, organization: Organization, include_future: bool = False,
+                concurrency: int = 1, planner: Optional[SchedulePlanner] = None) -> list[Match]:
     """
     Returns a list of matches retrieved from the TGS API by gender and year for a specific organization.
 
@@ -467,25 +445,62 @@ def get_matches(gender: str, year: str, organization: Organization) -> list[Matc
     - ECNL Regional League
     - Pre-
 
+    Club schedules are fetched up to concurrency at a time, and merged in club order, so the result
+    does not depend on the concurrency.
+    """
+    return get_matches_by_age_group([(gender, year)], organization, include_future, concurrency, planner)[(gender, year)]
+
+
+def get_matches_by_age_group(age_groups: Iterable[tuple[str, str]], organization: Organization, include_future: bool = False,
+                             concurrency: int = 1, planner: Optional[SchedulePlanner] = None) -> dict[tuple[str, str], list[Match]]:
+    """
+    Returns the matches of several age groups of an organization, fetching each club's schedule once.
+
+    A club's schedule holds the matches of all its age groups, so the schedules are downloaded once
+    and their matches partitioned by division, instead of once per age group.
+
+    :param age_groups: The (gender, year) pairs to return, such as ('girls', '08').
+    :param organization: The organization.
+    :param include_future: Whether to include fixtures that have not been played yet.
+    :param concurrency: The maximum number of schedule requests in flight at once.
+    :param planner: A planner that skips schedules whose matches earlier schedules already hold;
+        without one, every club's schedule is fetched.
+    :return: A dict mapping each age group to its matches, as get_matches() returns them.
     """
+    age_groups = list(age_groups)
     clubs = get_clubs_by_organization(organization)
 
-    matches = []
+    divisions = {_generate_division(gender, year): (gender, year) for gender, year in age_groups}
+    result = {age_group: [] for age_group in age_groups}
     match_ids = set()
 
-    target_division = _generate_division(gender, year)
+    # One clock for the whole harvest, so every club's matches are split at the same instant.
+    now = datetime.now()
 
-    for club in clubs:
-        club_matches = get_match_results_by_club(club)
+    def club_division_matches(club: Club) -> list[Match]:
+        club_matches = get_match_results_by_club(club, include_future, now)
+        return [match for match in club_matches if match.meta_value('division') in divisions]
+
+    def summarized_club_division_matches(club: Club) -> tuple[list[Match], tuple[frozenset, frozenset]]:
+        club_matches = get_match_results_by_club(club, include_future, now)
+        selected = [match for match in club_matches if match.meta_value('division') in divisions]
+        return selected, SchedulePlanner.summarize(club_matches)
+
+    if planner is None:
+        schedules = _fan_out(club_division_matches, clubs, concurrency)
+    else:
+        schedules = planner.fetch(clubs, summarized_club_division_matches,
+                                  lambda function, items: _fan_out(function, items, concurrency))
+
+    for club_matches in schedules:
         for match in club_matches:
             if match.id in match_ids:
                 continue
 
-            if match.meta.get('division') == target_division:
-                match_ids.add(match.id)
-                matches.append(match)
+            match_ids.add(match.id)
+            result[divisions[match.meta_value('division')]].append(match)
 
-    return matches
+    return result
 
 
 def get_match_results(organization_id: int):
@@ -0,0 +1,49 @@
+import pytest
+from ratings import matrix
+from ratings.stats import team_stats_table
+from tests.test_incremental import random_matches
+
+pytestmark = pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+
+
+def test_weights_count_matches_as_copies():
+    np = matrix.np
+    matches = random_matches(3)
+    teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+    index = {team: i for i, team in enumerate(teams)}
+
+    home = np.asarray([index[match.home_team] for match in matches])
+    away = np.asarray([index[match.away_team] for match in matches])
+    home_won = np.asarray([[match.home_score > match.away_score for match in matches]])
+    tied = np.asarray([[match.home_score == match.away_score for match in matches]])
+    weights = np.random.default_rng(0).multinomial(len(matches), np.full(len(matches), 1.0 / len(matches)), size=1)
+
+    weighted = matrix.batch_rpi(len(teams), home, away, home_won, tied, weights)
+
+    copies = np.repeat(np.arange(len(matches)), weights[0])
+    copied = matrix.batch_rpi(len(teams), home[copies], away[copies], home_won[:, copies], tied[:, copies])
+
+    assert np.allclose(weighted, copied, equal_nan=True)
+    assert np.isnan(weighted).any() == (len(set(home[copies]) | set(away[copies])) < len(teams))
+
+
+def test_bootstrap_is_deterministic_and_contains_rpi():
+    from ratings.bootstrap import bootstrap_rpi
+
+    matches = random_matches(4, number_of_teams=6, number_of_matches=60)
+    first = bootstrap_rpi(matches, replicates=250, chunk_size=100, workers=1, seed=3)
+    second = bootstrap_rpi(matches, replicates=250, chunk_size=100, workers=1, seed=3)
+    table = team_stats_table(matches)
+
+    assert first == second
+    assert set(first) == set(table)
+    for team, (low, high) in first.items():
+        assert low <= high
+        assert low - 0.05 <= table[team]['rpi'] <= high + 0.05
+
+
+def test_bootstrap_rejects_bad_level():
+    from ratings.bootstrap import bootstrap_rpi
+
+    with pytest.raises(ValueError):
+        bootstrap_rpi(random_matches(5), level=1.5)
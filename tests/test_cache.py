@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from click.testing import CliRunner
+
+import driver
+from ratings import matrix
+from ratings.cache import StatsCache, affected_teams, config_key, file_digest, partial_team_stats
+from ratings.stats import team_stats_table
+from tests.test_stats import make_match
+
+
+def chain_matches(seed, number_of_teams=40, number_of_matches=60):
+    # Mostly neighboring teams play each other, so the schedule graph is long and thin.
+    rng = random.Random(seed)
+    matches = []
+    for i in range(number_of_matches):
+        home = rng.randrange(number_of_teams - 1)
+        matches.append(make_match(i + 1, f'Team {home:02d}', f'Team {home + 1:02d}', rng.randint(0, 3), rng.randint(0, 3), 1 + i % 28))
+    return matches
+
+
+def test_partial_reuse_matches_full_recompute():
+    matches = chain_matches(1)
+    table, state, recomputed = partial_team_stats(matches, None)
+    assert table == team_stats_table(matches, backend='python')
+    assert len(recomputed) == len(table)
+
+    changed = list(matches)
+    changed[10] = make_match(changed[10].id, changed[10].home_team, changed[10].away_team, 9, 0)
+    changed.append(make_match(1000, 'Team 30', 'Team 31', 1, 1))
+    del changed[20]
+
+    table, state, recomputed = partial_team_stats(changed, state)
+    assert table == team_stats_table(changed, backend='python')
+    assert 0 < len(recomputed) < len(table)
+    assert recomputed <= affected_teams(
+        {str(m.id): [m.home_team, m.away_team, m.home_score, m.away_score] for m in matches},
+        state['fingerprints'],
+    )
+
+    table, state, recomputed = partial_team_stats(changed, state)
+    assert recomputed == set()
+
+
+def test_reordered_matches_are_recomputed():
+    matches = chain_matches(2)
+    _, state, _ = partial_team_stats(matches, None)
+
+    table, _, recomputed = partial_team_stats(matches[::-1], state)
+    assert len(recomputed) == len(table)
+
+
+def test_affected_teams_are_two_hops():
+    previous = {'1': ['A', 'B', 1, 0], '2': ['B', 'C', 0, 0], '3': ['C', 'D', 2, 1], '4': ['D', 'E', 0, 1]}
+    current = dict(previous, **{'1': ['A', 'B', 0, 0]})
+
+    assert affected_teams(previous, current) == {'A', 'B', 'C', 'D'}
+    assert affected_teams(previous, previous) == set()
+
+
+def test_outputs_round_trip(tmp_path):
+    output = tmp_path / 'stats.csv'
+    output.write_text('team,rpi\nA,0.5\n')
+    cache = StatsCache(str(tmp_path / 'cache'))
+    key = config_key({'digest': file_digest(str(output)), 'digits': 2})
+
+    assert cache.restore_outputs(key, str(tmp_path)) is None
+    cache.store_outputs(key, [str(output)])
+    output.write_text('changed')
+
+    assert cache.restore_outputs(key, str(tmp_path)) == [str(output)]
+    assert output.read_text() == 'team,rpi\nA,0.5\n'
+    assert config_key({'digits': 2}) != config_key({'digits': 3})
+
+
+def write_chain_file(path, seed):
+    matches = chain_matches(seed)
+    for match in matches:
+        # Without team IDs, the registry keys the teams by name.
+        match.home_team_id = match.away_team_id = 0
+    driver.write_matches_to_file(path, matches)
+
+
+def run_stats(*arguments):
+    result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_chain.csv', '-o', '9', *arguments])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+@pytest.mark.parametrize("backend", ['python', 'numpy'])
+def test_cached_stats_use_the_chosen_backend(tmp_path, monkeypatch, backend):
+    if backend == 'numpy' and not matrix.HAS_NUMPY:
+        pytest.skip('numpy is not installed')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(driver, 'get_club_events', lambda organization_id: {})
+    write_chain_file('matches_chain.csv', 1)
+
+    output = run_stats('--backend', backend)
+
+    assert ('Recomputed' in output) == (backend == 'python')
+
+
+@pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+def test_cache_hit_restores_the_poisson_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(driver, 'get_club_events', lambda organization_id: {})
+    write_chain_file('matches_chain.csv', 1)
+
+    assert 'converged' in run_stats('--poisson-state', 'poisson.json')
+    fitted = (tmp_path / 'poisson.json').read_text()
+    (tmp_path / 'poisson.json').unlink()
+
+    assert 'restored' in run_stats('--poisson-state', 'poisson.json')
+    assert (tmp_path / 'poisson.json').read_text() == fitted
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from ratings.dateindex import DateIndex
+from ratings.stats import SeasonLedger
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+
+def test_record_matches_filtered_ledger():
+    matches = random_matches(6, number_of_matches=80)
+    for i, match in enumerate(matches):
+        match.date = datetime(2024, 1, 1 + i % 28)
+
+    index = DateIndex(matches)
+    since, until = datetime(2024, 1, 5), datetime(2024, 1, 20)
+    ledger = SeasonLedger([match for match in matches if since <= match.date <= until])
+
+    assert index.teams() == SeasonLedger(matches).teams()
+    assert sorted(index.records(since, until)) == ledger.teams()
+    for team in index.teams():
+        windowed = index.record(team, since, until)
+        expected = ledger.get(team)
+        assert (windowed.wins, windowed.losses, windowed.ties, windowed.matches_played, windowed.goals_for, windowed.goals_against) == \
+            (expected.wins, expected.losses, expected.ties, expected.matches_played, expected.goals_for, expected.goals_against)
+
+
+def test_window_bounds_are_inclusive():
+    matches = [
+        make_match(1, 'A', 'B', 2, 0, day=1),
+        make_match(2, 'B', 'C', 1, 1, day=2),
+        make_match(3, 'C', 'A', 0, 3, day=3),
+    ]
+    index = DateIndex(matches)
+    second, third = matches[1].date, matches[2].date
+
+    assert [match.id for match in index.window(second, third)] == [2, 3]
+    assert [match.id for match in index.window(until=second)] == [1, 2]
+    assert index.record('A', since=second).wins == 1
+    assert index.record('Z').matches_played == 0
+    assert index.ledger(until=second).record('B') == '0-1-1'
+
+
+def test_window_keeps_input_order():
+    matches = [make_match(1, 'A', 'B', 1, 0, day=3), make_match(2, 'B', 'C', 0, 0, day=1), make_match(3, 'C', 'A', 2, 2, day=2)]
+
+    assert [match.id for match in DateIndex(matches).window()] == [1, 2, 3]
+    assert [match.id for match in DateIndex(matches).matches] == [2, 3, 1]
@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime
-from ratings.dict_utils import read_str_value, read_int_value, read_datetime_value
+from ratings.dict_utils import compile_decoder, parse_timestamp, read_str_value, read_int_value, read_datetime_value
 
 @pytest.mark.parametrize("record, key, expected", [
     ({'name': 'John Doe', 'age': '30'}, 'name', 'John Doe'),
@@ -26,4 +26,38 @@ def test_read_int_value(record, key, expected):
     ({'key': None}, 'key', None)
 ])
 def test_read_datetime_value(record, key, expected):
-    assert read_datetime_value(record, key) == expected
\ No newline at end of file
+    assert read_datetime_value(record, key) == expected
+
+@pytest.mark.parametrize("record", [
+    {'name': ' John Doe ', 'age': ' 30 ', 'date': '2023-10-01T12:00:00'},
+    {'name': None, 'age': None, 'date': None},
+    {},
+    {'name': '', 'age': '', 'date': ''},
+    {'name': 7, 'age': 31, 'date': ' 2023-1-05T08:30:00 '},
+])
+def test_compiled_decoder_matches_the_readers(record):
+    decode = compile_decoder([('name', str), ('age', int), ('date', datetime), ('missing', int, -1)])
+
+    assert decode(record) == (
+        read_str_value(record, 'name'),
+        read_int_value(record, 'age'),
+        read_datetime_value(record, 'date'),
+        read_int_value(record, 'missing', -1),
+    )
+
+
+def test_compiled_decoder_interns_strings():
+    decode = compile_decoder([('name', str)], intern_strings=True)
+    first, = decode({'name': ''.join(['Club ', 'A'])})
+    second, = decode({'name': ''.join(['Club ', 'A'])})
+    assert first is second
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('2023-10-01T12:34:56') == datetime(2023, 10, 1, 12, 34, 56)
+    assert parse_timestamp('2023-10-01T12:34:56') is parse_timestamp('2023-10-01T12:34:56')
+    assert parse_timestamp('2023-1-01T12:34:56') == datetime(2023, 1, 1, 12, 34, 56)
+    with pytest.raises(ValueError):
+        parse_timestamp('2023-13-01T12:34:56')
+    with pytest.raises(ValueError):
+        parse_timestamp('not a date')
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from click.testing import CliRunner
+
+from driver import cli, write_matches_to_file
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+from ratings.elo import EloRater, Glicko2Rater, StreamingRater, restore
+
+
+def test_elo_update():
+    rater = EloRater(k=32.0)
+    rater.update(make_match(1, 'Alpha', 'Bravo', 2, 1))
+
+    assert rater.rating('Alpha') == pytest.approx(1516.0)
+    assert rater.rating('Bravo') == pytest.approx(1484.0)
+    assert rater.rating('Charlie') == 1500.0
+
+
+def test_glicko2_winner_gains_and_deviation_shrinks():
+    rater = Glicko2Rater()
+    rater.update(make_match(1, 'Alpha', 'Bravo', 2, 1))
+
+    assert rater.rating('Alpha') > 1500.0 > rater.rating('Bravo')
+    assert rater.deviation('Alpha') < 350.0
+
+
+@pytest.mark.parametrize("rater_class", [EloRater, Glicko2Rater])
+def test_checkpoint_resumes_stream(tmp_path, rater_class):
+    matches = sorted(random_matches(3), key=lambda m: m.date)
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    full = rater_class()
+    assert full.consume(iter(matches)) == len(matches)
+
+    first = rater_class()
+    first.consume(iter(matches[:25]))
+    first.checkpoint(checkpoint)
+
+    resumed = restore(checkpoint)
+    assert resumed.consume(iter(matches)) == len(matches) - 25
+
+    for team in full.teams:
+        assert resumed.rating(team) == pytest.approx(full.rating(team))
+
+
+def test_late_matches_are_counted_not_dropped_silently(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = make_match(1, 'Alpha', 'Bravo', 2, 1, day=1)
+    second = make_match(2, 'Charlie', 'Delta', 0, 1, day=5)
+    write_matches_to_file('matches.csv', [first, second])
+    CliRunner().invoke(cli, ['elo', '-f', 'matches.csv', '--checkpoint', 'checkpoint.json'])
+
+    # A result for day 3 is entered after the checkpoint moved to day 5.
+    late = make_match(3, 'Alpha', 'Charlie', 1, 1, day=3)
+    write_matches_to_file('matches.csv', [first, late, second])
+    result = CliRunner().invoke(cli, ['elo', '-f', 'matches.csv', '--checkpoint', 'checkpoint.json'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Applied 0 new matches' in result.output
+    assert 'Skipped 1 matches dated before the last applied match' in result.output
+    assert restore('checkpoint.json').applied_match_ids == {1, 2}
+
+
+def test_rejects_out_of_order_matches():
+    rater = EloRater()
+    rater.update(make_match(1, 'Alpha', 'Bravo', 2, 1, day=5))
+
+    with pytest.raises(ValueError):
+        rater.update(make_match(2, 'Alpha', 'Bravo', 2, 1, day=4))
+
+
+def test_abstract_rater_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        StreamingRater()
+
+
+def test_elo_command_skips_unplayed_fixtures(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    played = make_match(1, 'Alpha', 'Bravo', 2, 1)
+    fixture = make_match(2, 'Alpha', 'Bravo', 0, 0)
+    fixture.date = datetime.now() + timedelta(days=30)
+    write_matches_to_file('matches.csv', [played, fixture])
+
+    result = CliRunner().invoke(cli, ['elo', '-f', 'matches.csv', '--checkpoint', 'checkpoint.json'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Applied 1 new matches' in result.output
+    assert restore('checkpoint.json').as_of == played.date
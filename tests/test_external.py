@@ -0,0 +1,76 @@
+import pytest
+
+from click.testing import CliRunner
+
+import driver
+from ratings import matrix
+from ratings.external import ExternalScheduleSystem, MatchStream, external_team_stats_table
+from ratings.linear import ScheduleSystem
+from ratings.stats import team_stats_table
+from tests.test_cache import write_chain_file
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+
+@pytest.mark.parametrize("number_of_digits", [2, 3])
+def test_external_matches_in_memory_table(tmp_path, number_of_digits):
+    matches = random_matches(10, number_of_teams=25, number_of_matches=300)
+    matches.append(make_match(1000, 'Team 1', 'Team 1', 2, 2))
+
+    table = external_team_stats_table(iter(matches), number_of_digits, chunk_size=37, directory=str(tmp_path))
+
+    assert table == team_stats_table(matches, number_of_digits, backend='python')
+    assert list(table) == sorted(table)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_match_stream_reads_source_on_every_pass():
+    calls = []
+
+    def source():
+        calls.append(1)
+        return iter(random_matches(11))
+
+    stream = MatchStream(source)
+    assert len(list(stream)) == len(list(stream)) == 40
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_external_schedule_system_matches_in_memory(tmp_path, monkeypatch, use_numpy):
+    if use_numpy and not matrix.HAS_NUMPY:
+        pytest.skip('numpy is not installed')
+    monkeypatch.setattr(matrix, 'HAS_NUMPY', use_numpy)
+    matches = random_matches(12, number_of_teams=25, number_of_matches=300)
+    matches.append(make_match(1000, 'Team 1', 'Team 1', 2, 2))
+    system = ScheduleSystem(matches, use_numpy=False)
+
+    with ExternalScheduleSystem(iter(matches), chunk_size=37, directory=str(tmp_path)) as external:
+        colley = external.colley()
+        massey = external.massey()
+
+    assert colley.keys() == system.colley().keys()
+    for team, value in system.colley().items():
+        assert colley[team] == pytest.approx(value, abs=1e-9)
+    for team, value in system.massey().items():
+        assert massey[team] == pytest.approx(value, abs=1e-9)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stats_command_combines_files_on_both_backends(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(driver, 'get_club_events', lambda organization_id: {})
+    write_chain_file('matches_2023.csv', 3)
+    write_chain_file('matches_2024.csv', 4)
+
+    outputs = {}
+    for backend in ('python', 'external'):
+        result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_2023.csv', '-f', 'matches_2024.csv', '-o', '9',
+                                                 '--backend', backend, '--no-cache', '--output-file', f'stats_{backend}.csv'])
+        assert result.exit_code == 0, result.output
+        outputs[backend] = (tmp_path / f'stats_{backend}.csv').read_text()
+
+    assert outputs['external'] == outputs['python']
+
+    result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_2023.csv', '-f', 'matches_2024.csv', '-o', '9'])
+    assert result.exit_code != 0
@@ -0,0 +1,53 @@
+import random
+
+from ratings.graph import DisjointSet, ScheduleGraph, merge_matches
+from tests.test_stats import make_match
+
+
+def graph_from_pairs(pairs):
+    return ScheduleGraph([make_match(i, home, away, 1, 0) for i, (home, away) in enumerate(pairs)])
+
+
+def test_disjoint_set_groups():
+    disjoint_set = DisjointSet('abcde')
+    disjoint_set.union('a', 'b')
+    disjoint_set.union('c', 'd')
+    disjoint_set.union('b', 'd')
+
+    assert disjoint_set.find('a') == disjoint_set.find('c')
+    assert disjoint_set.groups() == [['a', 'b', 'c', 'd'], ['e']]
+
+
+def test_components_weak_teams_and_bridges():
+    graph = graph_from_pairs([('A', 'B'), ('B', 'C'), ('C', 'A'), ('C', 'D'), ('D', 'E'), ('X', 'Y'), ('Z', 'Z')])
+
+    assert graph.components == [['A', 'B', 'C', 'D', 'E'], ['X', 'Y'], ['Z']]
+    assert graph.component['E'] == 1
+    assert graph.bridges() == ['C', 'D']
+    assert graph.weakly_connected(2) == ['E', 'X', 'Y', 'Z']
+
+
+def test_bridges_match_brute_force():
+    teams = [f'T{i:02d}' for i in range(15)]
+    generator = random.Random(5)
+    pairs = [tuple(generator.sample(teams, 2)) for _ in range(18)]
+    graph = graph_from_pairs(pairs)
+
+    expected = []
+    for team in graph.teams():
+        remaining = graph_from_pairs([pair for pair in pairs if team not in pair])
+        before = len([group for group in graph.components if team not in group]) + 1
+        isolated = sum(1 for other in graph.components[graph.component[team] - 1] if other != team and other not in remaining.component)
+        if len(remaining.components) + isolated > before:
+            expected.append(team)
+
+    assert graph.bridges() == expected
+
+
+def test_merge_keeps_first_copy():
+    first = [make_match(1, 'A', 'B', 1, 0), make_match(2, 'B', 'C', 2, 2)]
+    second = [make_match(2, 'B', 'C', 9, 9), make_match(3, 'C', 'D', 0, 1)]
+
+    merged = merge_matches([first, second])
+    assert [match.id for match in merged] == [1, 2, 3]
+    assert merged[1].home_score == 2
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+from tests.test_stats import make_match
+from ratings.incremental import IncrementalRPI
+from ratings.stats import RPIEngine
+
+
+def random_matches(seed, number_of_teams=10, number_of_matches=40):
+    rng = random.Random(seed)
+    teams = [f'Team {i}' for i in range(number_of_teams)]
+    return [
+        make_match(i + 1, *rng.sample(teams, 2), rng.randint(0, 4), rng.randint(0, 4), 1 + i % 28)
+        for i in range(number_of_matches)
+    ]
+
+
+def test_seeded_model_matches_engine():
+    matches = random_matches(1)
+
+    assert IncrementalRPI(matches).table() == RPIEngine(matches).table()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_match_full_recompute(seed):
+    rng = random.Random(seed)
+    matches = random_matches(seed)
+    model = IncrementalRPI(matches[:30])
+    current = {match.id: match for match in matches[:30]}
+
+    for match in matches[30:]:
+        model.add_match(match)
+        current[match.id] = match
+
+        match_id = rng.choice(list(current))
+        match = current[match_id]
+        match.home_score, match.away_score = rng.randint(0, 4), rng.randint(0, 4)
+        model.update_score(match_id, match.home_score, match.away_score)
+
+        match_id = rng.choice(list(current))
+        model.remove_match(match_id)
+        del current[match_id]
+
+        assert model.table(3) == RPIEngine(list(current.values())).table(3)
+
+
+def test_rejects_unknown_and_duplicate_matches():
+    matches = random_matches(2)
+    model = IncrementalRPI(matches)
+
+    with pytest.raises(ValueError):
+        model.add_match(matches[0])
+
+    with pytest.raises(KeyError):
+        model.remove_match(0)
+
+    with pytest.raises(KeyError):
+        model.update_score(0, 1, 0)
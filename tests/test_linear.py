@@ -0,0 +1,65 @@
+import pytest
+from tests.test_stats import make_match
+from ratings import matrix
+from ratings.linear import ScheduleSystem, colley, massey
+
+
+@pytest.fixture
+def matches():
+    return [
+        make_match(1, 'Alpha', 'Bravo', 2, 1),
+        make_match(2, 'Bravo', 'Charlie', 3, 0),
+        make_match(3, 'Charlie', 'Alpha', 0, 1),
+    ]
+
+
+def test_colley(matches):
+    assert colley(matches) == {'Alpha': 0.7, 'Bravo': 0.5, 'Charlie': 0.3}
+
+
+def test_massey(matches):
+    assert massey(matches) == {'Alpha': 0.67, 'Bravo': 0.67, 'Charlie': -1.33}
+
+
+def test_massey_ratings_sum_to_zero_per_group(matches):
+    matches.append(make_match(4, 'Delta', 'Echo', 4, 0))
+
+    ratings = ScheduleSystem(matches).massey()
+
+    assert sum(ratings[team] for team in ('Alpha', 'Bravo', 'Charlie')) == pytest.approx(0.0, abs=1e-9)
+    assert ratings['Delta'] == pytest.approx(2.0)
+    assert ratings['Echo'] == pytest.approx(-2.0)
+
+
+@pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+def test_solvers_agree(matches):
+    sparse_system = ScheduleSystem(matches, use_numpy=True)
+    python_system = ScheduleSystem(matches, use_numpy=False)
+
+    for team, value in python_system.colley().items():
+        assert sparse_system.colley()[team] == pytest.approx(value)
+
+    for team, value in python_system.massey().items():
+        assert sparse_system.massey()[team] == pytest.approx(value)
+
+
+def test_tolerance_keyword_follows_the_scipy_signature():
+    def old_cg(A, b, x0=None, tol=1e-05, maxiter=None, M=None, callback=None, atol=None):
+        pass
+
+    def new_cg(A, b, x0=None, *, rtol=1e-05, atol=0.0, maxiter=None, M=None, callback=None):
+        pass
+
+    assert matrix._tolerance_keyword(old_cg) == 'tol'
+    assert matrix._tolerance_keyword(new_cg) == 'rtol'
+
+
+@pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+def test_unconverged_sparse_solve_falls_back_to_python(matches, monkeypatch):
+    expected = ScheduleSystem(matches, use_numpy=False).colley()
+    monkeypatch.setattr(matrix, 'sparse_cg', lambda operator, rhs, rtol, maxiter: (matrix.np.zeros(len(rhs)), False))
+
+    ratings = ScheduleSystem(matches, use_numpy=True).colley()
+
+    for team, value in expected.items():
+        assert ratings[team] == pytest.approx(value)
@@ -0,0 +1,76 @@
+import copy
+
+from datetime import datetime
+
+from ratings.models import Match
+from ratings.models.match import META_KEYS, share
+from ratings.tgs import _read_match
+
+
+def tgs_record(match_id, home='Club A G08', away='Club B G08'):
+    return {
+        'matchID': match_id, 'gameDate': '2024-03-02T10:00:00', 'hometeamID': 1001, 'homeTeamClubID': 11,
+        'awayteamID': 1002, 'awayTeamClubID': 12, 'gameTime': '10:00 AM', 'flight': 'Premier', 'division': 'G2008',
+        'homeclublogo': 'https://example.com/a.png', 'awayclublogo': 'https://example.com/b.png',
+        'homeTeam': home, 'awayTeam': away, 'complex': 'Park', 'venue': 'Field 1', 'scheduleID': 77,
+        'homeTeamScore': 2, 'awayTeamScore': 1, 'eventName': 'Showcase', 'eventLogo': 'https://example.com/e.png',
+        'startDate': '2024-03-01T00:00:00', 'endDate': '2024-03-03T00:00:00', 'eventTypeID': 4,
+    }
+
+
+def test_match_has_no_instance_dict():
+    assert not hasattr(Match(), '__dict__')
+    assert Match().meta == {}
+
+
+def test_read_match_decodes_meta_lazily():
+    match = _read_match(tgs_record(5), Match())
+
+    assert (match.id, match.home_team, match.away_team, match.home_score, match.away_score) == (5, 'Club A G08', 'Club B G08', 2, 1)
+    assert match.meta_value('division') == 'G2008'
+    assert match.meta_value('homeTeamID') == 1001
+    assert match.meta_value('missing', 'x') == 'x'
+    assert match._meta is None
+
+    meta = match.meta
+    assert list(meta) == list(META_KEYS)
+    assert meta['matchID'] == 5
+    assert meta['gameDate'] == '2024-03-02T10:00:00'
+    assert meta['startDate'] == datetime(2024, 3, 1)
+    assert meta['scheduleID'] == 77
+
+    meta['division'] = 'G2009'
+    assert match.meta_value('division') == 'G2009'
+
+
+def test_repeated_strings_are_shared():
+    first = _read_match(tgs_record(1, home=''.join(['Club ', 'C'])), Match())
+    second = _read_match(tgs_record(2, home=''.join(['Club ', 'C'])), Match())
+
+    assert first.home_team is second.home_team
+    assert first.meta_value('homeclublogo') is second.meta_value('homeclublogo')
+    assert first.meta_value('startDate') is second.meta_value('startDate')
+
+
+def test_only_strings_are_shared():
+    date = datetime(2024, 3, 2)
+    assert share(date) is date
+    assert share(''.join(['Club ', 'D'])) is share('Club D')
+
+
+def test_copy_keeps_meta():
+    match = _read_match(tgs_record(3), Match())
+    copied = copy.copy(match)
+    copied.home_team = 0
+
+    assert copied.meta_value('eventName') == 'Showcase'
+    assert match.home_team == 'Club A G08'
+
+
+def test_is_future_uses_the_given_clock():
+    match = _read_match(tgs_record(4), Match())
+
+    assert match.date == datetime(2024, 3, 2, 10)
+    assert match.is_future(datetime(2024, 3, 1))
+    assert not match.is_future(datetime(2024, 3, 2, 10))
+    assert not match.is_future()
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from ratings.matchindex import MatchIndex
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+
+def ids(matches):
+    return [match.id for match in matches]
+
+
+def test_lookups_match_linear_scans():
+    matches = random_matches(13, number_of_matches=120)
+    for match in matches:
+        match.meta = {'division': f'D{match.id % 2}', 'flight': f'F{match.id % 3}'}
+
+    index = MatchIndex(matches)
+    by_date = sorted(matches, key=lambda m: m.date)
+    since, until = datetime(2024, 9, 5), datetime(2024, 9, 20)
+
+    for team in index.teams():
+        expected = [m for m in by_date if team in (m.home_team, m.away_team) and since <= m.date <= until]
+        assert ids(index.team_matches(team, since, until)) == ids(expected)
+
+    expected = [m for m in by_date if {m.home_team, m.away_team} == {'Team 1', 'Team 2'}]
+    assert ids(index.head_to_head('Team 2', 'Team 1')) == ids(expected)
+
+    expected = [m for m in by_date if m.meta['division'] == 'D1' and m.meta['flight'] == 'F0' and m.date >= since]
+    assert ids(index.matches_in('D1', 'F0', since=since)) == ids(expected)
+    assert ids(index.matches_in(flight='F2')) == ids([m for m in by_date if m.meta['flight'] == 'F2'])
+    assert ids(index.matches_in(until=until)) == ids([m for m in by_date if m.date <= until])
+    assert index.matches_in('D9') == []
+
+
+def test_common_opponents():
+    matches = [
+        make_match(1, 'A', 'C', 1, 0, day=1),
+        make_match(2, 'D', 'A', 2, 2, day=2),
+        make_match(3, 'B', 'C', 0, 3, day=3),
+        make_match(4, 'B', 'A', 1, 1, day=4),
+        make_match(5, 'B', 'E', 1, 1, day=5),
+    ]
+    common = MatchIndex(matches).common_opponents('A', 'B')
+
+    assert list(common) == ['C']
+    assert (ids(common['C'][0]), ids(common['C'][1])) == ([1], [3])
+    assert MatchIndex(matches).opponents('A') == {'B', 'C', 'D'}
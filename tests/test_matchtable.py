@@ -0,0 +1,95 @@
+import csv
+
+from datetime import datetime
+
+import pytest
+
+from ratings import matrix
+from ratings.matchtable import MatchTable
+from ratings.stats import RPIEngine, team_stats_table
+from tests.test_incremental import random_matches
+
+
+def season(seed, division='G2008'):
+    matches = random_matches(seed, number_of_teams=8, number_of_matches=30)
+    for match in matches:
+        match.home_team_id = int(match.home_team.split()[1]) + 1
+        match.away_team_id = int(match.away_team.split()[1]) + 1
+        match.home_team = match.home_team_id
+        match.away_team = match.away_team_id
+        match.date = datetime(2024, 1, 1 + match.id % 28)
+        match.meta = {'division': division}
+    return matches
+
+
+def table_order(matches):
+    # A table groups rows by division and sorts them by date, keeping input order on ties.
+    return sorted(matches, key=lambda match: (match.meta_value('division'), match.date))
+
+
+def test_engines_consume_a_table_without_match_objects():
+    matches = season(1)
+    table = MatchTable.from_matches(matches)
+    ordered = table_order(matches)
+
+    assert len(table) == len(matches)
+    assert [m.id for m in table.to_matches()] == [m.id for m in ordered]
+    assert team_stats_table(table, backend='python') == team_stats_table(ordered, backend='python')
+    assert RPIEngine(table).table(3) == RPIEngine(ordered).table(3)
+
+
+@pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+def test_numpy_backend_reads_table_buffers():
+    matches = season(6)
+    table = MatchTable.from_matches(matches)
+
+    assert team_stats_table(table, backend='numpy') == team_stats_table(table_order(matches), backend='python')
+
+
+def test_slices_share_the_table_arrays():
+    table = MatchTable.from_matches(season(2, 'G2008') + season(3, 'G2009'))
+    assert table.divisions() == ['G2008', 'G2009']
+
+    g2009 = table.division('G2009')
+    assert len(g2009) == 30
+    assert g2009.column('home_team_id')[0].obj is table.column('home_team_id')[1].obj
+
+    since, until = datetime(2024, 1, 5), datetime(2024, 1, 10)
+    window = table.between(since, until)
+    expected = [m.id for m in table.to_matches() if since <= m.date <= until]
+    assert [m.id for m in window.to_matches()] == expected
+    assert window.column('date')[0].obj is table.column('date')[0].obj
+    assert len(table.division('B2010')) == 0
+
+
+def test_concatenation_and_sources_agree(tmp_path):
+    first = MatchTable.from_matches(season(4))
+    second = MatchTable.from_matches(season(5, 'G2010'))
+    both = first + second
+
+    assert len(both) == len(first) + len(second)
+    assert both.chunks[0] is first.chunks[0]
+    assert list(MatchTable.concat([first, second]).values('id')) == list(both.values('id'))
+
+    path = tmp_path / 'matches.csv'
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['match_id', 'home_team', 'home_team_id', 'home_team_club_id', 'away_team', 'away_team_id',
+                         'away_team_club_id', 'home_score', 'away_score', 'date', 'event_name', 'flight', 'division'])
+        for match in first.to_matches():
+            writer.writerow([match.id, 'h', match.home_team_id, 0, 'a', match.away_team_id, 0, match.home_score,
+                             match.away_score, match.date.strftime('%Y-%m-%d'), '', '', 'G2008'])
+
+    assert list(MatchTable.from_csv(str(path)).values('id')) == list(first.values('id'))
+
+    records = [
+        {'matchID': m.id, 'gameDate': m.date.strftime('%Y-%m-%dT%H:%M:%S'), 'hometeamID': m.home_team_id,
+         'awayteamID': m.away_team_id, 'homeTeamScore': m.home_score, 'awayTeamScore': m.away_score,
+         'division': 'G2008'}
+        for m in first.to_matches()
+    ]
+    records.append({'matchID': 0, 'gameDate': '2024-01-01T00:00:00'})
+    records.append({'matchID': 999, 'gameDate': '2999-01-01T00:00:00'})
+    from_records = MatchTable.from_records(records)
+    assert list(from_records.values('id')) == list(first.values('id'))
+    assert team_stats_table(from_records, backend='python') == team_stats_table(first, backend='python')
@@ -0,0 +1,110 @@
+import csv
+
+import pytest
+
+from click.testing import CliRunner
+
+import driver
+from ratings.cache import partial_team_stats
+from ratings.metrics import STATS_METRICS, MetricContext, MetricRegistry, add_weighted_rpi, standard_registry
+from ratings.stats import team_stats_table
+from tests.test_cache import write_chain_file
+from tests.test_incremental import random_matches
+
+
+@pytest.mark.parametrize("number_of_digits", [2, 3])
+def test_standard_metrics_match_stats_table(number_of_digits):
+    matches = random_matches(7)
+    # partial_team_stats() computes every row straight from RPIEngine.
+    table, _, _ = partial_team_stats(matches, None, number_of_digits)
+
+    assert standard_registry().evaluate(matches, STATS_METRICS, number_of_digits) == table
+    assert team_stats_table(matches, number_of_digits, backend='python') == table
+
+
+def test_shared_inputs_are_computed_once():
+    registry = standard_registry()
+    calls = []
+
+    @registry.metric('double_wp', inputs=('wp',))
+    def double_wp(context, wp):
+        calls.append('double_wp')
+        return {team: 2 * value for team, value in wp.items()}
+
+    @registry.metric('wp_plus_double', inputs=('wp', 'double_wp'))
+    def wp_plus_double(context, wp, double_wp):
+        calls.append('wp_plus_double')
+        return {team: wp[team] + double_wp[team] for team in wp}
+
+    add_weighted_rpi(registry, 'rpi_heavy_owp', 0.1, 0.7, 0.2)
+
+    order = registry.order(['wp_plus_double', 'rpi', 'rpi_heavy_owp'])
+    assert len(order) == len(set(order))
+    assert order.index('wins') < order.index('wp') < order.index('double_wp') < order.index('wp_plus_double')
+
+    result = registry.evaluate(random_matches(8), ['wp', 'wp_plus_double', 'rpi', 'rpi_heavy_owp'])
+    assert calls == ['double_wp', 'wp_plus_double']
+    for row in result.values():
+        assert row['wp_plus_double'] == pytest.approx(3 * row['wp'])
+
+
+def test_registry_rejects_cycles_and_unknown_metrics():
+    registry = MetricRegistry()
+    registry.register('a', ('b',), lambda context, b: b)
+    registry.register('b', ('a',), lambda context, a: a)
+
+    with pytest.raises(ValueError):
+        registry.order(['a'])
+    with pytest.raises(KeyError):
+        registry.order(['c'])
+    with pytest.raises(ValueError):
+        registry.register('a', (), lambda context: {})
+    assert 'rpi' not in registry.copy().metrics
+
+
+def test_custom_metrics_build_on_a_computed_table(monkeypatch):
+    matches = random_matches(9)
+    table = team_stats_table(matches, 2, backend='python')
+    registry = standard_registry()
+    add_weighted_rpi(registry, 'rpi_heavy_owp', 0.1, 0.7, 0.2)
+
+    def no_engine(context):
+        raise AssertionError('the matches were walked again')
+
+    monkeypatch.setattr(MetricContext, 'engine', property(no_engine))
+    result = registry.evaluate(matches, ['rpi_heavy_owp'], table=table)
+
+    for team, row in table.items():
+        assert result[team]['rpi_heavy_owp'] == round(0.1 * row['wp'] + 0.7 * row['owp'] + 0.2 * row['oowp'], 2)
+
+
+def register_goal_share(registry):
+    registry.register(
+        'goal_share', ('goals_for', 'goals_against'),
+        lambda context, goals_for, goals_against: {
+            team: round(goals_for[team] / (goals_for[team] + goals_against[team]), 2) if goals_for[team] + goals_against[team] else 0.0
+            for team in goals_for
+        },
+    )
+
+
+def test_stats_command_adds_custom_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(driver, 'get_club_events', lambda organization_id: {})
+    write_chain_file('matches_chain.csv', 2)
+
+    result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_chain.csv', '-o', '9', '--no-cache',
+                                             '--weighted-rpi', 'rpi_heavy_owp=0.1,0.7,0.2',
+                                             '--metrics-plugin', 'tests.test_metrics:register_goal_share'])
+    assert result.exit_code == 0, result.output
+
+    with open('stats_chain.csv') as file:
+        rows = list(csv.DictReader(file))
+    assert rows
+    for row in rows:
+        weighted = 0.1 * float(row['wp']) + 0.7 * float(row['owp']) + 0.2 * float(row['oowp'])
+        assert float(row['rpi_heavy_owp']) == pytest.approx(weighted, abs=0.006)
+        assert 0.0 <= float(row['goal_share']) <= 1.0
+
+    result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_chain.csv', '-o', '9', '--no-cache', '--weighted-rpi', 'rpi=1,0,0'])
+    assert result.exit_code != 0
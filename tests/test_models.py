@@ -0,0 +1,108 @@
+import copy
+import csv
+
+import pytest
+
+import driver
+
+from driver import get_event_name_from_team
+from ratings.models import Club, Event, IdentityMap, Organization, State, identity_map
+from ratings.registry import TeamRegistry
+from ratings.tgs import get_clubs_by_organization_id, get_events
+from tests.test_incremental import random_matches
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def test_entities_are_immutable_and_hashable():
+    state = State(1, 'Texas')
+
+    with pytest.raises(AttributeError):
+        state.name = 'Ohio'
+    with pytest.raises(AttributeError):
+        state.extra = 1
+
+    assert state == State(id=1, name='Texas')
+    assert len({state, State(1, 'Texas'), State(2, 'Ohio')}) == 2
+    assert copy.copy(state) == state
+    assert state.replace(name='Ohio') == State(1, 'Ohio')
+    assert not hasattr(state, '__dict__')
+
+    with pytest.raises(TypeError):
+        Organization(1, 2, 'ECNL', 3, 4)
+
+
+def test_identity_map_returns_one_instance_per_key():
+    identities = IdentityMap()
+    first = identities.resolve(Club(id=5, name='FC', org_id=9, event_id=7))
+    again = identities.resolve(Club(id=5, name='FC', org_id=9, event_id=7))
+    other_org = identities.resolve(Club(id=5, name='FC', org_id=13, event_id=8))
+
+    assert again is first
+    assert other_org is not first
+    assert identities.get(Club, 5, 9, 7) is first
+
+    renamed = identities.resolve(Club(id=5, name='FC United', org_id=9, event_id=7))
+    assert identities.get(Club, 5, 9, 7) is renamed
+    assert len(identities) == 2
+
+
+def test_club_entries_in_two_events_are_both_held():
+    identities = IdentityMap()
+    entries = [Club(id=5, name='FC', org_id=9, event_id=7), Club(id=5, name='FC', org_id=9, event_id=8)]
+
+    first = [identities.resolve(entry) for entry in entries]
+    again = [identities.resolve(Club(id=5, name='FC', org_id=9, event_id=event_id)) for event_id in (7, 8)]
+
+    assert [a is b for a, b in zip(first, again)] == [True, True]
+    assert identities.get(Club, 5, 9, 7).event_id == 7
+    assert identities.get(Club, 5, 9, 8).event_id == 8
+
+
+def test_loaders_resolve_through_the_identity_map(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    identity_map.clear()
+    write_csv('clubs_org_9.csv', ['id', 'name', 'full_name', 'city', 'logo', 'state_code', 'org_id', 'org_season_id', 'event_id'],
+              [[5, 'FC', 'FC Full', 'Austin', '', 'TX', 9, 60, 70], [6, 'SC', 'SC Full', 'Dallas', '', 'TX', 9, 60, 71]])
+    write_csv('events.csv', ['id', 'name', 'org_id', 'org_name', 'org_season_id', 'org_season_name'],
+              [[70, 'ECNL Texas', 9, 'ECNL Girls', 60, '2024-25']])
+
+    first = get_clubs_by_organization_id(9)
+    second = get_clubs_by_organization_id(9)
+    assert all(a is b for a, b in zip(first, second))
+    assert get_events()[0] is get_events()[0]
+
+    assert get_event_name_from_team(('FC G08', 100, 5), 9) == 'ECNL Texas'
+    assert get_event_name_from_team(('SC G08', 101, 6), 9) is None
+    assert get_event_name_from_team(('XX G08', 102, 8), 9) is None
+    assert identity_map.get(Event, 70).name == 'ECNL Texas'
+    identity_map.clear()
+
+
+def test_club_events_are_loaded_once_per_stats_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    identity_map.clear()
+    write_csv('clubs_org_9.csv', ['id', 'name', 'full_name', 'city', 'logo', 'state_code', 'org_id', 'org_season_id', 'event_id'],
+              [[5, 'FC', 'FC Full', 'Austin', '', 'TX', 9, 60, 70], [5, 'FC', 'FC Full', 'Austin', '', 'TX', 9, 60, 71]])
+    write_csv('events.csv', ['id', 'name', 'org_id', 'org_name', 'org_season_id', 'org_season_name'],
+              [[70, 'ECNL Texas', 9, 'ECNL Girls', 60, '2024-25'], [71, 'ECNL Ohio', 9, 'ECNL Girls', 60, '2024-25']])
+    loads = []
+    monkeypatch.setattr(driver, 'get_clubs_by_organization_id', lambda organization_id: loads.append(organization_id) or get_clubs_by_organization_id(organization_id))
+
+    registry = TeamRegistry()
+    matches = registry.intern_matches(random_matches(13))
+    for match in matches:
+        match.home_team_club_id = match.away_team_club_id = 5
+    for index in range(len(registry)):
+        registry.club_ids[index] = 5
+
+    stats = driver.calculate_team_stats(matches, registry, 9, backend='python')
+
+    assert loads == [9]
+    assert {row['event_name'] for row in stats.values()} == {'ECNL Texas'}
+    identity_map.clear()
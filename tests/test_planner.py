@@ -0,0 +1,100 @@
+from ratings.models import Club, Match
+from ratings.planner import SchedulePlanner
+
+
+def make_match(match_id, home_club_id, away_club_id):
+    match = Match()
+    match.id = match_id
+    match.home_team_club_id = home_club_id
+    match.away_team_club_id = away_club_id
+    return match
+
+
+class Schedules:
+    """
+    Serves each club's schedule in an event from a list of (match, event) pairs and counts requests.
+    """
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.requested = []
+
+    def fetch(self, club):
+        self.requested.append(club.id)
+        schedule = [match for match, event_id in self.matches
+                    if event_id == club.event_id and club.id in (match.home_team_club_id, match.away_team_club_id)]
+        return [match.id for match in schedule], SchedulePlanner.summarize(schedule)
+
+
+def fan_out(function, items):
+    return [function(item) for item in items]
+
+
+def full_harvest(clubs, schedules):
+    return [schedules.fetch(club)[0] for club in clubs]
+
+
+def round_robin(club_ids, event_id, first_match_id):
+    pairs = [(home, away) for index, home in enumerate(club_ids) for away in club_ids[index + 1:]]
+    return [(make_match(first_match_id + offset, home, away), event_id) for offset, (home, away) in enumerate(pairs)]
+
+
+def merged(schedules):
+    seen = []
+    for schedule in schedules:
+        seen.extend(match_id for match_id in schedule if match_id not in seen)
+    return seen
+
+
+def test_last_club_of_a_closed_event_is_skipped():
+    clubs = [Club(id=club_id, org_id=9, event_id=70 if club_id < 5 else 71) for club_id in range(1, 9)]
+    schedules = Schedules(round_robin([1, 2, 3, 4], 70, 100) + round_robin([5, 6, 7, 8], 71, 200))
+
+    planner = SchedulePlanner()
+    planned = planner.fetch(clubs, schedules.fetch, fan_out)
+
+    assert schedules.requested == [1, 2, 3, 5, 6, 7]
+    assert planned[3] == planned[7] == []
+    assert merged(planned) == merged(full_harvest(clubs, Schedules(schedules.matches)))
+    assert (planner.requests_needed, planner.requests_made, planner.requests_saved, planner.requests_skipped) == (8, 6, 2, 2)
+
+
+def test_an_unknown_opponent_keeps_the_last_club():
+    clubs = [Club(id=club_id, org_id=9, event_id=70) for club_id in range(1, 4)]
+    # Club 1 played club 99, which is not in the club list, so the event may hold matches no fetched schedule shows.
+    schedules = Schedules(round_robin([1, 2, 3], 70, 100) + [(make_match(300, 1, 99), 70)])
+
+    planner = SchedulePlanner()
+    planned = planner.fetch(clubs, schedules.fetch, fan_out)
+
+    assert schedules.requested == [1, 2, 3]
+    assert planner.requests_saved == 0
+    assert merged(planned) == merged(full_harvest(clubs, Schedules(schedules.matches)))
+
+
+def test_repeated_and_incomplete_entries_are_not_requested():
+    clubs = [Club(id=1, org_id=9, event_id=70), Club(id=1, org_id=9, event_id=70), Club(id=2, org_id=9, event_id=0),
+             Club(id=0, org_id=9, event_id=70)]
+    schedules = Schedules([(make_match(100, 1, 5), 70)])
+
+    planner = SchedulePlanner()
+    planned = planner.fetch(clubs, schedules.fetch, fan_out)
+
+    assert schedules.requested == [1]
+    assert planned == [[100], [], [], []]
+    assert (planner.requests_needed, planner.requests_made) == (2, 1)
+
+
+def test_verify_fetches_everything_and_counts_missed_matches():
+    clubs = [Club(id=club_id, org_id=9, event_id=70) for club_id in range(1, 5)]
+    # Club 4 also played an opponent outside the club list that no other schedule mentions.
+    schedules = Schedules(round_robin([1, 2, 3, 4], 70, 100) + [(make_match(300, 4, 99), 70)])
+
+    planner = SchedulePlanner(verify=True)
+    planned = planner.fetch(clubs, schedules.fetch, fan_out)
+
+    assert schedules.requested == [1, 2, 3, 4]
+    assert merged(planned) == merged(full_harvest(clubs, Schedules(schedules.matches)))
+    assert planner.requests_skipped == 1
+    assert planner.missed_match_ids == {300}
+    assert 'miss 1 matches' in planner.report()
@@ -0,0 +1,111 @@
+import pytest
+from ratings import matrix
+from ratings.poisson import PoissonModel
+from ratings.registry import TeamRegistry
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+pytestmark = pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+
+
+def test_stronger_attack_scores_more():
+    matches = []
+    for i in range(10):
+        matches.append(make_match(3 * i + 1, 'Alpha', 'Bravo', 4, 1))
+        matches.append(make_match(3 * i + 2, 'Bravo', 'Charlie', 1, 1))
+        matches.append(make_match(3 * i + 3, 'Charlie', 'Alpha', 0, 3))
+
+    model = PoissonModel().fit(matches)
+
+    assert model.attack['Alpha'] > model.attack['Bravo'] > model.attack['Charlie']
+    home_goals, away_goals = model.expected_goals('Alpha', 'Charlie')
+    assert home_goals > away_goals
+
+
+def test_warm_start_from_saved_fit(tmp_path):
+    matches = random_matches(6, number_of_teams=12, number_of_matches=120)
+    state_file = str(tmp_path / 'poisson.json')
+
+    previous = PoissonModel(decay=0.01).fit(matches[:110])
+    previous.save(state_file)
+
+    cold = PoissonModel(decay=0.01).fit(matches)
+    warm = PoissonModel(decay=0.01).fit(matches, warm_start=PoissonModel.load(state_file))
+
+    assert warm.iterations <= cold.iterations
+    for team in cold.teams:
+        assert warm.attack[team] == pytest.approx(cold.attack[team], abs=1e-3)
+        assert warm.defence[team] == pytest.approx(cold.defence[team], abs=1e-3)
+
+
+def test_state_survives_reinterning(tmp_path):
+    matches = random_matches(6, number_of_teams=12, number_of_matches=120)
+    for match in matches:
+        # Without team IDs, the registry keys the teams by name.
+        match.home_team_id = match.away_team_id = 0
+    state_file = str(tmp_path / 'poisson.json')
+
+    first_run = TeamRegistry()
+    PoissonModel().fit(first_run.intern_matches(matches)).rekey(first_run.stable_key).save(state_file)
+
+    # A later run interns the teams in another order, so the indices differ.
+    second_run = TeamRegistry()
+    interned = second_run.intern_matches(reversed(matches))
+    indices = {second_run.stable_key(index): index for index in range(len(second_run))}
+    warm_start = PoissonModel.load(state_file).rekey(indices.get)
+
+    cold = PoissonModel().fit(interned)
+    warm = PoissonModel().fit(interned, warm_start=warm_start)
+
+    assert sorted(warm_start.teams) == list(range(12))
+    assert warm.iterations < cold.iterations
+
+
+def direct_optimum(matches, ridge, dixon_coles):
+    # Minimizes the penalized negative log-likelihood with a general-purpose optimizer, written
+    # out independently of PoissonModel.
+    from scipy.optimize import minimize
+
+    np = matrix.np
+    teams = sorted({match.home_team for match in matches} | {match.away_team for match in matches})
+    index = {team: i for i, team in enumerate(teams)}
+    size = len(teams)
+    home = np.array([index[match.home_team] for match in matches])
+    away = np.array([index[match.away_team] for match in matches])
+    x = np.array([match.home_score for match in matches], dtype=float)
+    y = np.array([match.away_score for match in matches], dtype=float)
+
+    def negative_log_likelihood(theta):
+        intercept, home_advantage, rho = theta[:3]
+        attack, defence = theta[3:3 + size], theta[3 + size:]
+        home_rate = np.exp(intercept + home_advantage + attack[home] - defence[away])
+        away_rate = np.exp(intercept + attack[away] - defence[home])
+        value = x * np.log(home_rate) - home_rate + y * np.log(away_rate) - away_rate
+        if dixon_coles:
+            tau = np.ones(len(x))
+            tau = np.where((x == 0) & (y == 0), 1.0 - home_rate * away_rate * rho, tau)
+            tau = np.where((x == 0) & (y == 1), 1.0 + home_rate * rho, tau)
+            tau = np.where((x == 1) & (y == 0), 1.0 + away_rate * rho, tau)
+            tau = np.where((x == 1) & (y == 1), 1.0 - rho, tau)
+            value = value + np.log(np.maximum(tau, 1e-10))
+        return -value.sum() + ridge * (attack @ attack + defence @ defence)
+
+    bounds = [(None, None), (None, None), (-0.2, 0.2) if dixon_coles else (0.0, 0.0)] + [(None, None)] * (2 * size)
+    result = minimize(negative_log_likelihood, np.zeros(3 + 2 * size), method='L-BFGS-B', bounds=bounds,
+                      options={'ftol': 1e-15, 'gtol': 1e-10, 'maxiter': 10000, 'maxfun': 100000})
+    return teams, result.x
+
+
+@pytest.mark.parametrize("dixon_coles", [False, True])
+def test_fit_reaches_the_direct_optimum(dixon_coles):
+    matches = random_matches(14, number_of_teams=8, number_of_matches=120)
+
+    model = PoissonModel(ridge=0.05, dixon_coles=dixon_coles).fit(matches)
+    teams, theta = direct_optimum(matches, 0.05, dixon_coles)
+
+    assert model.intercept == pytest.approx(theta[0], abs=1e-4)
+    assert model.home_advantage == pytest.approx(theta[1], abs=1e-4)
+    assert model.rho == pytest.approx(theta[2], abs=1e-4)
+    for i, team in enumerate(teams):
+        assert model.attack[team] == pytest.approx(theta[3 + i], abs=1e-4)
+        assert model.defence[team] == pytest.approx(theta[3 + len(teams) + i], abs=1e-4)
@@ -0,0 +1,44 @@
+from ratings.external import external_team_stats_table
+from ratings.registry import TeamRegistry
+from ratings.stats import team_stats_table
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+
+def test_interned_stats_match_name_keyed_stats():
+    matches = random_matches(12)
+    for match in matches:
+        match.home_team_id = int(match.home_team.split()[1]) + 1
+        match.away_team_id = int(match.away_team.split()[1]) + 1
+
+    registry = TeamRegistry()
+    interned = registry.intern_matches(matches)
+
+    by_name = team_stats_table(matches, backend='python')
+    by_index = team_stats_table(interned, backend='python')
+
+    assert len(registry) == len(by_name)
+    assert {registry.name(team): row for team, row in by_index.items()} == by_name
+    assert external_team_stats_table(interned) == by_index
+    assert matches[0].home_team == registry.name(interned[0].home_team)
+
+
+def test_teams_sharing_a_name_stay_separate():
+    first = make_match(1, 'United', 'City', 1, 0)
+    second = make_match(2, 'City', 'United', 3, 0)
+    second.away_team_id = 999
+
+    registry = TeamRegistry()
+    stats = team_stats_table(registry.intern_matches([first, second]), backend='python')
+
+    assert len(stats) == 3
+    assert sorted(registry.name(team) for team in stats) == ['City', 'United', 'United']
+    assert sorted(row['record'] for team, row in stats.items() if registry.name(team) == 'United') == ['0-1-0', '1-0-0']
+    assert registry.key(registry.intern('United', 999)) == ('United', 999, 0)
+
+
+def test_teams_without_id_are_keyed_by_name():
+    registry = TeamRegistry()
+
+    assert registry.intern('A') == registry.intern('A') == 0
+    assert registry.intern('B') == 1
@@ -0,0 +1,71 @@
+import csv
+
+import pytest
+
+from click.testing import CliRunner
+
+import driver
+from ratings.rollup import rollup
+from ratings.stats import SeasonLedger
+from tests.test_cache import write_chain_file
+from tests.test_incremental import random_matches
+from tests.test_stats import make_match
+
+
+def with_meta(match, club_ids, event, flight):
+    match.home_team_club_id, match.away_team_club_id = club_ids
+    match.meta = {'eventName': event, 'flight': flight, 'division': 'G2008'}
+    return match
+
+
+def test_all_levels_in_one_scan():
+    matches = [
+        with_meta(make_match(1, 'A1', 'B1', 2, 0), (1, 2), 'East', 'Premier'),
+        with_meta(make_match(2, 'A2', 'A1', 1, 1), (1, 1), 'East', 'Premier'),
+        with_meta(make_match(3, 'C1', 'B1', 0, 3), (3, 2), 'West', 'Elite'),
+    ]
+    result = rollup(matches, [('club',), ('event', 'flight', 'team'), ('state',), ('division',)], {1: 'VA', 2: 'VA', 3: 'MD'})
+
+    club = dict(result.table(('club',)))
+    assert club[(1,)]['record'] == '1-0-2'
+    assert club[(1,)]['teams'] == 2
+    assert club[(2,)]['wins'] == 1
+
+    standings = result.table(('event', 'flight', 'team'))
+    assert [key for key, _ in standings] == [
+        ('East', 'Premier', 'A1'), ('East', 'Premier', 'A2'), ('East', 'Premier', 'B1'), ('West', 'Elite', 'B1'), ('West', 'Elite', 'C1'),
+    ]
+
+    state = dict(result.table(('state',)))
+    assert state[('VA',)]['matches_played'] == 5
+    assert state[('MD',)]['losses'] == 1
+    assert dict(result.table(('division',)))[('G2008',)]['goals_for'] == 7
+
+
+def test_team_level_matches_ledger():
+    matches = random_matches(9)
+    ledger = SeasonLedger(matches)
+
+    for (team,), row in rollup(matches, [('team',)]).table(('team',)):
+        assert row['record'] == ledger.record(team)
+        assert row['points'] == ledger.points(team)
+
+
+def test_unknown_dimension():
+    with pytest.raises(ValueError):
+        rollup([], [('conference',)])
+
+
+def test_stats_command_names_rollups_after_the_output_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(driver, 'get_club_events', lambda organization_id: {})
+    write_chain_file('matches_chain.csv', 5)
+
+    result = CliRunner().invoke(driver.cli, ['stats', '-f', 'matches_chain.csv', '-o', '9', '--no-cache',
+                                             '--output-file', 'out.csv', '--rollup', 'team'])
+    assert result.exit_code == 0, result.output
+
+    with open('out.csv') as file:
+        assert 'rpi' in next(csv.reader(file))
+    with open('out_by_team.csv') as file:
+        assert next(csv.reader(file))[0] == 'team'
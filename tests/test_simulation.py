@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+from ratings import matrix
+from ratings.stats import RPIEngine
+from tests.test_incremental import random_matches
+
+pytestmark = pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+
+
+def test_batch_rpi_matches_unrounded_engine():
+    matches = random_matches(1)
+    engine = RPIEngine(matches)
+    teams = engine.teams()
+    index = {team: i for i, team in enumerate(teams)}
+
+    home = matrix.np.asarray([index[match.home_team] for match in matches])
+    away = matrix.np.asarray([index[match.away_team] for match in matches])
+    home_won = matrix.np.asarray([[match.home_score > match.away_score for match in matches]])
+    tied = matrix.np.asarray([[match.home_score == match.away_score for match in matches]])
+
+    rpi = matrix.batch_rpi(len(teams), home, away, home_won, tied)
+
+    for team in teams:
+        opponents_owp = [engine.owp(opponent, 15) for opponent in engine.opponents(team)]
+        expected = 0.25 * engine.wp(team, 15) + 0.5 * engine.owp(team, 15) + 0.25 * sum(opponents_owp) / len(opponents_owp)
+        assert rpi[index[team], 0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("model", ['elo', 'poisson'])
+def test_simulation_is_deterministic(model):
+    from ratings.simulation import SeasonSimulator
+
+    matches = random_matches(2)
+    for match in matches[30:]:
+        match.date = datetime(2030, 1, 1)
+
+    simulator = SeasonSimulator(matches, model, as_of=datetime(2025, 1, 1))
+    first = simulator.run(simulations=300, chunk_size=100, workers=1, seed=7)
+    second = simulator.run(simulations=300, chunk_size=100, workers=1, seed=7)
+
+    assert len(simulator.future) == 10
+    assert first == second
+    assert sum(row['first'] for row in first.values()) == pytest.approx(1.0)
+    for row in first.values():
+        assert row['rpi_p05'] <= row['rpi_p50'] <= row['rpi_p95']
@@ -0,0 +1,127 @@
+import pytest
+from datetime import datetime
+from ratings import matrix
+from ratings.models import Match
+from ratings.stats import SeasonLedger, RPIEngine
+from ratings.stats import wins, losses, ties, matches_played, goals_for, goals_against
+from ratings.stats import record, goal_differential, points, wp, owp, oowp, rpi, goals_per_match
+from ratings.stats import team_stats_table
+
+
+def make_match(match_id, home_team, away_team, home_score, away_score, day=1):
+    match = Match()
+    match.id = match_id
+    match.home_team = home_team
+    match.home_team_id = ord(home_team[0])
+    match.away_team = away_team
+    match.away_team_id = ord(away_team[0])
+    match.home_score = home_score
+    match.away_score = away_score
+    match.date = datetime(2024, 9, day)
+    return match
+
+
+@pytest.fixture
+def matches():
+    return [
+        make_match(1, 'Alpha', 'Bravo', 2, 1, 1),
+        make_match(2, 'Charlie', 'Alpha', 0, 0, 2),
+        make_match(3, 'Bravo', 'Charlie', 3, 0, 3),
+        make_match(4, 'Delta', 'Alpha', 1, 4, 4),
+        make_match(5, 'Bravo', 'Delta', 2, 2, 5),
+        make_match(6, 'Charlie', 'Delta', 1, 0, 6),
+    ]
+
+
+@pytest.mark.parametrize("team, expected", [
+    ('Alpha', (2, 0, 1, 3, 6, 2)),
+    ('Bravo', (1, 1, 1, 3, 6, 4)),
+    ('Charlie', (1, 1, 1, 3, 1, 3)),
+    ('Delta', (0, 2, 1, 3, 3, 7)),
+    ('Echo', (0, 0, 0, 0, 0, 0)),
+])
+def test_basic_counters(matches, team, expected):
+    actual = (
+        wins(matches, team),
+        losses(matches, team),
+        ties(matches, team),
+        matches_played(matches, team),
+        goals_for(matches, team),
+        goals_against(matches, team),
+    )
+    assert actual == expected
+
+
+@pytest.mark.parametrize("team, expected_record, expected_gd, expected_points", [
+    ('Alpha', '2-0-1', 4, 7),
+    ('Delta', '0-2-1', -4, 1),
+    ('Echo', '0-0-0', 0, 0),
+])
+def test_composite_counters(matches, team, expected_record, expected_gd, expected_points):
+    assert record(matches, team) == expected_record
+    assert goal_differential(matches, team) == expected_gd
+    assert points(matches, team) == expected_points
+
+
+def test_ledger_matches_functions(matches):
+    ledger = SeasonLedger(matches)
+
+    assert ledger.teams() == ['Alpha', 'Bravo', 'Charlie', 'Delta']
+
+    for team in ledger.teams():
+        assert ledger.wins(team) == wins(matches, team)
+        assert ledger.record(team) == record(matches, team)
+        assert ledger.wp(team) == wp(matches, team)
+        assert ledger.goals_per_match(team) == goals_per_match(matches, team)
+
+
+@pytest.mark.parametrize("team, expected_wp, expected_owp, expected_oowp, expected_rpi", [
+    ('Alpha', 0.67, 0.33, 0.44, 0.44),
+    ('Bravo', 0.33, 0.33, 0.44, 0.36),
+    ('Charlie', 0.33, 0.33, 0.44, 0.36),
+    ('Delta', 0.0, 0.67, 0.33, 0.42),
+    ('Echo', 0.0, 0.0, 0.0, 0.0),
+])
+def test_rpi_components(matches, team, expected_wp, expected_owp, expected_oowp, expected_rpi):
+    assert wp(matches, team) == expected_wp
+    assert owp(matches, team) == expected_owp
+    assert oowp(matches, team) == expected_oowp
+    assert rpi(matches, team) == expected_rpi
+
+
+def test_rpi_engine_table_matches_functions(matches):
+    table = RPIEngine(matches).table()
+
+    assert sorted(table) == ['Alpha', 'Bravo', 'Charlie', 'Delta']
+
+    for team, row in table.items():
+        assert row == {
+            'wp': wp(matches, team),
+            'owp': owp(matches, team),
+            'oowp': oowp(matches, team),
+            'rpi': rpi(matches, team),
+        }
+
+
+@pytest.mark.parametrize("number_of_digits", [2, 3, 4])
+def test_rpi_engine_digits(matches, number_of_digits):
+    engine = RPIEngine(matches)
+
+    for team in engine.teams():
+        assert engine.rpi(team, number_of_digits) == rpi(matches, team, number_of_digits)
+
+
+@pytest.mark.skipif(not matrix.HAS_NUMPY, reason='numpy and scipy are not installed')
+@pytest.mark.parametrize("number_of_digits", [2, 3])
+def test_team_stats_table_backends_agree(matches, number_of_digits):
+    python_table = team_stats_table(matches, number_of_digits, backend='python')
+    numpy_table = team_stats_table(matches, number_of_digits, backend='numpy')
+
+    assert python_table == numpy_table
+    assert python_table['Alpha']['rpi'] == rpi(matches, 'Alpha', number_of_digits)
+    assert python_table['Delta']['record'] == '0-2-1'
+
+
+def test_team_stats_table_rejects_unknown_backend(matches):
+    with pytest.raises(ValueError):
+        team_stats_table(matches, backend='gpu')
@@ -0,0 +1,225 @@
+import csv
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from click.testing import CliRunner
+
+from driver import cli
+from ratings import tgs
+from ratings.models import Organization
+from ratings.planner import SchedulePlanner
+from ratings.services.api import TGSAPIError, TGSClient, set_default_client
+
+
+class FakeTGS(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = 1 << 16
+    connections = set()
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    schedule_requests = 0
+
+    def do_GET(self):
+        with FakeTGS.lock:
+            FakeTGS.connections.add(self.client_address)
+            FakeTGS.in_flight += 1
+            FakeTGS.max_in_flight = max(FakeTGS.max_in_flight, FakeTGS.in_flight)
+        try:
+            self.respond()
+        finally:
+            with FakeTGS.lock:
+                FakeTGS.in_flight -= 1
+
+    def respond(self):
+        if self.path.startswith('/api/Club/get-score-reporting-schedule-list/'):
+            # Club c plays match 10c at home against club c + 1, so neighboring clubs share a match,
+            # and later clubs answer sooner so responses finish out of order.
+            club_id = int(self.path.rsplit('/', 2)[1])
+            with FakeTGS.lock:
+                FakeTGS.schedule_requests += 1
+            time.sleep(0.002 * (12 - club_id % 12))
+            records = [schedule_record(club_id * 10, club_id, club_id + 1, 'G2008' if club_id % 4 else 'G2009')]
+            if club_id > 1:
+                records.append(schedule_record((club_id - 1) * 10, club_id - 1, club_id, 'G2008' if (club_id - 1) % 4 else 'G2009'))
+            body = {'data': {'eventPastScheduleList': records}}
+        elif self.path.startswith('/api/Event/get-org-event-by-eventID/'):
+            event_id = int(self.path.rsplit('/', 1)[1])
+            time.sleep(0.002 * (12 - event_id % 12))
+            body = {'data': {'eventID': event_id, 'eventName': f'Event {event_id}', 'orgID': 9, 'orgName': 'ECNL Girls'}}
+        elif self.path == '/api/Association/get-all-states':
+            body = {'data': [{'stateID': 1, 'stateName': 'Texas'}]}
+        elif self.path == '/api/broken':
+            payload = b'not json'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def schedule_record(match_id, home, away, division):
+    return {
+        'matchID': match_id, 'gameDate': '2024-03-02T10:00:00', 'hometeamID': home, 'awayteamID': away,
+        'homeTeam': f'Club {home}', 'awayTeam': f'Club {away}', 'homeTeamClubID': home, 'awayTeamClubID': away,
+        'homeTeamScore': 1, 'awayTeamScore': 0, 'division': division,
+    }
+
+
+@pytest.fixture
+def server():
+    FakeTGS.connections = set()
+    FakeTGS.max_in_flight = 0
+    FakeTGS.schedule_requests = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeTGS)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_harvest_reuses_pooled_connections(server):
+    with TGSClient(server, timeout=5) as client:
+        set_default_client(client)
+        try:
+            matches = [match for club_id in range(1, 41)
+                       for match in tgs.get_match_results_by_club_id_and_event_id(club_id, 7)]
+        finally:
+            set_default_client(None)
+
+    assert len(matches) == 79
+    assert len(FakeTGS.connections) == 1
+
+
+def test_errors_are_mapped_to_tgs_api_error(server):
+    client = TGSClient(server, timeout=5)
+
+    assert client.states() == [{'stateID': 1, 'stateName': 'Texas'}]
+
+    with pytest.raises(TGSAPIError) as error:
+        client.get_json('/api/missing')
+    assert error.value.status_code == 404
+
+    with pytest.raises(TGSAPIError):
+        client.get_json('/api/broken')
+
+    client.close()
+    with pytest.raises(TGSAPIError) as error:
+        TGSClient('http://127.0.0.1:1', timeout=1).states()
+    assert error.value.status_code is None
+
+
+def write_clubs(organization_id, number_of_clubs):
+    with open(f'clubs_org_{organization_id}.csv', 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'name', 'full_name', 'city', 'logo', 'state_code', 'org_id', 'org_season_id', 'event_id'])
+        for club_id in range(1, number_of_clubs + 1):
+            writer.writerow([club_id, f'Club {club_id}', '', '', '', 'TX', organization_id, 60, 100 + club_id % 5])
+
+
+def test_concurrent_fan_out_is_bounded_and_deterministic(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_clubs(9, 24)
+    organization = Organization(9, 60, 'ECNL Girls', 1)
+
+    results = {}
+    for concurrency in (1, 4):
+        FakeTGS.max_in_flight = 0
+        with TGSClient(server, timeout=5, pool_maxsize=4) as client:
+            set_default_client(client)
+            try:
+                matches = tgs.get_matches('girls', '08', organization, concurrency=concurrency)
+                events = tgs.get_events_by_organization(organization, concurrency=concurrency)
+            finally:
+                set_default_client(None)
+        results[concurrency] = ([match.id for match in matches], [event.id for event in events])
+        assert FakeTGS.max_in_flight <= concurrency
+
+    match_ids, event_ids = results[1]
+    assert results[4] == results[1]
+    assert len(match_ids) == len(set(match_ids)) == 18
+    assert event_ids == [100, 101, 102, 103, 104]
+    assert FakeTGS.max_in_flight > 1
+
+
+def test_age_group_harvest_fetches_each_schedule_once(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_clubs(9, 24)
+    organization = Organization(9, 60, 'ECNL Girls', 1)
+
+    with TGSClient(server, timeout=5) as client:
+        set_default_client(client)
+        try:
+            separate = {year: tgs.get_matches('girls', year, organization) for year in ('08', '09')}
+            FakeTGS.schedule_requests = 0
+            together = tgs.get_matches_by_age_group([('girls', '08'), ('girls', '09')], organization, concurrency=3)
+        finally:
+            set_default_client(None)
+
+    assert FakeTGS.schedule_requests == 24
+    for year in ('08', '09'):
+        assert [match.id for match in together[('girls', year)]] == [match.id for match in separate[year]]
+    assert len(together[('girls', '09')]) == 6
+
+
+def test_driver_harvest_writes_every_age_group(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_clubs(9, 24)
+    with open('organizations.csv', 'w', newline='') as file:
+        csv.writer(file).writerows([['id', 'season_id', 'name', 'season_group_id'], [9, 60, 'ECNL Girls', 1]])
+    open('matches_girls_10_ecnl.csv', 'w').close()
+
+    with TGSClient(server, timeout=5) as client:
+        set_default_client(client)
+        try:
+            result = CliRunner().invoke(cli, ['harvest', '-o', '9'])
+        finally:
+            set_default_client(None)
+
+    assert result.exit_code == 0, result.output
+    assert FakeTGS.schedule_requests == 24
+    assert 'matches_girls_10_ecnl.csv already exists' in result.output
+    with open('matches_girls_08_ecnl.csv') as file:
+        assert len(list(csv.DictReader(file))) == 18
+    with open('matches_girls_07_ecnl.csv') as file:
+        assert list(csv.DictReader(file)) == []
+
+
+def test_planned_harvest_matches_the_full_harvest(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_clubs(9, 24)
+    organization = Organization(9, 60, 'ECNL Girls', 1)
+
+    with TGSClient(server, timeout=5) as client:
+        set_default_client(client)
+        try:
+            full = tgs.get_matches('girls', '08', organization)
+            # Every club also plays its neighbors in other events, so no event is closed and nothing is skipped.
+            planner = SchedulePlanner()
+            planned = tgs.get_matches('girls', '08', organization, concurrency=3, planner=planner)
+        finally:
+            set_default_client(None)
+
+    assert [match.id for match in planned] == [match.id for match in full]
+    assert (planner.requests_needed, planner.requests_saved) == (24, 0)